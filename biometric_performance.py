@@ -1,4 +1,5 @@
 import numpy as np
+from score_accumulator import *
 
 
 class biometric_performance():
@@ -10,6 +11,10 @@ class biometric_performance():
     Methods:
         compute_scores:               computes the similarity scores from the raw data, with respect to a chosen
                                       distance metric
+        compute_cross_scores:         computes the similarity scores between the samples of two different groups
+        compute_scores_accumulators:  computes the similarity scores block by block, accumulating the descriptive
+                                      statistics of the genuine and the impostor score distributions without storing
+                                      the score matrix
         genuines_and_impostors:       computes the genuine and the impostor score distributions from the similarity
                                       scores
         compute_FAR:                  computes the FAR from the impostor score distribution
@@ -36,8 +41,7 @@ class biometric_performance():
         :return:               the 1D-array representing the FAR computed on each threshold value between 0 and 1
         """
         print('Computing FAR')
-        condition = lambda score, thr: score > thr
-        return self._F_performance(np.squeeze(np.array(impostor_score)), thresholds, condition)
+        return self._F_performance(impostor_score, thresholds, 'higher')
 
 
     def compute_FRR(self, genuine_score, thresholds=0.01):
@@ -52,8 +56,7 @@ class biometric_performance():
         :return:               the 1D-array representing the FRR computed on each threshold value between 0 and 1
         """
         print('Computing FRR')
-        condition = lambda score, thr: score <= thr
-        return self._F_performance(genuine_score, thresholds, condition)
+        return self._F_performance(genuine_score, thresholds, 'lower_equal')
 
 
     def _F_performance(self, score, thresholds, condition):
@@ -65,22 +68,39 @@ class biometric_performance():
         :param thresholds:     is the length of each step which has to be used in evaluating the different thresholds
                                for which values compute the FAR and the FRR, or the array representing all the
                                considered thrsholds
-        :param condition:      it is the function which compares a score value with a threshold value (the FAR
-                               considers score > threshold, while the FRR considers score <= threshold)
+        :param condition:      it is the compared condition between a score value and a threshold value, 'higher' for
+                               the FAR (score > threshold) and 'lower_equal' for the FRR (score <= threshold)
 
         :return:               the 1D-array representing the FRR computed on each threshold value between 0 and 1
         """
         if type(thresholds) is float:
             thresholds = self._compute_thresholds(thresholds)
-        F = np.zeros(shape=(1, len(thresholds)))
-        impostors = 0
+        score = np.ravel(score)
+        if np.any(score[1:] < score[:-1]):
+            score = np.sort(score)
         L = len(score)
-        for count, thr in enumerate(thresholds):
-            N = 0
-            for idx in range(0, L):
-                N += condition(score[idx], thr)
-            F[0, count] = N / L
-        return F[0]
+        lower_equal = np.searchsorted(score, thresholds, side='right')
+        if condition == 'higher':
+            return (L - lower_equal) / L
+        return lower_equal / L
+
+
+    def _sorted_rates(self, sorted_genuine, sorted_impostor, thresholds):
+        """
+        The _sorted_rates method computes the False Acceptance Rate (FAR) and the False Rejection Rate (FRR) from
+        already sorted genuine and impostor scores, through a binary search of each threshold (FOR INTERNAL USE ONLY).
+
+        :param sorted_genuine:  is the sorted 1D-array representing the genuine scores
+        :param sorted_impostor: is the sorted 1D-array representing the impostor scores
+        :param thresholds:      is the array representing all the considered thresholds
+
+        :return:                the FAR and the FRR 1D-arrays
+        """
+        L_genuine = len(sorted_genuine)
+        L_impostor = len(sorted_impostor)
+        FAR = (L_impostor - np.searchsorted(sorted_impostor, thresholds, side='right')) / L_impostor
+        FRR = np.searchsorted(sorted_genuine, thresholds, side='right') / L_genuine
+        return FAR, FRR
 
 
     def _compute_thresholds(self, thresholds):
@@ -126,6 +146,19 @@ class biometric_performance():
         :return:    a value representing the EER
         """
         print('Computing EER')
+        return self._EER(FAR, FRR)
+
+
+    def _EER(self, FAR, FRR):
+        """
+        The _EER method computes the Equal Error Rate (EER) without printing any message, in order to be repeatedly
+        used by the resampling analysis (FOR INTERNAL USE ONLY).
+
+        :param FAR: is the 1D-array representing the FAR on each threshold value
+        :param FRR: is the 1D-array representing the FRR on each threshold value
+
+        :return:    a value representing the EER
+        """
         distance = abs(FAR - FRR)
         min_distance = min(distance)
         idx = np.where(distance == min_distance)
@@ -143,6 +176,19 @@ class biometric_performance():
         :return:    a value representing the AUC
         """
         print('Computing AUC')
+        return self._AUC(FAR, CAR)
+
+
+    def _AUC(self, FAR, CAR):
+        """
+        The _AUC method computes the Area Under the Curve (AUC) without printing any message, in order to be repeatedly
+        used by the resampling analysis (FOR INTERNAL USE ONLY).
+
+        :param FAR: is the 1D-array representing the FAR on each threshold value
+        :param CAR: is the 1D-array representing the CARR on each threshold value
+
+        :return:    a value representing the AUC
+        """
         return abs(np.trapz(CAR, FAR))
 
 
@@ -222,37 +268,170 @@ class biometric_performance():
         return FAR, FRR, CRR, CAR, EER, AUC
 
 
-    def compute_scores(self, data, distance):
+    def compute_scores(self, data, distance, memory_budget=2**27, quantizer=None):
         """
         The compute_scores method computes the genuine and the impostor scores.
 
-        :param data:     is the (subjects*repetitions*features) 3D-matrix as to analyze (None by default, the previous
-                         data will be used if None)
-        :param distance: is the function (or one string between 'euclidean', 'manhattan', 'mahalanobis' and
-                         'minkowski', representing the homonymous distances) which is used in order to evaluate the
-                         distance in the genuine and impostor scores computation (None by default, the previously
-                         inserted data if None)
-
-        :return:         the 1D-array representing the genuine scores
-                         (genuine_scores) and the impostor scores (impostor_scores)
+        :param data:          is the (subjects*repetitions*features) 3D-matrix as to analyze, or the generator of its
+                              2D (samples*features) chunks, which are collected in memory before computing the scores
+                              (None by default, the previous data will be used if None)
+        :param distance:      is the function (or one string between 'euclidean', 'manhattan', 'mahalanobis' and
+                              'minkowski', representing the homonymous distances) which is used in order to evaluate
+                              the distance in the genuine and impostor scores computation (None by default, the
+                              previously inserted data if None)
+        :param memory_budget: is the maximum number of bytes used by the temporary arrays of each block of distances
+                              (2**27, i.e. 128 MB, by default)
+        :param quantizer:     is the product_quantizer used to compute approximate euclidean scores from the compact
+                              codes of the samples (trained on the data if not already trained), the asymmetric scores
+                              of each pair being averaged block by block, or None to compute the exact scores (None by
+                              default); the dense score matrix is still returned, so that only the
+                              compute_scores_accumulators method and the search method of the product_quantizer scale
+                              to hundreds of thousands of samples
+
+        :return:              the 1D-array representing the genuine scores
+                              (genuine_scores) and the impostor scores (impostor_scores)
         """
         print('Computing the scores')
-        distance.set_parameters(data)
-        size = np.shape(data)
-        if len(size) == 3:
-            data = np.reshape(data, (size[0]*size[1], size[2]))
-            size = np.shape(data)
-        scores_dimension = size[0]
-        n_features = size[1]
+        data = self._samples_matrix(data)
+        compute_distances, columns, features = self._distances_function(data, distance, quantizer)
+        scores_dimension = np.shape(data)[0]
         scores = np.ones(shape=(scores_dimension, scores_dimension))
-        for i in range(scores_dimension):
-            for j in range(i + 1, scores_dimension):
-                dist = distance.compute_distance(data[i, 0:n_features], data[j, 0:n_features])
-                scores[i, j] = 1 / (1 + dist)
-                scores[j, i] = scores[i, j]
+        for start, stop in self._tiles(scores_dimension, scores_dimension, features, memory_budget):
+            block = 1 / (1 + compute_distances(data[start:stop], columns[start:]))
+            if not (quantizer is None):
+                block = (block + 1 / (1 + compute_distances(data[start:], columns[start:stop])).T) / 2
+            scores[start:stop, start:] = block
+            scores[start:, start:stop] = block.T
+        np.fill_diagonal(scores, 1)
         return scores
 
 
+    def _distances_function(self, data, distance, quantizer=None):
+        """
+        The _distances_function method prepares the computation of the distances between the rows of the data matrix:
+        through the distance object, or through the asymmetric distances between the samples and the compact codes of
+        the product_quantizer (FOR INTERNAL USE ONLY).
+
+        :param data:      is the 2D (samples*features) data matrix
+        :param distance:  is the distance object
+        :param quantizer: is the product_quantizer, or None for the exact distances (None by default)
+
+        :return:          the function computing the distances between a block of samples and a block of columns, the
+                          columns (the data matrix or the codes), and the number of values of each column
+        """
+        if quantizer is None:
+            distance.set_parameters(data)
+            return distance.compute_distances, data, np.shape(data)[1]
+        if type(distance).__name__ != 'euclidean_distance':
+            raise ValueError("The product quantization approximates only the euclidean distance")
+        if quantizer.codebooks is None:
+            quantizer.fit(data)
+        print(' Approximating the euclidean distances through ' + str(quantizer.subspaces) + '-byte codes')
+        return quantizer.compute_distances, quantizer.encode(data), quantizer.subspaces
+
+
+    def compute_cross_scores(self, first, second, distance, memory_budget=2**27):
+        """
+        The compute_cross_scores method computes the similarity scores between each sample of a group and each sample of
+        another group, which are all impostor scores as the groups contain different subjects (the parameters of the
+        distance, such as the inverse covariance matrix of the mahalanobis distance, are computed on both the groups).
+
+        :param first:         is the first (subjects*repetitions*features) 3D-matrix or (samples*features) 2D-matrix
+        :param second:        is the second (subjects*repetitions*features) 3D-matrix or (samples*features) 2D-matrix
+        :param distance:      is the distance object which is used in order to evaluate the distance in the scores
+                              computation
+        :param memory_budget: is the maximum number of bytes used by the temporary arrays of each block of distances
+                              (2**27, i.e. 128 MB, by default)
+
+        :return:              the 2D (first samples*second samples) matrix of cross-group scores
+        """
+        print('Computing the cross-group scores')
+        first = self._samples_matrix(first)
+        second = self._samples_matrix(second)
+        distance.set_parameters(np.vstack((first, second)))
+        scores = np.zeros(shape=(np.shape(first)[0], np.shape(second)[0]))
+        for start, stop in self._tiles(np.shape(first)[0], np.shape(second)[0], np.shape(first)[1], memory_budget):
+            scores[start:stop] = 1 / (1 + distance.compute_distances(first[start:stop], second))
+        return scores
+
+
+    def compute_scores_accumulators(self, data, labels, distance, compression=200, memory_budget=2**27,
+                                    quantizer=None):
+        """
+        The compute_scores_accumulators method computes the similarity scores block by block, feeding each block of
+        genuine and impostor scores to a score_accumulator, so that the descriptive statistics of the two distributions
+        are obtained without storing the score matrix. The streaming is available through this method only: the
+        analyses of the report still compute the whole score vectors, since the rates, the ROC curve and the histograms
+        require all the scores.
+
+        :param data:          is the (subjects*repetitions*features) 3D-matrix or (samples*features) 2D-matrix
+        :param labels:        is the list of labels associated to the samples (in the subject by subject order in the
+                              3D case)
+        :param distance:      is the distance object which is used in order to evaluate the distance in the scores
+                              computation
+        :param compression:   is the compression parameter of the t-digest of the accumulators (200 by default)
+        :param memory_budget: is the maximum number of bytes used by the temporary arrays of each block of distances
+                              (2**27, i.e. 128 MB, by default)
+        :param quantizer:     is the product_quantizer used to compute approximate euclidean scores from the compact
+                              codes of the samples (trained on the data if not already trained), or None to compute the
+                              exact scores (None by default)
+
+        :return:              the score_accumulator of the genuine scores and the one of the impostor scores
+        """
+        print('Computing the scores accumulators')
+        data = self._samples_matrix(data)
+        labels = np.ravel(labels)
+        compute_distances, columns, features = self._distances_function(data, distance, quantizer)
+        samples = np.shape(data)[0]
+        genuine = score_accumulator(compression)
+        impostor = score_accumulator(compression)
+        for start, stop in self._tiles(samples, samples, features, memory_budget):
+            block = 1 / (1 + compute_distances(data[start:stop], columns[start:]))
+            pairs = np.arange(start, samples)[np.newaxis, :] > np.arange(start, stop)[:, np.newaxis]
+            same = labels[start:stop, np.newaxis] == labels[np.newaxis, start:]
+            genuine.update(block[pairs & same])
+            impostor.update(block[pairs & ~same])
+        return genuine, impostor
+
+
+    def _samples_matrix(self, data):
+        """
+        The _samples_matrix method returns the 2D (samples*features) data matrix, flattening the 3D
+        (subjects*repetitions*features) data matrix subject by subject, or stacking the chunks of a data matrix
+        provided by a generator (such as the transform_chunks method of the features_selector) (FOR INTERNAL USE ONLY).
+        The chunks are not streamed: all of them are collected in memory, since every pair of samples is scored (and
+        the parameters of the distance are computed on all the samples), so that only the reduced data matrix has to
+        fit in memory.
+
+        :param data: is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix, or the generator
+                     of its 2D chunks
+
+        :return:     the 2D (samples*features) data matrix
+        """
+        if not (isinstance(data, (list, tuple, np.ndarray))) and hasattr(data, '__iter__'):
+            data = np.vstack([np.reshape(chunk, (-1, np.shape(chunk)[-1])) for chunk in data])
+        data = np.asarray(data, dtype=float)
+        if len(np.shape(data)) == 3:
+            data = np.reshape(data, (-1, np.shape(data)[2]))
+        return data
+
+
+    def _tiles(self, rows, cols, features, memory_budget):
+        """
+        The _tiles method splits the rows of a score matrix into blocks, so that the temporary (rows*columns*features)
+        array used to compute the distances of each block does not exceed the memory budget (FOR INTERNAL USE ONLY).
+
+        :param rows:          is the number of rows of the score matrix
+        :param cols:          is the number of columns of the score matrix
+        :param features:      is the number of features of each sample
+        :param memory_budget: is the maximum number of bytes of the temporary array
+
+        :return:              the list of (start, stop) rows of each block
+        """
+        block = int(max(1, memory_budget // (8 * max(1, cols) * max(1, features))))
+        return [(start, min(start + block, rows)) for start in range(0, rows, block)]
+
+
     def genuines_and_impostors(self, scores, labels):
         """
         The genuines_and_impostors method computes the genuine scores and the
@@ -261,26 +440,17 @@ class biometric_performance():
         :param scores: is the 2D (subjects*subjects) representing the computed scores
         :param labels: is the list of labels associated to the subjects, in the samme order as the scores
 
-        :return:       the array of genuine scores, the array of impostor scores and the array of values found either in
-                       one or both the previous arrays (if a total number of elements lower than 1000 is found, a set of
-                       linearly separated elements having a 0.001 step between two consecutive elements otherwise)
+        :return:       the array of genuine scores, the array of impostor scores (both sorted in ascending order) and
+                       the array of values found either in one or both the previous arrays (if a total number of
+                       elements lower than 1000 is found, a set of linearly separated elements having a 0.001 step
+                       between two consecutive elements otherwise)
         """
         print('Computing genuine scores and impostor scores')
-        scores_dimension, genuine_dimension, impostor_dimension = self._define_dimensions(scores, labels)
-        genuine_score = np.zeros(shape=(genuine_dimension, 1))
-        impostor_score = np.zeros(shape=(impostor_dimension, 1))
-        indg = 0
-        indi = 0
-        for i in range(scores_dimension):
-            for j in range(i):
-                if labels[i] == labels[j]:
-                    genuine_score[indg, 0] = scores[i, j];
-                    indg = indg + 1;
-                else:
-                    impostor_score[indi, 0] = scores[i, j];
-                    indi = indi + 1;
-        gen_unique = np.unique(genuine_score)
-        imp_unique = np.unique(impostor_score)
+        values, rows, cols, genuine = self._sorted_pairs(scores, labels)
+        genuine_score = np.reshape(values[genuine], (-1, 1))
+        impostor_score = np.reshape(values[~genuine], (-1, 1))
+        gen_unique = self._sorted_unique(genuine_score[:, 0])
+        imp_unique = self._sorted_unique(impostor_score[:, 0])
         print('Defining the thresholds')
         thresholds = np.concatenate(([0], gen_unique, imp_unique, [1]))
         thresholds = np.unique(thresholds)
@@ -289,38 +459,90 @@ class biometric_performance():
         return genuine_score, impostor_score, thresholds
 
 
-    def scores_statistics(self, scores):
+    def scores_statistics(self, scores, is_sorted=False):
         """
         The scores_statiscics computes a set of descriptive statistical parameters (mean, median, standard deviation) on
-        the array of similarity scores.
+        the array of similarity scores (the median is read from the central elements if the scores are sorted, or found
+        through a partial sort otherwise, and the standard deviation is computed in two passes, since the scores are
+        often close to each other).
 
-        :param scores: is the 1D array representing the scores distribution (for example, the genuine scores)
+        :param scores:    is the 1D array representing the scores distribution (for example, the genuine scores)
+        :param is_sorted: it has to be True if the scores are sorted in ascending order, False otherwise (False by
+                          default)
 
-        :return:       the mean, the median and the standard deviation of the scores distribution
+        :return:          the mean, the median and the standard deviation of the scores distribution
         """
-        aux_scores = np.array(scores)
-        return np.mean(aux_scores), np.median(aux_scores), np.std(aux_scores)
+        scores = np.ravel(scores)
+        L = len(scores)
+        mean = np.mean(scores)
+        std = np.std(scores)
+        if is_sorted is True:
+            central = scores[[(L - 1) // 2, L // 2]]
+        else:
+            central = np.partition(scores, [(L - 1) // 2, L // 2])[[(L - 1) // 2, L // 2]]
+        return mean, np.mean(central), std
 
 
+    def _sorted_unique(self, values):
+        """
+        The _sorted_unique method returns the distinct values of an array sorted in ascending order, without sorting it
+        again (FOR INTERNAL USE ONLY).
+
+        :param values: is the sorted 1D-array
 
-    def _define_dimensions(self, scores, labels=None):
+        :return:       the 1D-array of distinct values
         """
-        The _define_dimension method computes the dimension of arrays related to impostor and genuine scores computation
-        (FOR INTERNAL USE ONLY).
+        if len(values) == 0:
+            return values
+        distinct = np.ones(shape=(len(values),), dtype=bool)
+        distinct[1:] = values[1:] != values[:-1]
+        return values[distinct]
 
-        :param scores: is the 2D (subjects*subjects) representing the computed scores
-        :param labels: is the list of labels associated to the subjects, in the samme order as the scores
 
-        :return:       the number of subjects, the dimension of the genuine array and the dimension of the impostor
-                       array
-        """
-        scores_dimension = np.shape(scores)[0]
-        genuine_dimension = 0
-        impostor_dimension = 0
-        for i in range(scores_dimension):
-            for j in range(i):
-                if labels[i] == labels[j]:
-                    genuine_dimension += 1;
-                else:
-                    impostor_dimension += 1;
-        return scores_dimension, genuine_dimension, impostor_dimension
\ No newline at end of file
+
+    def _lower_triangle(self, scores):
+        """
+        The _lower_triangle method provides the scores under the main diagonal of the score matrix, each one with the
+        indexes of the related pair of samples, scanned row by row (FOR INTERNAL USE ONLY).
+
+        :param scores: is the 2D (samples*samples) representing the computed scores
+
+        :return:       the 1D-array of scores, and the 1D-arrays of row indexes and column indexes of each score
+        """
+        rows, cols = np.tril_indices(np.shape(scores)[0], -1)
+        return np.asarray(scores)[rows, cols], rows, cols
+
+
+    def _sorted_pairs(self, scores, labels):
+        """
+        The _sorted_pairs method provides the scores under the main diagonal of the score matrix sorted in ascending
+        order, with the indexes of the related pairs of samples and a mask identifying the genuine pairs, so that any
+        subset of pairs selected through a mask is already sorted (FOR INTERNAL USE ONLY).
+
+        :param scores: is the 2D (samples*samples) representing the computed scores
+        :param labels: is the list of labels associated to the samples, in the same order as the scores
+
+        :return:       the sorted 1D-array of scores, the related row and column indexes, and the genuine pairs mask
+        """
+        values, rows, cols = self._lower_triangle(scores)
+        order = np.argsort(values, kind='stable')
+        rows = rows[order]
+        cols = cols[order]
+        labels = np.asarray(labels)
+        return values[order], rows, cols, labels[rows] == labels[cols]
+
+
+    def _pairs_performance(self, values, genuine, mask, thresholds):
+        """
+        The _pairs_performance method computes the Equal Error Rate (EER) and the Area Under the Curve (AUC) related to
+        a subset of the sorted pairs of samples, without printing any message (FOR INTERNAL USE ONLY).
+
+        :param values:     is the sorted 1D-array of scores
+        :param genuine:    is the mask identifying the genuine pairs
+        :param mask:       is the mask identifying the considered pairs
+        :param thresholds: is the array representing all the considered thresholds
+
+        :return:           the EER value and the AUC value
+        """
+        FAR, FRR = self._sorted_rates(values[mask & genuine], values[mask & ~genuine], thresholds)
+        return self._EER(FAR, FRR), self._AUC(FAR, 1 - FRR)
@@ -16,6 +16,29 @@ class data_loader():
         return np.squeeze(np.array(data)).tolist()
 
 
+    def load_chunks(self, data_file, chunk_size=1024):
+        """
+        The load_chunks method allows to load a matrix from a file (.npy or .mat) chunk by chunk, so that it can be
+        processed without keeping it all in memory: the .npy files are memory-mapped, and only the rows of each chunk
+        are read, whereas the .mat files are loaded once and then split. The chunks of a 3D
+        (subjects*repetitions*features) matrix contain whole subjects, and are flattened to 2D (samples*features)
+        matrices.
+
+        :param data_file:  is the name of the file (with its path) containing the matrix
+        :param chunk_size: is the maximum number of samples of each chunk (1024 by default)
+
+        :return:           the generator of the 2D (samples*features) chunks
+        """
+        if '.npy' in data_file:
+            data = np.load(data_file, mmap_mode='r')
+        else:
+            data = np.squeeze(np.asarray(self._load_mat(data_file)))
+        step = max(1, chunk_size // np.shape(data)[1]) if len(np.shape(data)) == 3 else max(1, chunk_size)
+        for start in range(0, np.shape(data)[0], step):
+            chunk = np.asarray(data[start:start + step], dtype=float)
+            yield np.reshape(chunk, (-1, np.shape(chunk)[-1]))
+
+
     def _load_mat(self, data_file):
         """
         The _load_mat method loads a matrix from a .mat file (FOR INTERNAL USE ONLY).
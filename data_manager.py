@@ -43,7 +43,7 @@ class data_manager():
         :return:     the managed 2D data matrix and the list of labels
         """
         [n_subjects, n_repetitions, n_features] = data.shape
-        data = np.reshape(np.transpose(np.double(data), (1, 0, 2)), (n_subjects * n_repetitions, n_features))
+        data = np.reshape(np.double(data), (n_subjects * n_repetitions, n_features))
         labels = np.array([sub for sub in range(n_subjects) for rep in range(n_repetitions)])
         return data, labels
 
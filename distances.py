@@ -21,6 +21,24 @@ class distance(ABC):
     pass
 
 
+  def compute_distances(self, first, second):
+    """
+    The compute_distances method computes the distance between each row of a matrix and each row of another matrix,
+    with respect to the used distance type (the distance between each pair of rows is computed separately, unless a
+    batched computation is provided by the distance type).
+
+    :param first:  is the first 2D (samples*values) matrix
+    :param second: is the second 2D (samples*values) matrix
+
+    :return:       the 2D (first samples*second samples) matrix of distances
+    """
+    distances = np.zeros(shape=(np.shape(first)[0], np.shape(second)[0]))
+    for i in range(np.shape(first)[0]):
+      for j in range(np.shape(second)[0]):
+        distances[i, j] = self.compute_distance(first[i], second[j])
+    return distances
+
+
   def set_parameters(self, data):
     """
     The set_parameters method allows to set the inverse covariance matrix as object attribute (used for computing the
@@ -38,7 +56,8 @@ class manhattan_distance(distance):
   The manhattan_distance allows to compute the manhattan distance between two data points.
 
   Methods:
-    compute_distance: computes the manhattan distance between two data points, represented as two arrays.
+    compute_distance:  computes the manhattan distance between two data points, represented as two arrays.
+    compute_distances: computes the manhattan distance between each row of a matrix and each row of another matrix
   """
 
 
@@ -54,6 +73,19 @@ class manhattan_distance(distance):
     return sum(abs(v1-v2))
 
 
+  def compute_distances(self, first, second):
+    """
+    The compute_distances method computes the manhattan distance between each row of a matrix and each row of another
+    matrix, all at once.
+
+    :param first:  is the first 2D (samples*values) matrix
+    :param second: is the second 2D (samples*values) matrix
+
+    :return:       the 2D (first samples*second samples) matrix of distances
+    """
+    return np.abs(first[:, np.newaxis, :] - second[np.newaxis, :, :]).sum(axis=2)
+
+
 
 
 class euclidean_distance(distance):
@@ -61,7 +93,8 @@ class euclidean_distance(distance):
   The euclidean_distance allows to compute the manhattan distance between two data points.
 
   Methods:
-    compute_distance: computes the euclidean distance between two data points, represented as two arrays.
+    compute_distance:  computes the euclidean distance between two data points, represented as two arrays.
+    compute_distances: computes the euclidean distance between each row of a matrix and each row of another matrix
   """
 
 
@@ -77,6 +110,19 @@ class euclidean_distance(distance):
     return np.linalg.norm(v1-v2)
 
 
+  def compute_distances(self, first, second):
+    """
+    The compute_distances method computes the euclidean distance between each row of a matrix and each row of another
+    matrix, all at once.
+
+    :param first:  is the first 2D (samples*values) matrix
+    :param second: is the second 2D (samples*values) matrix
+
+    :return:       the 2D (first samples*second samples) matrix of distances
+    """
+    return np.sqrt(((first[:, np.newaxis, :] - second[np.newaxis, :, :])**2).sum(axis=2))
+
+
 
 
 class minkowski_distance(distance):
@@ -84,7 +130,8 @@ class minkowski_distance(distance):
   The minkowki_distance allows to compute the manhattan distance between two data points.
 
   Methods:
-    compute_distance: computes the minkowski distance between two data points, represented as two arrays.
+    compute_distance:  computes the minkowski distance between two data points, represented as two arrays.
+    compute_distances: computes the minkowski distance between each row of a matrix and each row of another matrix
   """
 
 
@@ -101,6 +148,20 @@ class minkowski_distance(distance):
     return sum((v1-v2)**p)**(1/p)
 
 
+  def compute_distances(self, first, second):
+    """
+    The compute_distances method computes the minkowski distance between each row of a matrix and each row of another
+    matrix, all at once.
+
+    :param first:  is the first 2D (samples*values) matrix
+    :param second: is the second 2D (samples*values) matrix
+
+    :return:       the 2D (first samples*second samples) matrix of distances
+    """
+    p = np.shape(first)[1]
+    return (((first[:, np.newaxis, :] - second[np.newaxis, :, :])**p).sum(axis=2))**(1/p)
+
+
 
 
 class mahalanobis_distance(distance):
@@ -112,8 +173,9 @@ class mahalanobis_distance(distance):
     inv_cov:          is the inverse covariance matrix, used in the following distance computations
 
   Methods:
-    compute_distance: computes the mahalanobis distance between two data points, represented as two arrays.
-    set_parameters:   sets the inverse covariance matrix attribute obtained from the whole dataset
+    compute_distance:  computes the mahalanobis distance between two data points, represented as two arrays.
+    compute_distances: computes the mahalanobis distance between each row of a matrix and each row of another matrix
+    set_parameters:    sets the inverse covariance matrix attribute obtained from the whole dataset
   """
 
 
@@ -129,6 +191,20 @@ class mahalanobis_distance(distance):
     return mahalanobis(v1, v2, self.inv_cov)
 
 
+  def compute_distances(self, first, second):
+    """
+    The compute_distances method computes the mahalanobis distance between each row of a matrix and each row of
+    another matrix, all at once.
+
+    :param first:  is the first 2D (samples*values) matrix
+    :param second: is the second 2D (samples*values) matrix
+
+    :return:       the 2D (first samples*second samples) matrix of distances
+    """
+    diff = first[:, np.newaxis, :] - second[np.newaxis, :, :]
+    return np.sqrt(np.einsum('ijk,kl,ijl->ij', diff, self.inv_cov, diff))
+
+
   def _inv_cov_managing(self, data):
     """
     The _inv_cov_managing methos is used to reiterate the inverse covariance matrix in case of singular input matrix,
@@ -1,6 +1,10 @@
 import numpy as np
-from sklearn.decomposition import PCA, FastICA
-from scipy import linalg
+from sklearn.decomposition import PCA
+from scipy import linalg, sparse
+from scipy.stats import f
+from utils import *
+from pathlib import Path
+import hashlib
 
 class features_selector():
     """
@@ -13,9 +17,43 @@ class features_selector():
                            contribute
         ica_selection:     extracts a specific number of features from the dataset through the independent component
                            analysis
+        fisher_selection:  selects the features having the highest ratio between the between-subject and the
+                           within-subject variance (ANOVA F), or the ones for which it is significant
+        wrapper_selection: selects the features minimizing the Equal Error Rate, through a greedy forward or backward
+                           search
+        projection_selection: projects the data on a random subspace (sparse or gaussian), whose number of dimensions
+                           can be chosen by the maximum distortion of the distances
+        fit:               fits a feature selection model once (on a data matrix or on the pool of more data matrices),
+                           caching it
+        fit_incremental:   fits a principal component analysis model on a data matrix provided chunk by chunk
+        transform:         applies a fitted feature selection model to a data matrix
+        transform_chunks:  applies a fitted feature selection model to a data matrix provided chunk by chunk
+        save_model:        saves a fitted feature selection model
+        load_model:        loads a saved feature selection model
+
+    Attributes:
+        cache_path:        is the directory in which the fitted models are cached among different runs (None to cache
+                           them only in memory)
     """
 
 
+    def __init__(self, cache_path=None):
+        """
+        The __init__ method is the initializer, which sets the parameters of the randomized decompositions and the
+        cache of the fitted models.
+
+        :param cache_path: is the directory in which the fitted models are cached among different runs (None by default,
+                           the models are cached only in memory)
+        """
+        self.cache_path = cache_path
+        self._models = dict()
+        self._utils = utils()
+        self._additive_distances = {'euclidean': 'squared', 'manhattan': 'absolute'}
+        self._oversampling = 10
+        self._power_iterations = 4
+        self._randomized_start = 32
+
+
     def columns_selection(self, data, indexes):
         """
         The columns_selection method allows to select a subset of features from a data matrix, by using the
@@ -34,69 +72,723 @@ class features_selector():
             return data[0:size[0], indexes]
 
 
-    def pca_selection(self, data, n_features):
+    def pca_selection(self, data, n_features, method='auto', seed=None):
         """
         The pca_selection method allows to select a subset of features from a data matrix, by applying the Principal
-        Component Analysis.
+        Component Analysis. The principal components are obtained through the singular value decomposition of the
+        centered data matrix, without building the covariance matrix of the features.
 
-        :param data:       is the 2D (subjects*features) data matrix
+        :param data:       is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
         :param n_features: if greater or equal to 1, it is the number of principal components to extract (the minimum
                            contribution otherwise, in this case the number of selected features will be the minimum
                            one for which the wished contribution is reached)
+        :param method:     is the decomposition method, between 'full' (thin singular value decomposition), 'randomized'
+                           (randomized singular value decomposition of the only leading components) and 'auto' (the
+                           randomized one only if few components of a large data matrix are required, 'auto' by
+                           default)
+        :param seed:       is the seed used by the randomized decomposition (None by default)
+
+        :return:           the data matrix considenting the only selected features, having the same number of
+                           dimensions of the input one
+        """
+        aux_data = self._center(self._samples(data))
+        components, explained = self._pca_components(aux_data, n_features, method, seed)
+        if len(np.shape(data)) == 3:
+            return np.reshape(aux_data.dot(components.T), (np.shape(data)[0], np.shape(data)[1], -1))
+        return aux_data.dot(components.T)
 
-        :return:           the data matrix considenting the only selected features
+
+    def _pca_components(self, data, n_features, method='auto', seed=None):
+        """
+        The _pca_components method computes the principal components of a centered data matrix, through the thin (or
+        the randomized) singular value decomposition: the variance explained by each component is the square of the
+        related singular value, and the total variance is the squared norm of the data matrix. The sign of each
+        component is chosen so that its largest coefficient is positive (FOR INTERNAL USE ONLY).
+
+        :param data:       is the 2D (samples*features) centered data matrix
+        :param n_features: is the number of principal components to extract, or the minimum contribution (if lower
+                           than 1)
+        :param method:     is the decomposition method, between 'full', 'randomized' and 'auto' ('auto' by default)
+        :param seed:       is the seed used by the randomized decomposition (None by default)
+
+        :return:           the 2D (components*features) matrix of the principal components, and the array of the
+                           contribution of each component to the total variance
         """
-        aux_data = self._center(data)
-        cov = np.cov(aux_data.T)/aux_data.shape[0]
-        v, w = np.linalg.eig(cov)
-        idx = v.argsort()[::-1]
-        w = w[:, idx]
-        tot_v = sum(v)
+        rank = min(np.shape(data))
+        total = np.sum(data * data) + np.finfo(float).eps
+        if method == 'auto':
+            method = 'full'
+            if n_features >= 1 and max(np.shape(data)) > 500 and n_features < 0.8 * rank:
+                method = 'randomized'
+        if method == 'randomized':
+            components = n_features if n_features >= 1 else min(rank, self._randomized_start)
+            while True:
+                s, vt = self._randomized_svd(data, int(components), seed)
+                cumulative = np.cumsum(s ** 2) / total
+                if n_features >= 1 or cumulative[-1] >= n_features or components >= rank // 2:
+                    break
+                components = min(rank, 2 * components)
+            if n_features < 1 and cumulative[-1] < n_features:
+                method = 'full'
+        if method == 'full':
+            u, s, vt = np.linalg.svd(data, full_matrices=False)
+            cumulative = np.cumsum(s ** 2) / total
         if n_features < 1:
-            explained = [i*100/tot_v for i in v]
-            cumulative = np.cumsum(explained)
-            n_features = len(cumulative[cumulative < n_features*100])+1
-        return aux_data.dot(w[:, :n_features])
+            n_features = min(len(s), len(cumulative[cumulative < n_features]) + 1)
+        vt = vt[:int(n_features)]
+        vt *= np.sign(vt[np.arange(len(vt)), np.argmax(np.abs(vt), axis=1)])[:, np.newaxis]
+        return vt, s[:int(n_features)] ** 2 / total
 
 
-    def ica_selection(self, data, n_features):
+    def _randomized_svd(self, data, components, seed=None):
+        """
+        The _randomized_svd method computes the leading singular values and right singular vectors of a data matrix,
+        through the projection on the range of its product by a random Gaussian matrix, refined by some power
+        iterations (Halko, Martinsson and Tropp) (FOR INTERNAL USE ONLY).
+
+        :param data:       is the 2D (samples*features) data matrix
+        :param components: is the number of singular values and vectors which have to be computed
+        :param seed:       is the seed of the random matrix (None by default)
+
+        :return:           the array of the singular values and the 2D (components*features) matrix of the right
+                           singular vectors
+        """
+        rng = np.random.default_rng(seed)
+        size = min(components + self._oversampling, min(np.shape(data)))
+        Q, _ = np.linalg.qr(np.dot(data, rng.normal(size=(np.shape(data)[1], size))))
+        for i in range(self._power_iterations):
+            Q, _ = np.linalg.qr(np.dot(data.T, Q))
+            Q, _ = np.linalg.qr(np.dot(data, Q))
+        u, s, vt = np.linalg.svd(np.dot(Q.T, data), full_matrices=False)
+        return s[:components], vt[:components]
+
+
+    def ica_selection(self, data, n_features, tol=1e-4, max_iter=200, seed=None, restarts=1, workers=1):
         """
         The ica_selection method allows to select a subset of features from a data matrix, by applying the Fast
-        Independent Component Analysis.
+        Independent Component Analysis (a single fit for each restart).
 
         :param data:       is the 2D (subjects*features) data matrix
         :param n_features: if greater or equal to 1, it is the number of independent components to extract
+        :param tol:        is the tolerance below which the algorithm converges (1e-4 by default)
+        :param max_iter:   is the maximum number of iterations (200 by default)
+        :param seed:       is the seed of the initial unmixing matrices (None by default)
+        :param restarts:   is the number of executions from different initial unmixing matrices, the most stable
+                           unmixing matrix being kept (1 by default)
+        :param workers:    is the number of processes among which the restarts are distributed (1 by default)
+
+        :return:           the data matrix considenting the only selected features
+        """
+        return self.fastIca(data, n_features, tol, max_iter, seed, restarts, workers)
+
+
+    def fisher_selection(self, data, n_features, labels=None):
+        """
+        The fisher_selection method allows to select a subset of features from a data matrix, by ranking them through
+        the Fisher ratio between the between-subject variance and the within-subject variance (the ANOVA F statistic
+        having the subjects as groups).
+
+        :param data:       is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param n_features: if greater or equal to 1, it is the number of features with the highest ratio to select (the
+                           significance level otherwise, in this case the features whose ANOVA p-value is lower than it
+                           are selected)
+        :param labels:     is the list of labels identifying the subject of each sample (required in the 2D case, None
+                           by default)
+
+        :return:           the data matrix considenting the only selected features
+        """
+        return self.transform(self.fit('fisher', data, n_features, labels), data)
+
+
+    def wrapper_selection(self, data, n_features, labels=None, direction='forward', distance='euclidean', workers=1):
+        """
+        The wrapper_selection method allows to select a subset of features from a data matrix, through a greedy search
+        of the features minimizing the Equal Error Rate of the biometric system: the forward search adds, at each step,
+        the feature leading to the lowest EER, whereas the backward search removes, at each step, the feature whose
+        removal leads to the lowest EER.
+
+        :param data:       is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param n_features: is the number of features to select
+        :param labels:     is the list of labels identifying the subject of each sample (required in the 2D case, None
+                           by default)
+        :param direction:  is the direction of the search, between 'forward' and 'backward' ('forward' by default)
+        :param distance:   is the distance used to compute the scores, between 'euclidean' and 'manhattan' (or the
+                           related distance object, 'euclidean' by default)
+        :param workers:    is the number of processes among which the candidates of each step are evaluated (1 by
+                           default)
 
         :return:           the data matrix considenting the only selected features
         """
-        ica = FastICA(n_components=n_features)
-        print(self.fastIca(data, n_features)[0, :])
-        print(ica.fit_transform(np.array(data))[0, :])
-        return ica.fit_transform(np.array(data))
+        return self.transform(self.fit(direction, data, n_features, labels, workers=workers, distance=distance), data)
+
+
+    def projection_selection(self, data, n_features, gaussian=False, seed=None):
+        """
+        The projection_selection method allows to reduce the number of features of a data matrix, by projecting
+        it on a random subspace: the euclidean distances between the samples are preserved up to a distortion which
+        depends on the number of samples and on the number of dimensions of the subspace (Johnson-Lindenstrauss lemma).
+        The sparse projection (Achlioptas) has two thirds of null entries, and is applied as a single sparse matrix
+        product.
+
+        :param data:       is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param n_features: if greater or equal to 1, it is the number of dimensions of the subspace (the maximum
+                           distortion of the distances otherwise, in this case the number of dimensions will be the
+                           minimum one guaranteeing it)
+        :param gaussian:   it has to be True for a dense gaussian projection, False for the sparse one (False by
+                           default)
+        :param seed:       is the seed of the random projection (None by default)
+
+        :return:           the data matrix considenting the only extracted features, having the same number of
+                           dimensions of the input one
+        """
+        algorithm = 'gaussian_projection' if gaussian is True else 'random_projection'
+        return self.transform(self.fit(algorithm, data, n_features, seed=seed), data)
+
+
+    def _fisher_scores(self, data, labels):
+        """
+        The _fisher_scores method computes the ANOVA F statistic of each feature, having the subjects as groups, in a
+        single pass over the data sorted by label: the sums of the samples of each subject are obtained as segment sums
+        between the boundaries of the subjects (FOR INTERNAL USE ONLY).
 
+        :param data:   is the 2D (samples*features) data matrix
+        :param labels: is the 1D-array identifying the subject of each sample
 
-    def select_features(self, algorithm, data, features):
+        :return:       the array of the F statistics and the array of the related p-values of each feature
+        """
+        order = np.argsort(labels, kind='stable')
+        labels = np.asarray(labels)[order]
+        data = data[order] - np.mean(data, axis=0)
+        starts = np.flatnonzero(np.concatenate(([True], labels[1:] != labels[:-1])))
+        counts = np.diff(np.append(starts, len(labels)))
+        subjects = len(starts)
+        sums = np.add.reduceat(data, starts, axis=0)
+        between = np.sum(sums ** 2 / counts[:, np.newaxis], axis=0) - np.sum(sums, axis=0) ** 2 / len(labels)
+        within = np.sum(data ** 2, axis=0) - np.sum(sums ** 2 / counts[:, np.newaxis], axis=0)
+        if subjects < 2 or subjects == len(labels):
+            raise ValueError("The fisher selection requires at least two subjects, and more samples than subjects")
+        F = (between / (subjects - 1)) / (np.maximum(within, 0) / (len(labels) - subjects) + np.finfo(float).eps)
+        return F, f.sf(F, subjects - 1, len(labels) - subjects)
+
+
+    def select_features(self, algorithm, data, features, labels=None, distance='euclidean', seed=None, restarts=1,
+                        workers=1, tol=1e-4, max_iter=200):
         """
         The select_features method allows to select a subset of features from a data matrix, by applying aa chosen
         selection algorithm.
 
         :param algorithm:  is the selection algorithm, between 'columns' (for columns selection), 'pca' (for Principal
-                           Component Analysis) and 'ica' (for Independent Component Analysis)
-        :param data:       is the 2D (subjects*features) data matrix (in case of columns selection, a 3D
-                           (subjects*repetitions*features) data matrix is also allowed)
+                           Component Analysis), 'ica' (for Independent Component Analysis), 'fisher' (for the
+                           ranking through the ratio between the between-subject and the within-subject variance),
+                           'forward' and 'backward' (for the greedy searches minimizing the Equal Error Rate)
+        :param data:       is the 2D (subjects*features) or 3D (subjects*repetitions*features) data matrix
         :param n_features: an integer representing the number of features to extract (a number lower than 1 representing
                            the contribution is also allowed in the 'pca' case, and  in this case the number of selected
-                           features will be the minimum one for which the wished contribution is reached)
+                           features will be the minimum one for which the wished contribution is reached, and the
+                           significance level of the ANOVA F test in the 'fisher' case); the models of all the
+                           algorithms but 'columns' are fitted through the fit method, and therefore cached
+        :param labels:     is the list of labels identifying the subject of each sample (required by the supervised
+                           algorithms in the 2D case, None by default)
+        :param distance:   is the distance used by the greedy searches, between 'euclidean' and 'manhattan' (or the
+                           related distance object, 'euclidean' by default)
+        :param seed:       is the seed used by the randomized algorithms (None by default)
+        :param restarts:   is the number of restarts of the independent component analysis (1 by default)
+        :param workers:    is the number of processes among which the restarts (or the candidates of the greedy
+                           searches) are distributed (1 by default)
+        :param tol:        is the tolerance of the independent component analysis (1e-4 by default)
+        :param max_iter:   is the maximum number of iterations of the independent component analysis (200 by default)
 
         :return:           the data matrix considenting the only selected features
         """
-        selection_algorithms = {'columns': self.columns_selection,
-                                'pca': self.pca_selection,
-                                'ica': self.ica_selection}
-        return selection_algorithms[algorithm](data, features)
+        if algorithm == 'columns':
+            return self.columns_selection(data, features)
+        return self.transform(self.fit(algorithm, data, features, labels, seed, restarts, workers, distance, tol,
+                                       max_iter), data)
 
 
-    def fastIca(self, data, n_features):
+    def fit(self, algorithm, data, features, labels=None, seed=None, restarts=1, workers=1, distance='euclidean',
+            tol=1e-4, max_iter=200):
+        """
+        The fit method fits a feature selection model on a data matrix (or on the pool of more data matrices), so that
+        it can be applied to different data matrices through the transform method, projecting them in the same space.
+        The fitted models are cached by algorithm, number of features and content of the data, so that fitting again
+        the same model on the same data only returns the cached one (also among different runs, if a cache directory
+        was set).
+
+        :param algorithm: is the selection algorithm, between 'columns', 'pca', 'ica', 'fisher', 'forward' and
+                          'backward' (the greedy searches minimizing the EER), 'random_projection' (sparse) and
+                          'gaussian_projection'
+        :param data:      is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix, or the list of
+                          data matrices which have to be pooled
+        :param features:  is the list of feature indexes ('columns'), the number of components (or features) to
+                          extract, the minimum contribution ('pca', if lower than 1), the significance level ('fisher',
+                          if lower than 1) or the maximum distortion of the distances (random projections, if lower
+                          than 1)
+        :param labels:    is the list of labels identifying the subject of each sample, or the list of lists of labels
+                          of each pooled data matrix (required by the supervised algorithms in the 2D case, the
+                          subjects of different data matrices being always distinguished, None by default)
+        :param seed:      is the seed used by the randomized algorithms and by the random projections (None by
+                          default)
+        :param restarts:  is the number of restarts of the independent component analysis, the most stable unmixing
+                          matrix being kept (1 by default)
+        :param workers:   is the number of processes among which the restarts (or the candidates of the greedy searches)
+                          are distributed (1 by default)
+        :param distance:  is the distance used by the greedy searches, between 'euclidean' and 'manhattan' (or the
+                          related distance object, 'euclidean' by default)
+        :param tol:       is the tolerance on the change of the unmixing matrix below which the independent component
+                          analysis converges (1e-4 by default)
+        :param max_iter:  is the maximum number of iterations of the independent component analysis (200 by default)
+
+        :return:          the dictionary representing the fitted model
+        """
+        if algorithm == 'columns':
+            return {'algorithm': 'columns', 'features': np.asarray(features)}
+        if not isinstance(distance, str):
+            distance = type(distance).__name__.replace('_distance', '')
+        if algorithm in ('fisher', 'forward', 'backward'):
+            data, labels = self._labeled_samples(data, labels)
+        else:
+            labels = None
+            if isinstance(data, list):
+                data = np.vstack([self._samples(matrix) for matrix in data])
+        data = self._samples(data)
+        key = self._model_key(algorithm, data, features, (seed, restarts, distance, tol, max_iter), labels)
+        if key in self._models:
+            print('Using the cached ' + algorithm + ' model')
+            return self._models[key]
+        if not (self.cache_path is None) and (Path(self.cache_path) / (key + ".npz")).exists():
+            print('Loading the cached ' + algorithm + ' model')
+            self._models[key] = self.load_model(Path(self.cache_path) / (key + ".npz"))
+            return self._models[key]
+        print('Fitting the ' + algorithm + ' model on ' + str(np.shape(data)[0]) + ' samples')
+        if algorithm == 'fisher':
+            return self._store_model(key, self._fisher_model(data, labels, features))
+        if algorithm in ('forward', 'backward'):
+            return self._store_model(key, self._wrapper_model(data, labels, features, algorithm, distance, workers))
+        if algorithm in ('random_projection', 'gaussian_projection'):
+            return self._store_model(key, self._projection_model(data, features, algorithm, seed))
+        mean = np.mean(data, axis=0)
+        if algorithm == 'pca':
+            components, explained = self._pca_components(data - mean, features, seed=seed)
+        else:
+            components = self._ica_components(data - mean, features, tol, max_iter, seed, restarts, workers)
+        model = {'algorithm': algorithm, 'features': np.asarray(features), 'mean': mean, 'components': components}
+        return self._store_model(key, model)
+
+
+    def _store_model(self, key, model):
+        """
+        The _store_model method stores a fitted model in the cache (FOR INTERNAL USE ONLY).
+
+        :param key:   is the key identifying the model
+        :param model: is the dictionary representing the model
+
+        :return:      the dictionary representing the model
+        """
+        self._models[key] = model
+        if not (self.cache_path is None):
+            self.save_model(model, Path(self.cache_path) / (key + ".npz"))
+        return model
+
+
+    def _wrapper_model(self, data, labels, features, direction, distance, workers=1):
+        """
+        The _wrapper_model method executes the greedy forward (or backward) selection of the features minimizing the
+        Equal Error Rate (EER). Since the squared euclidean and the manhattan distances between two samples are sums of
+        per-feature terms (and the EER does not change under monotonic transformations of the scores), the distances
+        of all the pairs of samples are kept as a state, updated by adding (or subtracting) the terms of a single
+        feature for each candidate. The candidates of each step are evaluated by different processes (FOR INTERNAL USE
+        ONLY).
+
+        :param data:      is the 2D (samples*features) data matrix
+        :param labels:    is the 1D-array identifying the subject of each sample
+        :param features:  is the number of features to select
+        :param direction: is the direction of the search, between 'forward' (adding one feature at a time to the empty
+                          set) and 'backward' (removing one feature at a time from the whole set)
+        :param distance:  is the distance, between 'euclidean' and 'manhattan'
+        :param workers:   is the number of processes among which the candidates are distributed (1 by default)
+
+        :return:          the dictionary representing the model, containing the indexes of the selected features (in the
+                          order in which they were added, or in ascending order for the backward search) and the EER
+                          after each step
+        """
+        if distance not in self._additive_distances:
+            raise ValueError("The wrapper selection requires the euclidean or the manhattan distance")
+        metric = self._additive_distances[distance]
+        rows, cols = np.tril_indices(np.shape(data)[0], -1)
+        genuine = labels[rows] == labels[cols]
+        if direction == 'forward':
+            selected, remaining = [], list(range(np.shape(data)[1]))
+            state, sign, steps = np.zeros(shape=(len(rows),)), 1., min(int(features), np.shape(data)[1])
+        else:
+            selected, remaining = list(range(np.shape(data)[1])), list(range(np.shape(data)[1]))
+            state, sign, steps = np.zeros(shape=(len(rows),)), -1., max(0, np.shape(data)[1] - int(features))
+            for feature in remaining:
+                state += self._pair_terms(data[:, feature], rows, cols, metric)
+        path = []
+        memories, references = self._utils._share_arrays([data, rows, cols, genuine], workers)
+        try:
+            for step in range(steps):
+                chunks = [chunk for chunk in np.array_split(remaining, max(1, workers or 1)) if len(chunk) > 0]
+                blocks = [(references, state, sign, metric, chunk) for chunk in chunks]
+                EER = np.concatenate(self._utils._run_blocks(self._wrapper_candidates, blocks, workers))
+                best = remaining[int(np.argmin(EER))]
+                state = state + sign * self._pair_terms(data[:, best], rows, cols, metric)
+                remaining.remove(best)
+                if direction == 'forward':
+                    selected.append(best)
+                else:
+                    selected.remove(best)
+                path.append(np.min(EER))
+                print(' Step ' + str(step + 1) + ': ' + ('added' if direction == 'forward' else 'removed') +
+                      ' feature ' + str(best) + ', EER %.5f' % path[-1])
+        finally:
+            self._utils._release_arrays(memories)
+        return {'algorithm': direction, 'features': np.asarray(selected, dtype=int), 'scores': np.asarray(path)}
+
+
+    def _wrapper_candidates(self, references, state, sign, metric, candidates):
+        """
+        The _wrapper_candidates method evaluates the EER obtained by adding (or removing) each candidate feature to (or
+        from) the current set (FOR INTERNAL USE ONLY).
+
+        :param references: is the list of arrays (or of references to the shared memory containing them) containing the
+                           data matrix, the row and column indexes of the pairs, and the genuine pairs mask
+        :param state:      is the 1D-array of the distances of the pairs on the current set of features
+        :param sign:       is 1 to add the candidate features, -1 to remove them
+        :param metric:     is the per-feature term, between 'squared' and 'absolute'
+        :param candidates: is the array of the candidate features
+
+        :return:           the array of the EERs of each candidate
+        """
+        arrays, memories = self._utils._attach_arrays(references)
+        data, rows, cols, genuine = arrays
+        EER = np.array([self._pairs_EER(state + sign * self._pair_terms(data[:, feature], rows, cols, metric),
+                                        genuine) for feature in candidates])
+        del arrays, data, rows, cols, genuine
+        self._utils._detach_arrays(memories)
+        return EER
+
+
+    def _pair_terms(self, column, rows, cols, metric):
+        """
+        The _pair_terms method computes the contribution of a single feature to the distance of each pair of samples
+        (FOR INTERNAL USE ONLY).
+
+        :param column: is the 1D-array of the values of the feature
+        :param rows:   is the 1D-array of the first sample index of each pair
+        :param cols:   is the 1D-array of the second sample index of each pair
+        :param metric: is the per-feature term, between 'squared' (euclidean) and 'absolute' (manhattan)
+
+        :return:       the 1D-array of the terms of each pair
+        """
+        difference = column[rows] - column[cols]
+        if metric == 'squared':
+            return difference * difference
+        return np.abs(difference)
+
+
+    def _pairs_EER(self, distances, genuine):
+        """
+        The _pairs_EER method computes the Equal Error Rate from the distances of the pairs of samples, through a single
+        sort: each distinct distance is used as threshold, the pairs farther than it being rejected (FOR INTERNAL USE
+        ONLY).
+
+        :param distances: is the 1D-array of the distances of the pairs
+        :param genuine:   is the mask identifying the genuine pairs
+
+        :return:          the EER value
+        """
+        order = np.argsort(distances, kind='stable')
+        values = distances[order]
+        accepted_genuine = np.cumsum(genuine[order])
+        accepted_impostor = np.arange(1, len(values) + 1) - accepted_genuine
+        last = np.append(values[1:] != values[:-1], True)
+        FRR = 1 - accepted_genuine[last] / max(1, accepted_genuine[-1])
+        FAR = accepted_impostor[last] / max(1, accepted_impostor[-1])
+        difference = np.abs(FAR - FRR)
+        closest = difference == np.min(difference)
+        return np.mean((FAR[closest] + FRR[closest]) / 2)
+
+
+    def _projection_model(self, data, features, algorithm, seed=None):
+        """
+        The _projection_model method generates the random projection matrix: the sparse one has entries equal to
+        +sqrt(3/k) and -sqrt(3/k) with probability 1/6 each, and null otherwise (Achlioptas), whereas the gaussian one
+        has normal entries with variance 1/k, being k the number of dimensions of the subspace. The expected distortion
+        of the distances is the one guaranteed by the Johnson-Lindenstrauss lemma for the number of fitted samples
+        (FOR INTERNAL USE ONLY).
+
+        :param data:      is the 2D (samples*features) data matrix
+        :param features:  is the number of dimensions of the subspace, or the maximum distortion (if lower than 1)
+        :param algorithm: is the projection, between 'random_projection' (sparse) and 'gaussian_projection'
+        :param seed:      is the seed of the random projection (None by default)
+
+        :return:          the dictionary representing the model, containing the projection matrix (in compressed
+                          sparse rows format for the sparse projection) and the expected distortion
+        """
+        samples, columns = np.shape(data)
+        dimensions = int(features) if features >= 1 else self._jl_dimensions(samples, features)
+        if dimensions >= columns:
+            print('The projection requires ' + str(dimensions) + ' dimensions, not less than the ' + str(columns) +
+                  ' features: ' + str(columns) + ' dimensions are used')
+            dimensions = columns
+        distortion = self._jl_distortion(samples, dimensions)
+        print('Projecting ' + str(columns) + ' features on ' + str(dimensions) + ' dimensions, expected distortion of '
+              'the distances %.5f' % distortion)
+        rng = np.random.default_rng(seed)
+        model = {'algorithm': algorithm, 'features': np.asarray(features), 'distortion': distortion}
+        if algorithm == 'gaussian_projection':
+            model['mean'] = np.zeros(shape=(columns,))
+            model['components'] = rng.normal(scale=1 / np.sqrt(dimensions), size=(dimensions, columns))
+            return model
+        projection = sparse.random(dimensions, columns, density=1 / 3, format='csr', random_state=rng,
+                                   data_rvs=lambda n: np.where(rng.random(n) < 0.5, -1., 1.) * np.sqrt(3 / dimensions))
+        model.update({'values': projection.data, 'indices': projection.indices, 'indptr': projection.indptr,
+                      'shape': np.asarray(projection.shape)})
+        return model
+
+
+    def _jl_dimensions(self, samples, distortion):
+        """
+        The _jl_dimensions method computes the minimum number of dimensions of a random projection preserving the
+        distances between the samples up to the given distortion, 4 * ln(samples) / (distortion^2 / 2 - distortion^3 /
+        3) (Johnson-Lindenstrauss lemma, Dasgupta and Gupta bound) (FOR INTERNAL USE ONLY).
+
+        :param samples:    is the number of samples
+        :param distortion: is the maximum distortion (between 0 and 1)
+
+        :return:           the number of dimensions
+        """
+        return max(1, int(np.ceil(4 * np.log(samples) / (distortion ** 2 / 2 - distortion ** 3 / 3))))
+
+
+    def _jl_distortion(self, samples, dimensions):
+        """
+        The _jl_distortion method computes the distortion of the distances guaranteed by the Johnson-Lindenstrauss
+        lemma for a random projection on the given number of dimensions, inverting the bound used by the _jl_dimensions
+        method through the bisection method (FOR INTERNAL USE ONLY).
+
+        :param samples:    is the number of samples
+        :param dimensions: is the number of dimensions
+
+        :return:           the distortion, or infinity if the number of dimensions is too small to guarantee any
+                           distortion lower than 1
+        """
+        bound = 4 * np.log(samples) / dimensions
+        if bound >= 1 / 6:
+            return np.inf
+        low, high = 0., 1.
+        for i in range(60):
+            middle = (low + high) / 2
+            if middle ** 2 / 2 - middle ** 3 / 3 < bound:
+                low = middle
+            else:
+                high = middle
+        return high
+
+
+    def _fisher_model(self, data, labels, features):
+        """
+        The _fisher_model method selects the features having the highest ANOVA F statistics, or the ones whose p-value
+        is lower than the significance level (at least the best one) (FOR INTERNAL USE ONLY).
+
+        :param data:     is the 2D (samples*features) data matrix
+        :param labels:   is the 1D-array identifying the subject of each sample
+        :param features: is the number of features to select, or the significance level (if lower than 1)
+
+        :return:         the dictionary representing the model, containing the indexes of the selected features sorted
+                         by decreasing F statistic and the F statistics of all the features
+        """
+        F, pvalue = self._fisher_scores(data, labels)
+        order = np.argsort(-F, kind='stable')
+        if features >= 1:
+            selected = order[:int(features)]
+        else:
+            selected = order[pvalue[order] < features]
+            if len(selected) == 0:
+                print('No feature has a significant ANOVA F statistic, the best one is selected')
+                selected = order[:1]
+        print('Selected ' + str(len(selected)) + ' features out of ' + str(len(F)))
+        return {'algorithm': 'fisher', 'features': selected, 'scores': F}
+
+
+    def _labeled_samples(self, data, labels):
+        """
+        The _labeled_samples method provides the 2D (samples*features) data matrix and the related subject of each
+        sample, pooling more data matrices if required, so that the subjects of different data matrices are always
+        distinguished (FOR INTERNAL USE ONLY).
+
+        :param data:   is the data matrix, or the list of data matrices
+        :param labels: is the list of labels, or the list of lists of labels of each data matrix (None for 3D data)
+
+        :return:       the 2D (samples*features) data matrix and the 1D-array identifying the subject of each sample
+        """
+        if not isinstance(data, list):
+            data, labels = [data], [labels]
+        elif labels is None:
+            labels = [None] * len(data)
+        matrices, subjects, offset = [], [], 0
+        for matrix, matrix_labels in zip(data, labels):
+            matrix, matrix_labels = self._utils._data_manager.data_management(matrix, matrix_labels)
+            if matrix_labels is None:
+                raise ValueError("The fisher selection requires the labels of the subjects of 2D data matrices")
+            ids = np.unique(np.asarray(matrix_labels), return_inverse=True)[1]
+            matrices.append(self._samples(matrix))
+            subjects.append(np.ravel(ids) + offset)
+            offset += np.max(ids) + 1
+        return np.vstack(matrices), np.concatenate(subjects)
+
+
+    def transform(self, model, data):
+        """
+        The transform method applies a fitted feature selection model to a data matrix.
+
+        :param model: is the dictionary representing the model, provided by the fit (or the load_model) method
+        :param data:  is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+
+        :return:      the data matrix considering the only selected (or extracted) features, having the same number of
+                      dimensions of the input one
+        """
+        if model['algorithm'] in ('columns', 'fisher', 'forward', 'backward'):
+            return self.columns_selection(data, model['features'])
+        data = np.asarray(data, dtype=float)
+        size = np.shape(data)
+        if model['algorithm'] == 'random_projection':
+            projection = sparse.csr_matrix((model['values'], model['indices'], model['indptr']),
+                                           shape=tuple(model['shape']))
+            projected = np.asarray(projection.dot(self._samples(data).T)).T
+        else:
+            projected = np.dot(self._samples(data) - model['mean'], model['components'].T)
+        if len(size) == 3:
+            return np.reshape(projected, (size[0], size[1], -1))
+        return projected
+
+
+    def fit_incremental(self, chunks, n_features):
+        """
+        The fit_incremental method fits a Principal Component Analysis model on a data matrix provided chunk by chunk
+        (for example by the load_chunks method of the data_loader), so that the whole data matrix never has to be kept
+        in memory: the mean and the scatter matrix of the features are accumulated through the Chan formulas, and the
+        principal components are the eigenvectors of the resulting covariance matrix. The fitted model can be applied
+        through the transform (or the transform_chunks) method, but it is not cached.
+
+        :param chunks:     is the iterable of 2D (samples*features) or 3D (subjects*repetitions*features) chunks of the
+                           data matrix
+        :param n_features: if greater or equal to 1, it is the number of principal components to extract (the minimum
+                           contribution otherwise)
+
+        :return:           the dictionary representing the fitted model
+        """
+        count, mean, scatter = 0, None, None
+        for chunk in chunks:
+            chunk = self._samples(chunk)
+            if np.shape(chunk)[0] == 0:
+                continue
+            chunk_mean = np.mean(chunk, axis=0)
+            centered = chunk - chunk_mean
+            if mean is None:
+                mean, scatter = np.zeros(shape=(np.shape(chunk)[1],)), np.zeros(shape=(np.shape(chunk)[1],) * 2)
+            total = count + np.shape(chunk)[0]
+            delta = chunk_mean - mean
+            scatter += np.dot(centered.T, centered) + np.outer(delta, delta) * count * np.shape(chunk)[0] / total
+            mean += delta * np.shape(chunk)[0] / total
+            count = total
+        if count < 2:
+            raise ValueError("At least two samples are required to fit the principal components")
+        print('Fitting the incremental pca model on ' + str(count) + ' samples')
+        values, vectors = np.linalg.eigh(scatter)
+        values, vectors = np.maximum(values[::-1], 0), vectors[:, ::-1].T
+        cumulative = np.cumsum(values) / (np.sum(values) + np.finfo(float).eps)
+        if n_features < 1:
+            n_features = min(len(values), len(cumulative[cumulative < n_features]) + 1)
+        components = vectors[:int(n_features)]
+        components *= np.sign(components[np.arange(len(components)), np.argmax(np.abs(components), axis=1)])[:,
+                                                                                                           np.newaxis]
+        return {'algorithm': 'pca', 'features': np.asarray(n_features), 'mean': mean, 'components': components}
+
+
+    def transform_chunks(self, model, chunks):
+        """
+        The transform_chunks method applies a fitted feature selection model to a data matrix provided chunk by chunk,
+        yielding the transformed chunks one at a time. They can be passed directly to the score computation of the
+        biometric_performance class, which collects them in memory: only the original data matrix is never loaded
+        as a whole.
+
+        :param model:  is the dictionary representing the model, provided by the fit (or the fit_incremental, or the
+                       load_model) method
+        :param chunks: is the iterable of 2D (samples*features) or 3D (subjects*repetitions*features) chunks of the
+                       data matrix
+
+        :return:       the generator of the transformed chunks
+        """
+        for chunk in chunks:
+            yield self.transform(model, chunk)
+
+
+    def save_model(self, model, path):
+        """
+        The save_model method saves a fitted feature selection model (in .npz format).
+
+        :param model: is the dictionary representing the model
+        :param path:  is the name of the file
+        """
+        np.savez(path, **{key: np.asarray(value) for key, value in model.items()})
+
+
+    def load_model(self, path):
+        """
+        The load_model method loads a feature selection model saved by the save_model method.
+
+        :param path: is the name of the file
+
+        :return:     the dictionary representing the model
+        """
+        with np.load(path, allow_pickle=False) as stored:
+            model = {key: stored[key] for key in stored.files}
+        model['algorithm'] = str(model['algorithm'])
+        return model
+
+
+    def _model_key(self, algorithm, data, features, settings, labels=None):
+        """
+        The _model_key method provides the key identifying a model in the cache, as the hash of the algorithm, of its
+        parameters and of the content of the data (FOR INTERNAL USE ONLY).
+
+        :param algorithm: is the selection algorithm
+        :param data:      is the 2D (samples*features) data matrix
+        :param features:  is the number of features (or the minimum contribution)
+        :param settings:  is the tuple containing the seed of the randomized algorithms, the number of restarts, the
+                          distance of the greedy searches, and the tolerance and the maximum number of iterations of
+                          the independent component analysis
+        :param labels:    is the 1D-array identifying the subject of each sample, for the supervised algorithms (None
+                          by default)
+
+        :return:          the hexadecimal key
+        """
+        digest = hashlib.sha1(np.ascontiguousarray(data).view(np.uint8))
+        if not (labels is None):
+            digest.update(np.ascontiguousarray(labels, dtype=np.int64).view(np.uint8))
+        digest.update(str((algorithm, np.shape(data), str(data.dtype), features, settings)).encode())
+        return digest.hexdigest()
+
+
+    def _samples(self, data):
+        """
+        The _samples method returns the 2D (samples*features) data matrix, flattening the 3D
+        (subjects*repetitions*features) data matrix subject by subject (FOR INTERNAL USE ONLY).
+
+        :param data: is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+
+        :return:     the 2D (samples*features) data matrix
+        """
+        data = np.asarray(data, dtype=float)
+        if len(np.shape(data)) == 3:
+            data = np.reshape(data, (-1, np.shape(data)[2]))
+        return data
+
+
+    def fastIca(self, data, n_features, tol=1e-4, max_iter=200, seed=None, restarts=1, workers=1):
         """
         The fastICA method executes a features extraction, through the FastICA algorithm which extimates a certain
         number of independent components chosen by the user (the symmetric orthogonalization as orthogonalization
@@ -104,28 +796,106 @@ class features_selector():
 
         :param data:       is the data matrix from which the features have to be extracted
         :param n_features: is the number of features which have to be extracted
+        :param tol:        is the tolerance on the change of the unmixing matrix below which the algorithm converges
+                           (1e-4 by default)
+        :param max_iter:   is the maximum number of iterations (200 by default)
+        :param seed:       is the seed of the initial unmixing matrices (None by default)
+        :param restarts:   is the number of executions from different initial unmixing matrices, the most stable
+                           unmixing matrix being kept (1 by default)
+        :param workers:    is the number of processes among which the restarts are distributed (1 by default)
 
         :return:           the transformed data matrix
         """
-        max_iter = 200
-        tol = 1e-4
+        data = self._center(data)
+        return np.dot(data, self._ica_components(data, n_features, tol, max_iter, seed, restarts, workers).T)
+
+
+    def _ica_components(self, data, n_features, tol=1e-4, max_iter=200, seed=None, restarts=1, workers=1):
+        """
+        The _ica_components method computes the unmixing matrix of the independent component analysis: the data are
+        whitened once, then the fixed-point iterations are executed from different random initial matrices (possibly
+        by different processes), and the unmixing matrix most similar on average to the ones of the other restarts is
+        kept, as the most stable estimate (FOR INTERNAL USE ONLY). The whitening matrix is scaled by the square root of
+        the number of samples, as the whitened data, so that the extracted sources have unit variance.
+
+        :param data:       is the 2D (samples*features) centered data matrix
+        :param n_features: is the number of independent components
+        :param tol:        is the tolerance below which the algorithm converges (1e-4 by default)
+        :param max_iter:   is the maximum number of iterations (200 by default)
+        :param seed:       is the seed of the initial unmixing matrices (None by default)
+        :param restarts:   is the number of restarts (1 by default)
+        :param workers:    is the number of processes among which the restarts are distributed (1 by default)
+
+        :return:           the 2D (components*features) unmixing matrix, to be applied to the centered data
+        """
+        X, K = self._whitening(data.T, n_features, np.shape(data)[0])
+        seeds = self._utils._spawn_seeds(seed, restarts)
+        results = self._utils._run_blocks(self._ica_restart, [(X, n_features, tol, max_iter, s) for s in seeds],
+                                          workers)
+        best, stability = self._most_stable([result[0] for result in results])
+        W, iterations, lim = results[best]
+        converged = np.sum([result[2] < tol for result in results])
+        if lim < tol:
+            print('ICA converged after ' + str(iterations) + ' iterations', end="")
+        else:
+            print('ICA did not converge after ' + str(iterations) + ' iterations (change %.2e, tolerance %.2e)'
+                  % (lim, tol), end="")
+        if restarts > 1:
+            print(', restart ' + str(best + 1) + ' kept (stability %.5f, ' % stability + str(converged) + ' of ' +
+                  str(restarts) + ' restarts converged)')
+        else:
+            print("")
+        return np.dot(W, K) * np.sqrt(np.shape(data)[0])
+
+
+    def _ica_restart(self, X, n_components, tol, max_iter, seed):
+        """
+        The _ica_restart method executes the fixed-point iterations of the FastICA algorithm on the whitened data, from
+        a random initial unmixing matrix (FOR INTERNAL USE ONLY).
 
-        data = self._center(data).T
-        n_samples, p = data.shape
-        X, K = self._whitening(data, n_features, p)
-        W = self._initial_W(X, n_features)
+        :param X:            is the whitened data matrix
+        :param n_components: is the number of independent components
+        :param tol:          is the tolerance below which the algorithm converges
+        :param max_iter:     is the maximum number of iterations
+        :param seed:         is the seed of the initial unmixing matrix
+
+        :return:             the unmixing matrix, the number of executed iterations and the last change of the matrix
+        """
+        p = np.shape(X)[1]
+        W = self._initial_W(X, n_components, seed)
+        lim = np.inf
         for ii in range(max_iter):
             g, dg = self._logcosh(X, W)
-            W = (np.dot(g, X.T)/p)-dg[:, np.newaxis]*W
-            s, u = linalg.eigh(np.dot(W, W.T))
-            aux_W = np.linalg.multi_dot([u*(1./np.sqrt(s)), u.T, W])
+            update = (np.dot(g, X.T)/p)-dg[:, np.newaxis]*W
+            s, u = linalg.eigh(np.dot(update, update.T))
+            aux_W = np.linalg.multi_dot([u*(1./np.sqrt(s)), u.T, update])
             lim = max(abs(abs(np.diag(np.dot(aux_W, W.T)))-1))
             W = aux_W
             if lim < tol:
                 break
+        return W, ii + 1, lim
 
-        S = np.linalg.multi_dot([W, K, data]).T
-        return S
+
+    def _most_stable(self, unmixings):
+        """
+        The _most_stable method identifies the most stable among the unmixing matrices of different restarts: the
+        similarity between two matrices is the mean, over the components of the first one, of the highest absolute
+        correlation with a component of the second one (the rows being orthonormal in the whitened space), and the
+        stability of a matrix is its mean similarity with the other ones (FOR INTERNAL USE ONLY).
+
+        :param unmixings: is the list of unmixing matrices
+
+        :return:          the index of the most stable unmixing matrix and its stability
+        """
+        if len(unmixings) == 1:
+            return 0, 1.
+        stability = np.zeros(shape=(len(unmixings),))
+        for a in range(len(unmixings)):
+            for b in range(len(unmixings)):
+                if a != b:
+                    stability[a] += np.mean(np.max(np.abs(np.dot(unmixings[a], unmixings[b].T)), axis=1))
+        stability /= len(unmixings) - 1
+        return int(np.argmax(stability)), np.max(stability)
 
 
     def _logcosh(self, X, W):
@@ -141,24 +911,20 @@ class features_selector():
         """
         x = np.dot(W, X)
         G = np.tanh(x, x)
-        dG = np.zeros(x.shape[0])
-        for idx, dG_idx in enumerate(G):
-            dG[idx] = (1 - dG_idx ** 2).mean()
+        dG = (1 - G ** 2).mean(axis=1)
         return G, dG
 
 
     def _center(self, data):
         """
-        The _center method centers the data on zero (FOR INTERNAL USE ONLY).
+        The _center method centers the data on zero, without modifying the input data matrix (FOR INTERNAL USE ONLY).
 
         :param data: is the data matrix
 
         :return:     the centered data matrix
         """
-        data = np.array(data)
-        mean = data.mean(axis=0)
-        data -= mean
-        return data
+        data = np.asarray(data, dtype=float)
+        return data - data.mean(axis=0)
 
 
     def _whitening(self, data, n_components, n_features):
@@ -178,17 +944,18 @@ class features_selector():
         return X, K
 
 
-    def _initial_W(self, X, n_components):
+    def _initial_W(self, X, n_components, seed=None):
         """
         The _initial_W method provides the initial random values for the components matrix (FOR INTERNAL USE ONLY).
 
         :param X:            is the preprocessed data matrix
         :param n_components: is the number of independent components which have to be extracted
+        :param seed:         is the seed of the random values (None by default)
 
         :return:             the initial components matrix
         """
-        random_state = np.random.mtrand._rand
-        w_init = np.asarray(random_state.normal(size=(n_components, n_components)), dtype=X.dtype)
+        rng = np.random.default_rng(seed)
+        w_init = np.asarray(rng.normal(size=(n_components, n_components)), dtype=X.dtype)
         s, u = linalg.eigh(np.dot(w_init, w_init.T))
         W = np.linalg.multi_dot([u*(1./np.sqrt(s)), u.T, w_init])
         return W
\ No newline at end of file
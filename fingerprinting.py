@@ -0,0 +1,106 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from pathlib import Path
+from utils import *
+
+
+class fingerprinting():
+    """
+    The fingerprinting class provides the identifiability analysis of the subjects between two sessions (i.e. two
+    repetitions), through the correlation matrix between the samples of the subjects in the first session and the
+    samples of the subjects in the second one.
+
+    Methods:
+        compute_identifiability: computes the correlation matrix between the two sessions, the identification success
+                                 rate, the differential identifiability and the contribution of each feature to it
+        identifiability_plot:    plots the correlation matrix between the two sessions
+    """
+
+
+    def __init__(self):
+        """
+        The __init__ method is the initializer, which sets the value for the attibutes.
+        """
+        self._utils = utils()
+
+
+    def compute_identifiability(self, data, labels=None, sessions=(0, 1)):
+        """
+        The compute_identifiability method computes the Pearson correlation between each sample of the first session
+        and each sample of the second session, as a single matrix product of the z-scored samples, and evaluates the
+        identifiability of the subjects through it.
+
+        :param data:     it is the 3D (subjects*repetitions*features) data matrix, or the 2D (samples*features) data
+                         matrix having the same number of samples for each subject
+        :param labels:   it is the list of labels identifying the subject of each sample (used in the 2D case, None by
+                         default)
+        :param sessions: it is the pair of repetitions which are considered as the two sessions ((0, 1) by default)
+
+        :return:         a dictionary containing the (subjects*subjects) 'correlation' matrix (first session on the
+                         rows), the identification 'success_rate' (averaged on both the directions), the self
+                         correlation 'Iself', the correlation between different subjects 'Iothers', the differential
+                         identifiability 'Idiff' (as percentage) and the contribution of each feature to the
+                         differential identifiability 'edges_contribution'
+        """
+        data = self._utils._repeated_3D(data, labels)
+        subjects, repetitions, features = np.shape(data)
+        print('Computing identifiability on ' + str(subjects) + ' subjects and ' + str(features) + ' features')
+        first = self._zscore(data[:, sessions[0], :])
+        second = self._zscore(data[:, sessions[1], :])
+        correlation = np.dot(first, second.T) / features
+
+        results = dict()
+        results['correlation'] = correlation
+        identity = np.arange(subjects)
+        results['success_rate'] = (np.mean(np.argmax(correlation, axis=1) == identity) +
+                                   np.mean(np.argmax(correlation, axis=0) == identity)) / 2
+        self_products = np.sum(first * second, axis=0)
+        others_products = np.sum(first, axis=0) * np.sum(second, axis=0) - self_products
+        results['edges_contribution'] = 100 * (self_products / subjects -
+                                               others_products / (subjects * (subjects - 1))) / features
+        results['Iself'] = np.mean(np.diag(correlation))
+        results['Iothers'] = (np.sum(correlation) - np.trace(correlation)) / (subjects * (subjects - 1))
+        results['Idiff'] = 100 * (results['Iself'] - results['Iothers'])
+        return results
+
+
+    def _zscore(self, data):
+        """
+        The _zscore method standardizes each sample on its own features, so that the mean of the products of two
+        standardized samples is their Pearson correlation (FOR INTERNAL USE ONLY).
+
+        :param data: it is the 2D (samples*features) data matrix
+
+        :return:     the standardized 2D (samples*features) data matrix
+        """
+        data = data - np.mean(data, axis=1, keepdims=True)
+        std = np.std(data, axis=1, keepdims=True)
+        std[std == 0] = 1
+        return data / std
+
+
+    def identifiability_plot(self, correlation, view=True, save=False, outPath=None, group_name=""):
+        """
+        The identifiability_plot method shows and/or saves the correlation matrix between the samples of the subjects
+        in the two sessions, eventually saving the resulting figure as identifiability.png.
+
+        :param correlation: is the 2D (subjects*subjects) correlation matrix
+        :param view:        has to be True in order to show the resulting plot, False otherwise (True by default)
+        :param save:        has to be True in order to save the resulting figure as identifiability.png, False
+                            othersise (False by default)
+        :param outPath:     is the path (directory) in which the resulting image has to be saved (None by default)
+        :param group_name:  is the name of the analyzed group (the image will be eventually saved as
+                            "nameidentifiability.png" where "name" is the group_name value, "" by default)
+        """
+        plt.imshow(correlation, cmap='jet')
+        plt.colorbar()
+        plt.xlabel('Subjects (second session)')
+        plt.ylabel('Subjects (first session)')
+        plt.title('Identifiability matrix')
+        if save is True:
+            if not (outPath is None):
+                plt.savefig(str(Path(outPath) / (group_name + "identifiability.png")))
+            else:
+                plt.savefig("identifiability.png")
+        if view is True:
+            plt.show()
@@ -7,6 +7,7 @@ from report import *
 from feature_selector import *
 from data_loader import *
 from clustering import *
+from fingerprinting import *
 from permutation_test import *
 from utils import *
 
@@ -17,6 +18,7 @@ class metis_study():
      - Biometric analysis: similarity scores, genuine and impostor scores distributions, FAR, FRR, EER and so on
      - Statistical analysis: ranksum, permutation test and Cohen's d
      - Clustering: K-Means clustering, purity and silhouette
+     - Fingerprinting: identifiability of the subjects between two sessions
 
     Attributes:
         distance:               represents the used distance metric
@@ -31,8 +33,15 @@ class metis_study():
         genuines_and_impostors: computes the genuine and impostor score distributions from the similarity score matrix
         groups_comparison:      computes the biometric analysis on two data matrices, and compares them through some
                                 statistical analysis
+        multiple_groups_comparison: computes the biometric analysis on more data matrices at once, and compares them
+                                through the Kruskal-Wallis and Dunn tests
         data_analysis:          computes the biometric analysis on a data matrix
         clustering_analysis:    computes the clustering analysis and its evaluation
+        reliability_analysis:   computes the test-retest reliability of each feature through the intraclass correlation
+                                coefficients
+        fingerprinting_analysis: computes the identifiability of the subjects between two sessions
+        mantel_test:            computes the Mantel test between the scores obtained from two sets of features of the
+                                same samples
     """
 
 
@@ -56,6 +65,7 @@ class metis_study():
         self._data_loader = data_loader()
         self._clustering = clustering()
         self._perm_test = permutation_test()
+        self._fingerprinting = fingerprinting()
 
 
     def set_data(self, data):
@@ -141,7 +151,11 @@ class metis_study():
                           first_name="first", second_name="second", bins=None, report_name="report.pdf", outPath=None,
                           features_selection_algorithm=None, selected_features=None, biometric_analysis=True,
                           statistical_analysis=True, permutation_test=True, permutation_method='approximate',
-                          permutation_assumption='different', permutation_repetitions=100):
+                          permutation_assumption='different', permutation_repetitions=100,
+                          rates_permutation_test=False, permutation_seed=None, permutation_workers=1,
+                          cross_group_analysis=False, permanova=False, permutation_correction=None, paired=False,
+                          selection_reference='pooled', selection_seed=None, selection_restarts=1,
+                          selection_workers=1, selection_tol=1e-4, selection_max_iter=200):
         """
         The groups_comparison method computes an analysis between two groups, represented as two different 3D
         (subjects*repetitions*features) data matrices or 2D (subjects*features) data matrices (in this case the labels
@@ -173,8 +187,13 @@ class metis_study():
                                             (None by default)
         :param feature_selection_algorithm: it is the feature selection algorithm between 'pca' (for Principal Component
                                             Analysis), 'ica' (for Independent Component Analysis) 'columns' (for
-                                            selecting the features by their indexes) or None for avoiding the feature
-                                            selection step (None by default)
+                                            selecting the features by their indexes), 'fisher' (for selecting the
+                                            features with the highest between-subject to within-subject variance
+                                            ratio), 'forward' or 'backward' (for the greedy searches of the features
+                                            minimizing the Equal Error Rate), 'random_projection' or
+                                            'gaussian_projection' (for projecting the features on a random subspace,
+                                            sparse or gaussian) or None for avoiding the feature selection step (None
+                                            by default)
         :param selected_features:           it is the list of feature indexes if feature_selection_algorithm has value
                                             'columns', or the number of features in other case (even the contribution in
                                             the 'pca' case) or None for avoiding the feature selection step (None by
@@ -186,12 +205,45 @@ class metis_study():
         :param permutation_test:            it has to be True for executing the permutation test, False otherwise
                                             (True by default)
         :param permutation_method:          it is the method applied for executing the permutation test between
-                                            'approximate' and 'exact' ('approximate by default)
+                                            'approximate', 'exact' and 'auto' (exact only if the number of
+                                            combinations is affordable, 'approximate by default)
         :param permutation_assumption:      it is the assumption used in the permutation test, between 'lower' (or
                                             'first_lower'), 'higher' (or 'first_higher') or 'different' ('different' by
                                             default)
         :param permutation_repetitions:     it is the number of permutation test repetitions in the approximate case
                                             (100 by default)
+        :param rates_permutation_test:      it has to be True for executing the permutation test on the differences
+                                            between the EERs and the AUCs of the two groups, False otherwise (False by
+                                            default)
+        :param permutation_seed:            it is the seed used to generate the permutations, in order to obtain
+                                            reproducible results (None by default)
+        :param permutation_workers:         it is the number of processes among which the permutations are distributed
+                                            (1 by default)
+        :param cross_group_analysis:        it has to be True for computing the impostor scores between the subjects of
+                                            the two groups and the performance on the whole population, False otherwise
+                                            (False by default)
+        :param permanova:                   it has to be True for executing the permutational multivariate analysis of
+                                            variance (PERMANOVA) between the two groups, False otherwise (False by
+                                            default)
+        :param permutation_correction:      it is the correction for the multiple comparisons among the features
+                                            applied to the approximate permutation test, between 'max_t' (family-wise)
+                                            and 'fdr' (false discovery rate), None for no correction (None by default)
+        :param paired:                      it has to be True in order to compare the same subjects under two
+                                            conditions, matching them through their labels (Wilcoxon signed-rank test,
+                                            sign-flip permutation test and paired EER and AUC differences), False
+                                            otherwise (False by default)
+        :param selection_reference:         it is the data on which the feature selection model is fitted once, before
+                                            projecting both the groups in the same space, between 'pooled' (the union
+                                            of the two groups), 'first' and 'second' ('pooled' by default)
+        :param selection_seed:              it is the seed of the randomized feature selection algorithms (None by
+                                            default)
+        :param selection_restarts:          it is the number of restarts of the Independent Component Analysis (1 by
+                                            default)
+        :param selection_workers:           it is the number of processes among which the restarts (or the candidates
+                                            of the greedy searches) are distributed (1 by default)
+        :param selection_tol:               it is the tolerance of the Independent Component Analysis (1e-4 by default)
+        :param selection_max_iter:          it is the maximum number of iterations of the Independent Component
+                                            Analysis (200 by default)
         """
         if second_data is None and not (self.data is None):
             second_data = first_data
@@ -212,12 +264,76 @@ class metis_study():
                                                  permutation_test=permutation_test,
                                                  permutation_method=permutation_method,
                                                  permutation_assumption=permutation_assumption,
-                                                 permutation_repetitions=permutation_repetitions)
+                                                 permutation_repetitions=permutation_repetitions,
+                                                 rates_permutation_test=rates_permutation_test,
+                                                 permutation_seed=permutation_seed,
+                                                 permutation_workers=permutation_workers,
+                                                 cross_group_analysis=cross_group_analysis,
+                                                 permanova=permanova,
+                                                 permutation_correction=permutation_correction,
+                                                 paired=paired,
+                                                 selection_reference=selection_reference,
+                                                 selection_seed=selection_seed,
+                                                 selection_restarts=selection_restarts,
+                                                 selection_workers=selection_workers,
+                                                 selection_tol=selection_tol,
+                                                 selection_max_iter=selection_max_iter)
+
+
+    def multiple_groups_comparison(self, groups_data, groups_labels=None, groups_names=None,
+                                   distance=euclidean_distance(), threshold=None, view_analysis=False,
+                                   generate_pdf=False, report_name="report.pdf", outPath=None, workers=1,
+                                   biometric_analysis=True, statistical_analysis=True):
+        """
+        The multiple_groups_comparison method computes an analysis among more groups at once, represented as a list of
+        3D (subjects*repetitions*features) data matrices or 2D (samples*features) data matrices (in this case the
+        labels related to each matrix are also required), computing the scores and the rates of each group only once and
+        comparing all the groups through the Kruskal-Wallis test and the Dunn post-hoc test, eventually reporting it on
+        a single pdf file.
+
+        :param groups_data:          it is the list of 3D (subjects*repetitions*features) or 2D (samples*features) data
+                                     matrices (or of the paths of the files containing them)
+        :param groups_labels:        it is the list of the lists of labels related to each data matrix (required in case
+                                     of 2D matrices, None by default)
+        :param groups_names:         it is the list of names of the groups (None by default, "group1", "group2" and so
+                                     on)
+        :param distance:             it is the function (or one string between 'euclidean', 'manhattan', 'mahalanobis'
+                                     and 'minkowski', representing the homonymous distances) which is used in order to
+                                     evaluate the distance in the genuine and impostor scores computation (optional,
+                                     euclidean distance by default)
+        :param threshold:            it is the step between two consecutive thresholds on which evaluate the FAR and the
+                                     FRR, or None to automatically evaluate the threshold values (None by default)
+        :param view_analysis:        it has to be True in order to print the results of the analysis, False otherwise
+                                     (False by default)
+        :param generate_pdf:         it has to be True in order to create the pdf of the analysis report, False
+                                     otherwise (False by default)
+        :param report_name:          it is the name of the eventually generated pdf ("report.pdf" by default)
+        :param outPath:              it is the directory in which export the report and the related figures (None by
+                                     default)
+        :param workers:              it is the number of processes among which the per-group stages are distributed (1
+                                     by default)
+        :param biometric_analysis:   it has to be True for executing the biometric analysis, False otherwise (True by
+                                     default)
+        :param statistical_analysis: it has to be True for executing the statistical analysis, False otherwise (True by
+                                     default)
+
+        :return:                     the list of dictionaries containing the results of each group, and the dictionary
+                                     containing the results of the statistical analysis
+        """
+        groups_data = [self._data_loader.load_data(data) if isinstance(data, str) else data for data in groups_data]
+        self.set_distance(distance)
+        return self._report_generator.multiple_groups_comparison(self._data_manager, self._statan, self._biom,
+                                                                 groups_data, groups_labels, groups_names,
+                                                                 self.distance, threshold, view_analysis,
+                                                                 generate_pdf, report_name, outPath, workers,
+                                                                 biometric_analysis, statistical_analysis)
 
 
     def data_analysis(self, data, labels=None, distance=euclidean_distance(), threshold=None, view_analysis=False,
                       generate_pdf=False, name="first", bins=None, report_name="report.pdf", outPath=None,
-                      features_selection_algorithm=None, selected_features=None, biometric_analysis=True):
+                      features_selection_algorithm=None, selected_features=None, biometric_analysis=True,
+                      selection_seed=None, selection_restarts=1, selection_workers=1, selection_tol=1e-4,
+                      selection_max_iter=200):
         """
         The groups_comparison method computes an analysis between two groups, represented as two different 3D
         (subjects*repetitions*features) data matrices or 2D (subjects*features) data matrices (in this case the labels
@@ -243,14 +359,28 @@ class metis_study():
                                             (None by default)
         :param feature_selection_algorithm: it is the feature selection algorithm between 'pca' (for Principal Component
                                             Analysis), 'ica' (for Independent Component Analysis) 'columns' (for
-                                            selecting the features by their indexes) or None for avoiding the feature
-                                            selection step (None by default)
+                                            selecting the features by their indexes), 'fisher' (for selecting the
+                                            features with the highest between-subject to within-subject variance
+                                            ratio), 'forward' or 'backward' (for the greedy searches of the features
+                                            minimizing the Equal Error Rate), 'random_projection' or
+                                            'gaussian_projection' (for projecting the features on a random subspace,
+                                            sparse or gaussian) or None for avoiding the feature selection step (None
+                                            by default)
         :param selected_features:           it is the list of feature indexes if feature_selection_algorithm has value
                                             'columns', or the number of features in other case (even the contribution in
                                             the 'pca' case) or None for avoiding the feature selection step (None by
                                             default)
         :param biometric_analysis:          it has to be True for executing the biometric analysis, False otherwise
                                             (True by default)
+        :param selection_seed:              it is the seed of the randomized feature selection algorithms (None by
+                                            default)
+        :param selection_restarts:          it is the number of restarts of the Independent Component Analysis (1 by
+                                            default)
+        :param selection_workers:           it is the number of processes among which the restarts (or the candidates
+                                            of the greedy searches) are distributed (1 by default)
+        :param selection_tol:               it is the tolerance of the Independent Component Analysis (1e-4 by default)
+        :param selection_max_iter:          it is the maximum number of iterations of the Independent Component
+                                            Analysis (200 by default)
         """
         if data is None:
             data = self.data
@@ -261,7 +391,12 @@ class metis_study():
                                                self._perm_test, data, labels, self.distance, threshold,
                                                view_analysis, generate_pdf, name, bins, report_name, outPath,
                                                features_selection_algorithm, selected_features,
-                                               biometric_analysis=biometric_analysis)
+                                               biometric_analysis=biometric_analysis,
+                                               selection_seed=selection_seed,
+                                               selection_restarts=selection_restarts,
+                                               selection_workers=selection_workers,
+                                               selection_tol=selection_tol,
+                                               selection_max_iter=selection_max_iter)
 
     def clustering_analysis(self, data=None, clusters=None, view=True, save=False, outPath=None, group_name=""):
         """
@@ -283,3 +418,125 @@ class metis_study():
             data = self._data_loader.load_data(data)
         [data, labels] = self._data_manager.data_management(data)
         self._clustering.cluster_analysis(data, clusters, view, save, outPath, group_name)
+
+
+    def reliability_analysis(self, data=None, labels=None, confidence_intervals=True, bootstrap_repetitions=1000,
+                             alpha=0.05, seed=None, workers=1, view_analysis=False, generate_pdf=False, name="first",
+                             report_name="report.pdf", outPath=None):
+        """
+        The reliability_analysis method computes the test-retest reliability of each feature through the intraclass
+        correlation coefficients ICC(2,1), ICC(3,1) and ICC(1,k), considering the repetitions as repeated measures of
+        the subjects, eventually reporting the features sorted by reliability on a pdf file.
+
+        :param data:                  it is the 3D (subjects*repetitions*features) data matrix, or the 2D
+                                      (samples*features) data matrix having the same number of samples for each subject
+                                      (None by default, the previously inserted data will be used if None)
+        :param labels:                it is the list of labels related to the data matrix (required in case of 2D
+                                      matrix)
+        :param confidence_intervals:  it has to be True in order to compute the bootstrap confidence intervals, False
+                                      otherwise (True by default)
+        :param bootstrap_repetitions: it is the number of bootstrap resamplings of the subjects (1000 by default)
+        :param alpha:                 it is the significance level of the confidence intervals (0.05 by default)
+        :param seed:                  it is the seed used in the bootstrap resamplings, in order to obtain reproducible
+                                      results (None by default)
+        :param workers:               it is the number of processes among which the resamplings are distributed (1 by
+                                      default)
+        :param view_analysis:         it has to be True in order to print the results of the analysis, False otherwise
+                                      (False by default)
+        :param generate_pdf:          it has to be True in order to create the pdf of the analysis report, False
+                                      otherwise (False by default)
+        :param name:                  it is the name of the analyzed group ("first" by default)
+        :param report_name:           it is the name of the eventually generated pdf ("report.pdf" by default)
+        :param outPath:               it is the directory in which export the report (None by default)
+
+        :return:                      the dictionary of the intraclass correlation coefficients and the dictionary of
+                                      the related confidence intervals (None if they are not computed)
+        """
+        if data is None:
+            data = self.data
+            labels = self.first_labels
+        if isinstance(data, str):
+            data = self._data_loader.load_data(data)
+        return self._report_generator.reliability_analysis(self._statan, data, labels, confidence_intervals,
+                                                           bootstrap_repetitions, alpha, seed, workers, view_analysis,
+                                                           generate_pdf, name, report_name, outPath)
+
+
+    def fingerprinting_analysis(self, data=None, labels=None, sessions=(0, 1), view_analysis=True, save=False,
+                                outPath=None, group_name=""):
+        """
+        The fingerprinting_analysis method computes the identifiability of the subjects between two sessions (two
+        repetitions of each subject), through the correlation matrix between the samples of the two sessions, the
+        identification success rate and the differential identifiability (Idiff).
+
+        :param data:          it is the 3D (subjects*repetitions*features) data matrix, or the 2D (samples*features)
+                              data matrix having the same number of samples for each subject (None by default, the
+                              previously inserted data will be used if None)
+        :param labels:        it is the list of labels related to the data matrix (required in case of 2D matrix)
+        :param sessions:      it is the pair of repetitions which are considered as the two sessions ((0, 1) by
+                              default)
+        :param view_analysis: it has to be True in order to print the results and show the identifiability matrix,
+                              False otherwise (True by default)
+        :param save:          it has to be True in order to save the identifiability matrix as identifiability.png,
+                              False otherwise (False by default)
+        :param outPath:       it is the directory in which eventually store the resulting figure (None by default)
+        :param group_name:    it is the name of the group related to the data matrix (optional)
+
+        :return:              the dictionary containing the results of the analysis
+        """
+        if data is None:
+            data = self.data
+            labels = self.first_labels
+        if isinstance(data, str):
+            data = self._data_loader.load_data(data)
+        results = self._fingerprinting.compute_identifiability(data, labels, sessions)
+        if view_analysis is True:
+            print("\nIdentification success rate: %.5f" % results['success_rate'])
+            print("Iself:   %.5f" % results['Iself'])
+            print("Iothers: %.5f" % results['Iothers'])
+            print("Idiff:   %.5f" % results['Idiff'])
+            print("Most identifying features: ", end="")
+            print(np.argsort(-results['edges_contribution'])[:10] + 1)
+        if view_analysis is True or save is True:
+            self._fingerprinting.identifiability_plot(results['correlation'], view_analysis, save, outPath,
+                                                      group_name)
+        return results
+
+
+    def mantel_test(self, first_data, second_data, distance=None, method='pearson', repetitions=999, seed=None,
+                    workers=1, view_analysis=True):
+        """
+        The mantel_test method computes the similarity scores on two data matrices representing two different sets of
+        features (for example, two frequency bands) of the same samples, in the same order, and evaluates the agreement
+        of their similarity structures through the Mantel test.
+
+        :param first_data:    it is the first 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param second_data:   it is the second 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param distance:      it is the function (or one string between 'euclidean', 'manhattan', 'mahalanobis' and
+                              'minkowski', representing the homonymous distances) which is used in order to evaluate the
+                              distance in the scores computation (None by default, the previously inserted distance if
+                              None)
+        :param method:        it is the correlation coefficient, between 'pearson' and 'spearman' ('pearson' by
+                              default)
+        :param repetitions:   it is the number of permutations (999 by default)
+        :param seed:          it is the seed used to generate the permutations, in order to obtain reproducible results
+                              (None by default)
+        :param workers:       it is the number of processes among which the permutations are distributed (1 by default)
+        :param view_analysis: it has to be True in order to print the results of the test, False otherwise (True by
+                              default)
+
+        :return:              the correlation coefficient and the related p-value
+        """
+        if isinstance(first_data, str):
+            first_data = self._data_loader.load_data(first_data)
+        if isinstance(second_data, str):
+            second_data = self._data_loader.load_data(second_data)
+        self._set_parameters(distance=distance)
+        first_scores = self._biom.compute_scores(first_data, self.distance)
+        second_scores = self._biom.compute_scores(second_data, self.distance)
+        correlation, pvalue = self._statan.compute_mantel_test(first_scores, second_scores, method, repetitions, seed,
+                                                               workers)
+        if view_analysis is True:
+            print("\nMantel test (" + method + "):\n  - Correlation: %.5f\n  - P-value:     %.5f" % (correlation,
+                                                                                                     pvalue))
+        return correlation, pvalue
\ No newline at end of file
@@ -1,8 +1,7 @@
 import numpy as np
-from itertools import combinations
-from math import factorial
+from math import comb
+from scipy.stats import beta
 from utils import *
-import copy
 
 
 class permutation_test():
@@ -10,14 +9,25 @@ class permutation_test():
     The permutation_test class allows to compute the permutation test under different settings.
 
     Attributes:
-        methods:                  is a dictionary which links the methods (approximated and exact) to the related
-                                  permutation test method
+        methods:                  is a dictionary which links the exact method to the related permutation test method
+                                  on the mean (the approximate test being computed on blocks of permutations at once)
         assumptions:              is a dictionary which links the assumptions (the first data value are higher, lower or
                                   just different than/from the second data) to the permutation test conditions
+        enumeration_budget:       is the maximum number of combinations for which the 'auto' method executes the exact
+                                  test on the 'median' and 'trimmed_mean' statistics (10**8: up to 28 samples split
+                                  in two groups of 14, since comb(30, 15) is about 1.55*10**8), and the maximum number
+                                  of sign flips times the number of features of the exact paired test
 
     Methods:
-        compute_permutation_test: computes the exact or the approximate permutation test on two different dataset,
-                                  by considering different assumptions
+        compute_permutation_test:       computes the exact or the approximate permutation test on two different
+                                        dataset, by considering different assumptions
+        compute_rates_permutation_test: computes the approximate permutation test on the differences between the Equal
+                                        Error Rates and the Areas Under the Curve of two groups
+        compute_paired_permutation_test: computes the exact or the approximate sign-flip permutation test between the
+                                        same subjects under two conditions
+        compute_paired_rates_permutation_test: computes the approximate permutation test on the paired differences
+                                        between the Equal Error Rates and the Areas Under the Curve of the same
+                                        subjects under two conditions
     """
 
 
@@ -26,10 +36,18 @@ class permutation_test():
         The __init__ method is the initializer, which sets the value for the attibutes.
         """
         self._utils = utils()
-        self.methods = {'approximate': self._approximate, 'exact': self._exact}
+        self.methods = {'exact': self._exact}
         self.assumptions = {'different': self._different, 'lower': self._lower,
                             'higher': self._higher, 'first_lower': self._lower,
                             'first_higher': self._higher}
+        self._block_size = 50
+        self._memory_budget = 2**27
+        self._quantization_levels = 1000
+        self._exact_budget = 10**12
+        self.enumeration_budget = 10**8
+        self._sequential_block = 100
+        self._batched_assumptions = {'different': np.abs, 'lower': np.negative, 'higher': np.positive,
+                                     'first_lower': np.negative, 'first_higher': np.positive}
 
 
     def _different(self, first, second):
@@ -74,14 +92,18 @@ class permutation_test():
     def _exact(self, first, second, assumption, combined, reference, first_samples, second_samples, tot_samples,
                _repetitions):
         """
-        The _exact method executes the permutation test by considering all the samples (FOR INTERNAL USE ONLY).
+        The _exact method executes the permutation test by considering all the samples (FOR INTERNAL USE ONLY). The
+        differences between means only depend on the sum of the samples assigned to the first group, so the null
+        distribution is derived from the number of subsets having each possible sum, computed through dynamic
+        programming on the data quantized to integer values (the result is exact when the data already are integers
+        spanning at most the considered number of quantization levels).
 
         :param first:          it is the first 2D (samples*features) data matrix
         :param second:         it is the second 2D (samples*features) data matrix
         :param assumption:     it is the considered assumption ("the means are different", "the first mean is higher
                                than the second one", or "the first mean is lower than the second one")
         :param combined:       it is the data matrix resulting by the joining between the two data matrices
-        :param reference:      it is the reference value resulting from the assumption applied on the combined matrix
+        :param reference:      NOT USED (the reference is computed on the quantized data)
         :param first_samples:  it is the number of samples related to the first data matrix
         :param second_samples: it is the number of samples related to the second data matrix
         :param tot_samples:    it is the total number of samples (first_samples + second_samples)
@@ -89,48 +111,57 @@ class permutation_test():
 
         :return:               the p-value resulting from the permutation test
         """
-        pvalue = 0.
-        for first_idx in combinations(range(tot_samples), first_samples):
-            second_idx = [idx for idx in range(tot_samples) if idx not in first_idx]
-            diff = self.assumptions[assumption](combined[list(first_idx)], combined[second_idx])
-            if diff > reference or np.isclose(diff, reference):
-                pvalue += 1
-        pvalue *= (factorial(first_samples) * factorial(second_samples))
-        return pvalue / factorial(tot_samples)
+        quantized = self._quantize(combined)
+        total = np.sum(quantized)
+        counts = self._sums_distribution(quantized, min(first_samples, second_samples))
+        sums = np.arange(len(counts))
+        if first_samples > second_samples:
+            sums = total - sums
+        transform = self._batched_assumptions[assumption]
+        diff = transform(sums * tot_samples - total * first_samples)
+        reference = transform(np.sum(quantized[:first_samples]) * tot_samples - total * first_samples)
+        return np.sum(counts[diff >= reference]) / comb(tot_samples, first_samples)
+
+
+    def _quantize(self, values):
+        """
+        The _quantize method maps the values to non-negative integers, by keeping them as they are if they already are
+        integers spanning at most the number of quantization levels, or by rescaling them to that number of levels
+        otherwise (FOR INTERNAL USE ONLY).
 
+        :param values: it is the array of values
 
-    def _approximate(self, first, second, assumption, combined, reference, first_samples, second_samples, tot_samples,
-                     repetitions):
+        :return:       the array of non-negative integers
         """
-        The _approximate method executes the permutation test by repeating more times the test on random subsets of
-        data (FOR INTERNAL USE ONLY).
+        shifted = np.asarray(values, dtype=float) - np.min(values)
+        span = np.max(shifted)
+        if span > self._quantization_levels or not np.all(shifted == np.round(shifted)):
+            shifted = shifted * (self._quantization_levels / span)
+        return np.round(shifted).astype(np.int64)
 
-        :param first:          it is the first 2D (samples*features) data matrix
-        :param second:         it is the second 2D (samples*features) data matrix
-        :param assumption:     it is the considered assumption ("the means are different", "the first mean is higher
-                               than the second one", or "the first mean is lower than the second one")
-        :param combined:       it is the data matrix resulting by the joining between the two data matrices
-        :param reference:      it is the reference value resulting from the assumption applied on the combined matrix
-        :param first_samples:  it is the number of samples related to the first data matrix
-        :param second_samples: it is the number of samples related to the second data matrix
-        :param tot_samples:    it is the total number of samples (first_samples + second_samples)
-        :param repetitions:    the number of repetitions of the test on the random subset
 
-        :return:               the p-value resulting from the permutation test
+    def _sums_distribution(self, values, subset):
+        """
+        The _sums_distribution method computes, through dynamic programming, how many subsets of a given size have
+        each possible sum (FOR INTERNAL USE ONLY).
+
+        :param values: it is the array of non-negative integer values
+        :param subset: it is the size of the subsets
+
+        :return:       the array containing, for each sum, the number of subsets having that sum
         """
-        pvalue = 1.
-        rng = np.random.RandomState(None)
-        for i in range(repetitions):
-            rng.shuffle(combined)
-            diff = self.assumptions[assumption](combined[:first_samples],
-                                                combined[first_samples:])
-            if diff > reference or np.isclose(diff, reference):
-                pvalue += 1
-        return pvalue / (repetitions + 1)
+        size = np.sum(np.sort(values)[::-1][:subset]) + 1
+        counts = np.zeros(shape=(subset + 1, size))
+        counts[0, 0] = 1.
+        for value in values:
+            counts[1:, value:] = counts[1:, value:] + counts[:-1, :size - value]
+        return counts[subset]
 
 
     def compute_permutation_test(self, first, second, method='approximate', assumption='different', repetitions=100,
-                                 first_labels=None, second_labels=None):
+                                 first_labels=None, second_labels=None, statistic='mean', trim=0.1, seed=None,
+                                 workers=1, sequential=False, exceedances=10, alpha=0.05, error=0.001,
+                                 correction=None):
         """
         The _exact method executes the permutation test by considering all the samples (FOR INTERNAL USE ONLY).
 
@@ -138,7 +169,9 @@ class permutation_test():
         :param second:         it is the second 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
         :param method:         it is the permutation test method, between 'approximate' and 'exact', to execute the
                                test more times on subsets of the whole dataset or once on the whole dataset,
-                               respectively ('approximate' by default)
+                               respectively, or 'auto', to execute the exact test only if the number of combinations
+                               does not exceed a budget (10**12 for the 'mean', the enumeration_budget attribute
+                               otherwise) and the approximate one otherwise ('approximate' by default)
         :param assumption:     it is the considered assumption, between 'different', 'higher' (or equivalently
                                'first_higher') and 'lower' (or equivalently 'first_lower'), representing that the
                                mean of the first dataset is different from, higher than or lower than the mean of the
@@ -149,33 +182,789 @@ class permutation_test():
                                2D format, None by default)
         :param second_labels:  it is the list of labels identifying each sample (to be used if the second data matrix
                                has 2D format, None by default)
-
-        :return:               the p-value resulting from the permutation test
+        :param statistic:      it is the statistic compared between the two groups, between 'mean', 'median' and
+                               'trimmed_mean' ('mean' by default)
+        :param trim:           it is the proportion of samples cut from each end of the groups when the statistic is
+                               'trimmed_mean' (0.1 by default)
+        :param seed:           it is the seed used to generate the permutations of the approximate test, in order to
+                               obtain reproducible results (None by default, unpredictable permutations)
+        :param workers:        it is the number of processes among which the permutations (or the combinations of the
+                               exact test on the 'median' and 'trimmed_mean' statistics) are distributed, the results
+                               not depending on it (1 by default)
+        :param sequential:     it has to be True in order to stop the approximate test on a feature (and repetition) as
+                               soon as the p-value is clear (Besag-Clifford sequential test), False otherwise (False by
+                               default)
+        :param exceedances:    it is the number of differences at least as extreme as the reference one after which the
+                               sequential test stops, the p-value being the ratio between it and the number of
+                               executed permutations (10 by default)
+        :param alpha:          it is the significance level against which the sequential test decides whether to stop
+                               (0.05 by default)
+        :param error:          it is the probability of taking the wrong decision against the significance level
+                               when stopping the sequential test (0.001 by default)
+        :param correction:     it is the correction for the multiple comparisons among the features of each
+                               repetition, computed from the same permutations of the (not sequential) approximate test,
+                               between 'max_t' (step-down max-T family-wise adjusted p-values) and 'fdr' (permutation
+                               based false discovery rate), or None for no correction (None by default)
+
+        :return:               the p-value resulting from the permutation test, and the adjusted p-value if a correction
+                               is required
         """
-        aux_first = copy.deepcopy(np.array(first))
-        aux_second = copy.deepcopy(np.array(second))
-        first_L, first_subjects, first_repetitions, first_features = self._utils._dimensions(aux_first, first_labels)
-        second_L, second_subjects, second_repetitions, second_features = self._utils._dimensions(aux_second,
+        if not (correction is None) and (method != 'approximate' or sequential is True):
+            raise ValueError("The correction requires the approximate (not sequential) permutation test")
+        first_L, first_subjects, first_repetitions, first_features = self._utils._dimensions(np.asarray(first),
+                                                                                             first_labels)
+        second_L, second_subjects, second_repetitions, second_features = self._utils._dimensions(np.asarray(second),
                                                                                                  second_labels)
         first, second = self._utils._same_format_3D(first, second, first_labels, second_labels)
-        repetitions = np.min([first_repetitions, second_repetitions])
+        data_repetitions = np.min([first_repetitions, second_repetitions])
         features = np.min([first_features, second_features])
-        print('Computing ' + method + ' permutation test on ' + str(features) + ' features and ' + str(repetitions) +
-              ' repetitions')
-        pvalue = np.zeros(shape=(repetitions, features))
+        first = np.asarray(first, dtype=float)[:, :data_repetitions, :features]
+        second = np.asarray(second, dtype=float)[:, :data_repetitions, :features]
+        if method == 'auto':
+            method = 'exact'
+            budget = self._exact_budget if statistic == 'mean' else self.enumeration_budget
+            if comb(np.shape(first)[0] + np.shape(second)[0], np.shape(first)[0]) > budget:
+                print('The number of combinations exceeds the budget of the exact test (' + str(budget) + ')')
+                method = 'approximate'
+        print('Computing ' + method + ' permutation test on ' + str(features) + ' features and ' +
+              str(data_repetitions) + ' repetitions')
         first_samples = np.shape(first)[0]
         second_samples = np.shape(second)[0]
         tot_samples = first_samples + second_samples
-        for r in range(repetitions):
-            print(' Repetition ' + str(r + 1))
-            for f in range(features):
-                aux_first = np.squeeze(first[0:, r, f])
-                aux_second = np.squeeze(second[0:, r, f])
-                combined = np.hstack((aux_first, aux_second))
-                reference = self.assumptions[assumption](aux_first, aux_second)
-                pvalue[r, f] = self.methods[method](aux_first, aux_second, assumption, combined, reference,
-                                                    first_samples, second_samples, tot_samples, repetitions)
-        return pvalue
+        if statistic == 'mean' and method == 'exact':
+            pvalue = np.zeros(shape=(data_repetitions, features))
+            for r in range(data_repetitions):
+                print(' Repetition ' + str(r + 1))
+                for f in range(features):
+                    aux_first = np.squeeze(first[0:, r, f])
+                    aux_second = np.squeeze(second[0:, r, f])
+                    combined = np.hstack((aux_first, aux_second))
+                    reference = self.assumptions[assumption](aux_first, aux_second)
+                    pvalue[r, f] = self.methods[method](aux_first, aux_second, assumption, combined, reference,
+                                                        first_samples, second_samples, tot_samples, repetitions)
+            return pvalue
+        arrays, cuts = self._statistic_arrays(first, second, statistic, trim)
+        transform = self._batched_assumptions[assumption]
+        membership = np.arange(tot_samples) < first_samples
+        reference = transform(self._differences(membership[np.newaxis, :], arrays, first_samples, second_samples,
+                                                cuts))[0]
+        if cuts is None:
+            block = int(max(1, self._memory_budget // (8 * (tot_samples + np.shape(arrays[0])[1]))))
+        else:
+            block = int(max(1, self._memory_budget // (16 * tot_samples * np.shape(arrays[0])[1])))
+        memories, references = self._utils._share_arrays(arrays, workers)
+        try:
+            if method == 'approximate' and sequential is True:
+                pvalue = self._sequential_test(references, first_samples, second_samples, cuts, transform, reference,
+                                               repetitions, block, seed, workers, exceedances, alpha, error)
+            elif method == 'approximate' and not (correction is None):
+                scale = np.std(np.concatenate((np.reshape(first, (first_samples, -1)),
+                                               np.reshape(second, (second_samples, -1))), axis=0), axis=0)
+                scale[scale == 0] = 1.
+                sizes = self._utils._blocks_sizes(repetitions, block)
+                seeds = self._utils._spawn_seeds(seed, len(sizes))
+                blocks = [(references, first_samples, second_samples, cuts, transform, reference, scale,
+                           (data_repetitions, features), correction, seeds[i], sizes[i]) for i in range(len(sizes))]
+                results = self._utils._run_blocks(self._family_permutations, blocks, workers)
+                pvalue = (np.sum([result[0] for result in results], axis=0) + 1) / (repetitions + 1)
+                family = np.reshape(np.sum([result[1] for result in results], axis=0), (data_repetitions, features))
+                adjusted = self._adjusted_pvalues(family, np.reshape(reference / scale, (data_repetitions, features)),
+                                                  repetitions, correction)
+                return np.reshape(pvalue, (data_repetitions, features)), adjusted
+            elif method == 'approximate':
+                sizes = self._utils._blocks_sizes(repetitions, block)
+                seeds = self._utils._spawn_seeds(seed, len(sizes))
+                blocks = [(references, first_samples, second_samples, cuts, transform, reference, seeds[i], sizes[i])
+                          for i in range(len(sizes))]
+                exceeding = np.sum(self._utils._run_blocks(self._random_permutations, blocks, workers), axis=0)
+                pvalue = (exceeding + 1) / (repetitions + 1)
+            else:
+                combinations = comb(tot_samples, first_samples)
+                ranges = max(1, min(workers, combinations))
+                ranks = [combinations * i // ranges for i in range(ranges + 1)]
+                blocks = [(references, first_samples, second_samples, cuts, transform, reference, ranks[i],
+                           ranks[i + 1], block) for i in range(ranges)]
+                exceeding = np.sum(self._utils._run_blocks(self._revolving_door_range, blocks, workers), axis=0)
+                pvalue = exceeding / combinations
+        finally:
+            self._utils._release_arrays(memories)
+        return np.reshape(pvalue, (data_repetitions, features))
+
+
+    def _statistic_arrays(self, first, second, statistic, trim):
+        """
+        The _statistic_arrays method prepares the arrays needed to compute the differences between the statistics of
+        the two groups on all the features and all the repetitions at once (FOR INTERNAL USE ONLY).
+
+        :param first:     it is the first 3D (subjects*repetitions*features) data matrix
+        :param second:    it is the second 3D (subjects*repetitions*features) data matrix
+        :param statistic: it is the statistic, between 'mean', 'median' and 'trimmed_mean'
+        :param trim:      it is the proportion of samples cut from each end of the groups for the trimmed mean
+
+        :return:          the list of arrays (the combined 2D (samples*cells) data matrix for the mean, the values
+                          sorted along each column and the sorting indices otherwise), and the tuple containing the
+                          number of samples cut from each end of the two groups (None for the mean)
+        """
+        combined = np.reshape(np.concatenate((first, second), axis=0), (np.shape(first)[0] + np.shape(second)[0], -1))
+        if statistic == 'mean':
+            return [combined], None
+        order = np.argsort(combined, axis=0, kind='stable')
+        cuts = (self._cut(statistic, np.shape(first)[0], trim), self._cut(statistic, np.shape(second)[0], trim))
+        return [np.take_along_axis(combined, order, axis=0), order], cuts
+
+
+    def _differences(self, membership, arrays, first_samples, second_samples, cuts):
+        """
+        The _differences method computes the differences between the statistics of the two groups for several
+        assignments of the samples at once: the differences between means are obtained as the product between the
+        matrix of signed group weights (1/n for the samples assigned to the first group, -1/n for the ones assigned to
+        the second group) and the combined data matrix (FOR INTERNAL USE ONLY).
+
+        :param membership:     it is the 2D (assignments*samples) boolean matrix, True for the samples of the first group
+        :param arrays:         it is the list of arrays provided by the _statistic_arrays method
+        :param first_samples:  it is the number of samples of the first group
+        :param second_samples: it is the number of samples of the second group
+        :param cuts:           it is the tuple containing the number of samples cut from each end of the two groups
+                               (None for the mean)
+
+        :return:               the 2D (assignments*cells) matrix of differences
+        """
+        if cuts is None:
+            return np.dot(np.where(membership, 1. / first_samples, -1. / second_samples), arrays[0])
+        return self._order_differences(membership, arrays[0], arrays[1], first_samples, second_samples, cuts)
 
 
+    def _random_permutations(self, references, first_samples, second_samples, cuts, transform, reference, seed,
+                             permutations):
+        """
+        The _random_permutations method executes a block of random permutations of the samples between the two groups
+        (FOR INTERNAL USE ONLY).
+
+        :param references:     it is the list of arrays (or of references to the shared memory containing them)
+                               provided by the _statistic_arrays method
+        :param first_samples:  it is the number of samples of the first group
+        :param second_samples: it is the number of samples of the second group
+        :param cuts:           it is the tuple containing the number of samples cut from each end of the two groups
+                               (None for the mean)
+        :param transform:      it is the function applying the assumption to the differences
+        :param reference:      it is the array of reference values for each cell
+        :param seed:           it is the seed of the block
+        :param permutations:   it is the number of permutations of the block
+
+        :return:               the array containing, for each cell, the number of differences at least as extreme as
+                               the reference one
+        """
+        return np.sum(self._exceedances(references, first_samples, second_samples, cuts, transform, reference, seed,
+                                        permutations), axis=0)
+
+
+    def _exceedances(self, references, first_samples, second_samples, cuts, transform, reference, seed, permutations,
+                     cells=None):
+        """
+        The _exceedances method executes a block of random permutations of the samples between the two groups, on all
+        the cells or on a subset of them (FOR INTERNAL USE ONLY). The permutations only depend on the seed and on their
+        number, so that they are the same whatever the considered cells.
+
+        :param references:     it is the list of arrays (or of references to the shared memory containing them)
+                               provided by the _statistic_arrays method
+        :param first_samples:  it is the number of samples of the first group
+        :param second_samples: it is the number of samples of the second group
+        :param cuts:           it is the tuple containing the number of samples cut from each end of the two groups
+                               (None for the mean)
+        :param transform:      it is the function applying the assumption to the differences
+        :param reference:      it is the array of reference values for each considered cell
+        :param seed:           it is the seed of the block
+        :param permutations:   it is the number of permutations of the block
+        :param cells:          it is the array of indices of the considered cells (None by default, all the cells)
+
+        :return:               the 2D (permutations*cells) boolean matrix, True where the difference is at least as
+                               extreme as the reference one
+        """
+        arrays, memories = self._utils._attach_arrays(references)
+        if cells is not None:
+            arrays = [array[:, cells] for array in arrays]
+        rng = np.random.default_rng(seed)
+        membership = np.argsort(rng.random((permutations, first_samples + second_samples)), axis=1) < first_samples
+        diff = transform(self._differences(membership, arrays, first_samples, second_samples, cuts))
+        del arrays
+        self._utils._detach_arrays(memories)
+        return (diff > reference) | np.isclose(diff, reference)
+
+
+    def _sequential_test(self, references, first_samples, second_samples, cuts, transform, reference, permutations,
+                         block, seed, workers, exceedances, alpha, error):
+        """
+        The _sequential_test method executes the Besag-Clifford sequential approximate permutation test: each cell
+        stops as soon as it reaches the given number of exceedances, or as soon as the binomial (Clopper-Pearson) bounds
+        of its p-value decide it against the significance level, so that the permutations are concentrated on the
+        borderline cells. The blocks are evaluated in rounds of one block per process, on the cells active at the
+        beginning of the round, but the stopping rule is applied block by block, so that the p-values do not depend on
+        the number of processes (FOR INTERNAL USE ONLY).
+
+        :param references:     it is the list of arrays (or of references to the shared memory containing them)
+                               provided by the _statistic_arrays method
+        :param first_samples:  it is the number of samples of the first group
+        :param second_samples: it is the number of samples of the second group
+        :param cuts:           it is the tuple containing the number of samples cut from each end of the two groups
+                               (None for the mean)
+        :param transform:      it is the function applying the assumption to the differences
+        :param reference:      it is the array of reference values for each cell
+        :param permutations:   it is the maximum number of permutations
+        :param block:          it is the maximum number of permutations of each block
+        :param seed:           it is the initial seed
+        :param workers:        it is the number of processes
+        :param exceedances:    it is the number of exceedances after which a cell stops
+        :param alpha:          it is the significance level
+        :param error:          it is the probability of a wrong decision against the significance level
+
+        :return:               the array of p-values of each cell
+        """
+        sizes = self._utils._blocks_sizes(permutations, min(block, self._sequential_block))
+        seeds = self._utils._spawn_seeds(seed, len(sizes))
+        exceeding = np.zeros(shape=np.shape(reference))
+        executed = np.zeros(shape=np.shape(reference))
+        stopped = np.zeros(shape=np.shape(reference), dtype=bool)
+        active = np.ones(shape=np.shape(reference), dtype=bool)
+        rounds = max(1, workers or 1)
+        for start in range(0, len(sizes), rounds):
+            cells = np.flatnonzero(active)
+            blocks = [(references, first_samples, second_samples, cuts, transform, reference[cells], seeds[i],
+                       sizes[i], cells) for i in range(start, min(start + rounds, len(sizes)))]
+            for exceed in self._utils._run_blocks(self._exceedances, blocks, workers):
+                still = active[cells]
+                idx = cells[still]
+                cumulative = exceeding[idx] + np.cumsum(exceed[:, still], axis=0)
+                reached = cumulative[-1] >= exceedances
+                executed[idx] += np.where(reached, np.argmax(cumulative >= exceedances, axis=0) + 1, len(exceed))
+                exceeding[idx] = np.minimum(cumulative[-1], exceedances)
+                stopped[idx] = reached
+                active[idx] = ~(reached | self._decided(exceeding[idx], executed[idx], alpha, error))
+            if not np.any(active):
+                break
+        print(' Executed ' + str(int(np.sum(executed))) + ' permutations out of ' +
+              str(permutations * len(reference)))
+        return np.where(stopped, exceedances / np.maximum(executed, 1), (exceeding + 1) / (executed + 1))
+
+
+    def _decided(self, exceeding, executed, alpha, error):
+        """
+        The _decided method checks whether the p-values are below or above the significance level with the given
+        probability of error, through the Clopper-Pearson bounds of the proportion of exceedances (FOR INTERNAL USE
+        ONLY).
+
+        :param exceeding: it is the array of exceedances of each cell
+        :param executed:  it is the array of executed permutations of each cell
+        :param alpha:     it is the significance level
+        :param error:     it is the probability of a wrong decision
+
+        :return:          the boolean array, True for the decided cells
+        """
+        upper = np.where(exceeding < executed, beta.ppf(1 - error, exceeding + 1, np.maximum(executed - exceeding, 1)),
+                         1.)
+        lower = np.where(exceeding > 0, beta.ppf(error, np.maximum(exceeding, 1), executed - exceeding + 1), 0.)
+        return (upper < alpha) | (lower > alpha)
+
+
+    def _family_permutations(self, references, first_samples, second_samples, cuts, transform, reference, scale,
+                             shape, correction, seed, permutations):
+        """
+        The _family_permutations method executes a block of random permutations of the samples between the two groups,
+        counting both the exceedances of each cell and the ones needed by the multiple comparisons correction among the
+        features of each repetition, computed on the differences standardized by the standard deviation of the combined
+        samples, which does not depend on the permutation (FOR INTERNAL USE ONLY).
+
+        :param references:     it is the list of arrays (or of references to the shared memory containing them)
+                               provided by the _statistic_arrays method
+        :param first_samples:  it is the number of samples of the first group
+        :param second_samples: it is the number of samples of the second group
+        :param cuts:           it is the tuple containing the number of samples cut from each end of the two groups
+                               (None for the mean)
+        :param transform:      it is the function applying the assumption to the differences
+        :param reference:      it is the array of reference values for each cell
+        :param scale:          it is the array of standard deviations of the combined samples of each cell
+        :param shape:          it is the tuple containing the number of repetitions and the number of features
+        :param correction:     it is the correction, between 'max_t' and 'fdr'
+        :param seed:           it is the seed of the block
+        :param permutations:   it is the number of permutations of the block
+
+        :return:               the array containing, for each cell, the number of differences at least as extreme as
+                               the reference one, and the array containing, for each cell, the number of successive
+                               maxima ('max_t') or of standardized differences of any feature of the same repetition
+                               ('fdr') at least as extreme as the standardized reference one
+        """
+        arrays, memories = self._utils._attach_arrays(references)
+        rng = np.random.default_rng(seed)
+        membership = np.argsort(rng.random((permutations, first_samples + second_samples)), axis=1) < first_samples
+        diff = transform(self._differences(membership, arrays, first_samples, second_samples, cuts))
+        del arrays
+        self._utils._detach_arrays(memories)
+        exceeding = np.sum((diff > reference) | np.isclose(diff, reference), axis=0)
+        statistics = np.reshape(diff / scale, (permutations,) + shape)
+        observed = np.reshape(reference / scale, shape)
+        threshold = observed - (1e-8 + 1e-5 * np.abs(observed))
+        if correction == 'max_t':
+            order = np.argsort(observed, axis=1)
+            successive = np.maximum.accumulate(np.take_along_axis(statistics, order[np.newaxis], axis=2), axis=2)
+            family = np.zeros(shape=shape)
+            np.put_along_axis(family, order, np.sum(successive >= np.take_along_axis(threshold, order, axis=1), axis=0),
+                              axis=1)
+        else:
+            pooled = np.sort(np.reshape(np.swapaxes(statistics, 0, 1), (shape[0], -1)), axis=1)
+            family = np.array([np.shape(pooled)[1] - np.searchsorted(pooled[r], threshold[r], side='left')
+                               for r in range(shape[0])])
+        return exceeding, np.ravel(family)
+
+
+    def _adjusted_pvalues(self, family, observed, permutations, correction):
+        """
+        The _adjusted_pvalues method computes the p-values adjusted for the multiple comparisons among the features of
+        each repetition: the step-down max-T (Westfall-Young) family-wise adjusted p-values, or the permutation-based
+        false discovery rate q-values (FOR INTERNAL USE ONLY).
 
+        :param family:       it is the 2D (repetitions*features) matrix of the counts provided by the
+                             _family_permutations method
+        :param observed:     it is the 2D (repetitions*features) matrix of standardized reference differences
+        :param permutations: it is the number of permutations
+        :param correction:   it is the correction, between 'max_t' and 'fdr'
+
+        :return:             the 2D (repetitions*features) matrix of adjusted p-values
+        """
+        order = np.argsort(observed, axis=1)
+        if correction == 'max_t':
+            adjusted = (np.take_along_axis(family, order, axis=1) + 1) / (permutations + 1)
+            adjusted = np.maximum.accumulate(adjusted[:, ::-1], axis=1)[:, ::-1]
+        else:
+            sorted_observed = np.take_along_axis(observed, order, axis=1)
+            threshold = sorted_observed - (1e-8 + 1e-5 * np.abs(sorted_observed))
+            discoveries = np.array([np.shape(observed)[1] - np.searchsorted(sorted_observed[r], threshold[r],
+                                                                            side='left')
+                                    for r in range(np.shape(observed)[0])])
+            adjusted = np.minimum(1., np.take_along_axis(family, order, axis=1) / permutations / discoveries)
+            adjusted = np.minimum.accumulate(adjusted, axis=1)
+        result = np.zeros(shape=np.shape(observed))
+        np.put_along_axis(result, order, adjusted, axis=1)
+        return result
+
+
+    def _cut(self, statistic, samples, trim):
+        """
+        The _cut method returns the number of samples cut from each end of a group in order to compute the statistic
+        (FOR INTERNAL USE ONLY).
+
+        :param statistic: it is the statistic, between 'median' and 'trimmed_mean'
+        :param samples:   it is the number of samples of the group
+        :param trim:      it is the proportion of samples cut from each end for the trimmed mean
+
+        :return:          the number of samples cut from each end
+        """
+        if statistic == 'median':
+            return (samples - 1) // 2
+        return int(trim * samples)
+
+
+    def _order_differences(self, membership, sorted_values, order, first_samples, second_samples, cuts):
+        """
+        The _order_differences method computes the differences between the trimmed means (the median being the mean of
+        the central samples) of the two groups for several assignments of the samples at once (FOR INTERNAL USE ONLY).
+
+        :param membership:     it is the 2D (assignments*samples) boolean matrix, True for the samples of the first group
+        :param sorted_values:  it is the 2D (samples*cells) matrix of the values sorted along each column
+        :param order:          it is the 2D (samples*cells) matrix of the indices sorting each column
+        :param first_samples:  it is the number of samples of the first group
+        :param second_samples: it is the number of samples of the second group
+        :param cuts:           it is the tuple containing the number of samples cut from each end of the two groups
+
+        :return:               the 2D (assignments*cells) matrix of differences
+        """
+        member = membership[:, order]
+        difference = 0.
+        for group, samples, cut, sign in [(member, first_samples, cuts[0], 1.), (~member, second_samples, cuts[1], -1.)]:
+            position = np.cumsum(group, axis=1)
+            kept = group & (position > cut) & (position <= samples - cut)
+            difference = difference + sign * np.sum(sorted_values * kept, axis=1) / (samples - 2 * cut)
+        return difference
+
+
+    def _revolving_door_range(self, references, first_samples, second_samples, cuts, transform, reference, start,
+                              stop, block):
+        """
+        The _revolving_door_range method evaluates the combinations whose revolving-door ranks are in a range: starting
+        from the first one, each following combination differs by exactly one sample moved into and one moved out of
+        the first group, so that the assignments of a block are obtained as the cumulative sum of the swaps (FOR
+        INTERNAL USE ONLY). The statistics are not updated incrementally swap by swap: the order statistics of each
+        block of assignments are recomputed at once through the _differences method (O(samples*cells) for each
+        combination, but vectorized), since a sequential update for each swap would be slower in Python for the
+        numbers of samples (about 30) for which the exact enumeration is feasible.
+
+        :param references:     it is the list of arrays (or of references to the shared memory containing them)
+                               provided by the _statistic_arrays method
+        :param first_samples:  it is the number of samples of the first group
+        :param second_samples: it is the number of samples of the second group
+        :param cuts:           it is the tuple containing the number of samples cut from each end of the two groups
+                               (None for the mean)
+        :param transform:      it is the function applying the assumption to the differences
+        :param reference:      it is the array of reference values for each cell
+        :param start:          it is the rank of the first combination
+        :param stop:           it is the rank following the last combination
+        :param block:          it is the maximum number of combinations evaluated at once
+
+        :return:               the array containing, for each cell, the number of differences at least as extreme as
+                               the reference one
+        """
+        arrays, memories = self._utils._attach_arrays(references)
+        tot_samples = first_samples + second_samples
+        combination = [0] + self._revolving_door_unrank(start, first_samples, tot_samples) + [tot_samples + 1]
+        membership = np.zeros(shape=tot_samples, dtype=np.int8)
+        membership[np.array(combination[1:first_samples + 1]) - 1] = 1
+        exceeding = np.zeros(shape=np.shape(reference))
+        for size in self._utils._blocks_sizes(stop - start, block):
+            moves = np.array([self._revolving_door_successor(combination, first_samples, tot_samples)
+                              for i in range(size - 1)], dtype=int).reshape(-1, 2)
+            swaps = np.zeros(shape=(size, tot_samples), dtype=np.int8)
+            swaps[0] = membership
+            swaps[np.arange(1, size), moves[:, 0] - 1] = -1
+            swaps[np.arange(1, size), moves[:, 1] - 1] = 1
+            assignments = np.cumsum(swaps, axis=0, dtype=np.int8)
+            diff = transform(self._differences(assignments == 1, arrays, first_samples, second_samples, cuts))
+            exceeding += np.sum((diff > reference) | np.isclose(diff, reference), axis=0)
+            membership = assignments[-1]
+            if start + size < stop:
+                moved_out, moved_in = self._revolving_door_successor(combination, first_samples, tot_samples)
+                membership[moved_out - 1] = 0
+                membership[moved_in - 1] = 1
+            start += size
+        del arrays
+        self._utils._detach_arrays(memories)
+        return exceeding
+
+
+    def _revolving_door_unrank(self, rank, k, n):
+        """
+        The _revolving_door_unrank method returns the k-combination of {1, ..., n} having a given rank in revolving-door
+        order (FOR INTERNAL USE ONLY).
+
+        :param rank: it is the rank of the combination
+        :param k:    it is the size of the combination
+        :param n:    it is the number of elements
+
+        :return:     the sorted list of the elements of the combination
+        """
+        combination = [0] * k
+        x = n
+        for i in range(k, 0, -1):
+            while comb(x, i) > rank:
+                x -= 1
+            combination[i - 1] = x + 1
+            rank = comb(x + 1, i) - rank - 1
+        return combination
+
+
+    def _revolving_door_successor(self, combination, k, n):
+        """
+        The _revolving_door_successor method transforms, in place, a k-combination into the following one in
+        revolving-door order (FOR INTERNAL USE ONLY).
+
+        :param combination: it is the list [0, t_1, ..., t_k, n + 1] containing the sorted elements of the combination
+                            between two sentinels
+        :param k:           it is the size of the combination
+        :param n:           it is the number of elements
+
+        :return:            the element moved out of the combination and the one moved into it
+        """
+        j = 1
+        while j <= k and combination[j] == j:
+            j += 1
+        current = combination[j]
+        if (k - j) % 2 == 1:
+            if j == 1:
+                combination[1] -= 1
+                return current, current - 1
+            combination[j - 1] = j
+            combination[j - 2] = j - 1
+            return max(j - 2, 1), j
+        if combination[j + 1] != current + 1:
+            combination[j - 1] = current
+            combination[j] = current + 1
+            return (current if j == 1 else j - 1), current + 1
+        combination[j + 1] = current
+        combination[j] = j
+        return current + 1, j
+
+
+    def compute_rates_permutation_test(self, biom, first, second, first_labels, second_labels, distance,
+                                       thresholds=0.01, repetitions=100, seed=None, workers=1, scores=None):
+        """
+        The compute_rates_permutation_test method computes the approximate permutation test on the differences between
+        the Equal Error Rates (EERs) and the Areas Under the Curve (AUCs) of two groups, by randomly reassigning the
+        subjects to the groups. The similarity scores are computed only once on the union of the two groups, so that
+        each permutation just selects the pairs of samples belonging to the same group (the two data matrices must
+        have the same features).
+
+        :param biom:          it is the object which manages the biometric analysis
+        :param first:         it is the first 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param second:        it is the second 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param first_labels:  it is the list of labels identifying the subject of each sample of the first data matrix
+        :param second_labels: it is the list of labels identifying the subject of each sample of the second data matrix
+        :param distance:      it is the distance object used to compute the similarity scores
+        :param thresholds:    it is the step between two consecutive thresholds, or the array representing all the
+                              considered thresholds (0.01 by default)
+        :param repetitions:   it is the number of permutations (100 by default)
+        :param seed:          it is the seed used to generate the permutations, in order to obtain reproducible results
+                              (None by default)
+        :param workers:       it is the number of processes among which the permutations are distributed (1 by
+                              default)
+        :param scores:        it is the score matrix of the union of the two groups (first group samples followed by
+                              the second group samples), if it was already computed (None by default)
+
+        :return:              the EER difference and the AUC difference (first group minus second group), and the
+                              related p-values
+        """
+        subjects, first_subjects = self._utils._union_subjects(first_labels, second_labels)
+        if type(thresholds) is float:
+            thresholds = biom._compute_thresholds(thresholds)
+        thresholds = np.asarray(thresholds)
+
+        if scores is None:
+            print('Computing the scores on the union of the groups')
+            scores = biom.compute_scores(np.vstack((biom._samples_matrix(first), biom._samples_matrix(second))),
+                                         distance)
+        values, rows, cols, genuine = biom._sorted_pairs(scores, subjects)
+        in_first = np.arange(np.max(subjects) + 1) < first_subjects
+        difference = self._rates_difference(biom, values, rows, cols, genuine, subjects, in_first, thresholds)
+
+        print('Computing permutation test on EER and AUC differences (' + str(repetitions) + ' permutations)')
+        sizes = self._utils._blocks_sizes(repetitions, self._block_size)
+        seeds = self._utils._spawn_seeds(seed, len(sizes))
+        blocks = [(biom, values, rows, cols, genuine, subjects, first_subjects, thresholds, np.abs(difference),
+                   seeds[b], sizes[b]) for b in range(len(sizes))]
+        exceeding = np.sum(self._utils._run_blocks(self._rates_permutations, blocks, workers), axis=0)
+        pvalue = (exceeding + 1) / (repetitions + 1)
+        return difference[0], difference[1], pvalue[0], pvalue[1]
+
+
+    def _rates_difference(self, biom, values, rows, cols, genuine, subjects, in_first, thresholds):
+        """
+        The _rates_difference method computes the EER and AUC differences between the two groups resulting from an
+        assignment of the subjects to the groups (FOR INTERNAL USE ONLY).
+
+        :param biom:       it is the object which manages the biometric analysis
+        :param values:     it is the sorted 1D-array of the scores related to each pair of samples of the union
+        :param rows:       it is the 1D-array of the first sample index of each pair
+        :param cols:       it is the 1D-array of the second sample index of each pair
+        :param genuine:    it is the mask identifying the genuine pairs
+        :param subjects:   it is the 1D-array representing the subject of each sample
+        :param in_first:   it is the mask identifying the subjects assigned to the first group
+        :param thresholds: it is the array representing all the considered thresholds
+
+        :return:           the array containing the EER difference and the AUC difference
+        """
+        samples_in_first = in_first[subjects]
+        first_rows = samples_in_first[rows]
+        first_cols = samples_in_first[cols]
+        first_EER, first_AUC = biom._pairs_performance(values, genuine, first_rows & first_cols, thresholds)
+        second_EER, second_AUC = biom._pairs_performance(values, genuine, ~(first_rows | first_cols), thresholds)
+        return np.array([first_EER - second_EER, first_AUC - second_AUC])
+
+
+    def _rates_permutations(self, biom, values, rows, cols, genuine, subjects, first_subjects, thresholds, reference,
+                            seed, permutations):
+        """
+        The _rates_permutations method executes a block of permutations of the subjects between the two groups,
+        counting how many times the absolute EER and AUC differences reach the observed ones (FOR INTERNAL USE ONLY).
+
+        :param biom:           it is the object which manages the biometric analysis
+        :param values:         it is the sorted 1D-array of the scores related to each pair of samples of the union
+        :param rows:           it is the 1D-array of the first sample index of each pair
+        :param cols:           it is the 1D-array of the second sample index of each pair
+        :param genuine:        it is the mask identifying the genuine pairs
+        :param subjects:       it is the 1D-array representing the subject of each sample
+        :param first_subjects: it is the number of subjects of the first group
+        :param thresholds:     it is the array representing all the considered thresholds
+        :param reference:      it is the array containing the observed absolute EER and AUC differences
+        :param seed:           it is the seed related to the block
+        :param permutations:   it is the number of permutations of the block
+
+        :return:               the array containing the number of exceeding EER and AUC differences
+        """
+        rng = np.random.default_rng(seed)
+        tot_subjects = np.max(subjects) + 1
+        exceeding = np.zeros(shape=(2,))
+        for p in range(permutations):
+            in_first = np.zeros(shape=(tot_subjects,), dtype=bool)
+            in_first[rng.permutation(tot_subjects)[:first_subjects]] = True
+            diff = np.abs(self._rates_difference(biom, values, rows, cols, genuine, subjects, in_first, thresholds))
+            exceeding += (diff > reference) | np.isclose(diff, reference)
+        return exceeding
+
+
+    def compute_paired_permutation_test(self, first, second, first_labels=None, second_labels=None,
+                                        method='approximate', assumption='different', repetitions=100, seed=None,
+                                        workers=1):
+        """
+        The compute_paired_permutation_test method computes the paired permutation test between the same subjects
+        under two conditions, on all the features at once: the subjects are matched through their labels, their
+        repetitions are averaged, and the sign of the difference of each subject is randomly flipped. The mean
+        differences of a block of permutations are obtained as the product between the matrix of signs and the matrix
+        of differences.
+
+        :param first:         it is the first 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param second:        it is the second 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param first_labels:  it is the list of labels identifying the subject of each sample of the first data matrix
+                              (required in the 2D case, None by default)
+        :param second_labels: it is the list of labels identifying the subject of each sample of the second data matrix
+                              (required in the 2D case, None by default)
+        :param method:        it is the permutation test method, between 'approximate' (random sign flips), 'exact'
+                              (all the 2^subjects sign flips) and 'auto' (exact only if the number of sign flips does
+                              not exceed a budget, 'approximate' by default)
+        :param assumption:    it is the considered assumption, between 'different', 'higher' (or equivalently
+                              'first_higher') and 'lower' (or equivalently 'first_lower'), representing that the mean
+                              of the first condition is different from, higher than or lower than the mean of the
+                              second condition, respectively ('different' by default)
+        :param repetitions:   it is the number of random sign flips of the approximate test (100 by default)
+        :param seed:          it is the seed used to generate the sign flips of the approximate test, in order to
+                              obtain reproducible results (None by default)
+        :param workers:       it is the number of processes among which the sign flips are distributed, the results not
+                              depending on it (1 by default)
+
+        :return:              the array of p-values of each feature
+        """
+        first, second, subjects = self._utils._paired_means(first, second, first_labels, second_labels)
+        differences = first - second
+        transform = self._batched_assumptions[assumption]
+        reference = transform(np.mean(differences, axis=0))
+        samples, features = np.shape(differences)
+        if method == 'auto':
+            method = 'exact' if 2 ** samples * features <= self.enumeration_budget else 'approximate'
+        block = int(max(1, self._memory_budget // (8 * (samples + features))))
+        if method == 'approximate':
+            print('Computing paired permutation test (' + str(repetitions) + ' sign flips)')
+            sizes = self._utils._blocks_sizes(repetitions, block)
+            seeds = self._utils._spawn_seeds(seed, len(sizes))
+            blocks = [(differences, transform, reference, seeds[i], sizes[i]) for i in range(len(sizes))]
+            exceeding = np.sum(self._utils._run_blocks(self._sign_flips, blocks, workers), axis=0)
+            return (exceeding + 1) / (repetitions + 1)
+        print('Computing exact paired permutation test (' + str(2 ** samples) + ' sign flips)')
+        blocks = [(differences, transform, reference, start, min(start + block, 2 ** samples))
+                  for start in range(0, 2 ** samples, block)]
+        exceeding = np.sum(self._utils._run_blocks(self._sign_patterns, blocks, workers), axis=0)
+        return exceeding / 2 ** samples
+
+
+    def _sign_flips(self, differences, transform, reference, seed, permutations):
+        """
+        The _sign_flips method executes a block of random sign flips of the paired differences (FOR INTERNAL USE ONLY).
+
+        :param differences:  it is the 2D (subjects*features) matrix of paired differences
+        :param transform:    it is the function applying the assumption to the mean differences
+        :param reference:    it is the array of reference values for each feature
+        :param seed:         it is the seed of the block
+        :param permutations: it is the number of sign flips of the block
+
+        :return:             the array containing, for each feature, the number of mean differences at least as
+                             extreme as the reference one
+        """
+        rng = np.random.default_rng(seed)
+        signs = np.where(rng.random((permutations, np.shape(differences)[0])) < 0.5, -1., 1.)
+        diff = transform(np.dot(signs, differences) / np.shape(differences)[0])
+        return np.sum((diff > reference) | np.isclose(diff, reference), axis=0)
+
+
+    def _sign_patterns(self, differences, transform, reference, start, stop):
+        """
+        The _sign_patterns method enumerates a range of the sign flips of the paired differences, the bits of the rank
+        of each pattern representing the flipped subjects (FOR INTERNAL USE ONLY).
+
+        :param differences: it is the 2D (subjects*features) matrix of paired differences
+        :param transform:   it is the function applying the assumption to the mean differences
+        :param reference:   it is the array of reference values for each feature
+        :param start:       it is the rank of the first pattern of the range
+        :param stop:        it is the rank following the last pattern of the range
+
+        :return:            the array containing, for each feature, the number of mean differences at least as extreme
+                            as the reference one
+        """
+        ranks = np.arange(start, stop, dtype=np.int64)
+        bits = (ranks[:, np.newaxis] >> np.arange(np.shape(differences)[0], dtype=np.int64)) & 1
+        diff = transform(np.dot(1. - 2. * bits, differences) / np.shape(differences)[0])
+        return np.sum((diff > reference) | np.isclose(diff, reference), axis=0)
+
+
+    def compute_paired_rates_permutation_test(self, biom, first, second, first_labels, second_labels, distance,
+                                              thresholds=0.01, repetitions=100, seed=None, workers=1):
+        """
+        The compute_paired_rates_permutation_test method computes the paired permutation test on the differences
+        between the Equal Error Rates (EERs) and the Areas Under the Curve (AUCs) of the same subjects under two
+        conditions: the subjects are matched through their labels, and each permutation swaps the conditions of a
+        random subset of the subjects, keeping each subject in both the conditions. The similarity scores are computed
+        only once on the union of the two conditions.
+
+        :param biom:          it is the object which manages the biometric analysis
+        :param first:         it is the first 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param second:        it is the second 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+        :param first_labels:  it is the list of labels identifying the subject of each sample of the first data matrix
+        :param second_labels: it is the list of labels identifying the subject of each sample of the second data matrix
+        :param distance:      it is the distance object used to compute the similarity scores
+        :param thresholds:    it is the step between two consecutive thresholds, or the array representing all the
+                              considered thresholds (0.01 by default)
+        :param repetitions:   it is the number of permutations (100 by default)
+        :param seed:          it is the seed used to generate the permutations, in order to obtain reproducible results
+                              (None by default)
+        :param workers:       it is the number of processes among which the permutations are distributed (1 by
+                              default)
+
+        :return:              the paired EER difference and AUC difference (first condition minus second condition),
+                              and the related p-values
+        """
+        first, second, first_labels, second_labels, matched = self._utils._matched_samples(first, second,
+                                                                                           first_labels, second_labels)
+        subjects, first_subjects = self._utils._union_subjects(first_labels, second_labels)
+        if type(thresholds) is float:
+            thresholds = biom._compute_thresholds(thresholds)
+        thresholds = np.asarray(thresholds)
+
+        print('Computing the scores on the union of the conditions')
+        scores = biom.compute_scores(np.vstack((first, second)), distance)
+        values, rows, cols, genuine = biom._sorted_pairs(scores, subjects)
+        in_first = np.arange(2 * first_subjects) < first_subjects
+        difference = self._rates_difference(biom, values, rows, cols, genuine, subjects, in_first, thresholds)
+
+        print('Computing paired permutation test on EER and AUC differences (' + str(repetitions) + ' permutations)')
+        sizes = self._utils._blocks_sizes(repetitions, self._block_size)
+        seeds = self._utils._spawn_seeds(seed, len(sizes))
+        blocks = [(biom, values, rows, cols, genuine, subjects, first_subjects, thresholds, np.abs(difference),
+                   seeds[b], sizes[b]) for b in range(len(sizes))]
+        exceeding = np.sum(self._utils._run_blocks(self._paired_rates_permutations, blocks, workers), axis=0)
+        pvalue = (exceeding + 1) / (repetitions + 1)
+        return difference[0], difference[1], pvalue[0], pvalue[1]
+
+
+    def _paired_rates_permutations(self, biom, values, rows, cols, genuine, subjects, matched_subjects, thresholds,
+                                   reference, seed, permutations):
+        """
+        The _paired_rates_permutations method executes a block of permutations swapping the conditions of a random
+        subset of the matched subjects, counting how many times the absolute EER and AUC differences reach the observed
+        ones (FOR INTERNAL USE ONLY).
+
+        :param biom:             it is the object which manages the biometric analysis
+        :param values:           it is the sorted 1D-array of the scores related to each pair of samples of the union
+        :param rows:             it is the 1D-array of the first sample index of each pair
+        :param cols:             it is the 1D-array of the second sample index of each pair
+        :param genuine:          it is the mask identifying the genuine pairs
+        :param subjects:         it is the 1D-array representing the subject of each sample (the subjects of the second
+                                 condition following the same subjects of the first condition)
+        :param matched_subjects: it is the number of matched subjects
+        :param thresholds:       it is the array representing all the considered thresholds
+        :param reference:        it is the array containing the observed absolute EER and AUC differences
+        :param seed:             it is the seed related to the block
+        :param permutations:     it is the number of permutations of the block
+
+        :return:                 the array containing the number of exceeding EER and AUC differences
+        """
+        rng = np.random.default_rng(seed)
+        exceeding = np.zeros(shape=(2,))
+        for p in range(permutations):
+            swapped = rng.random(matched_subjects) < 0.5
+            in_first = np.concatenate((~swapped, swapped))
+            diff = np.abs(self._rates_difference(biom, values, rows, cols, genuine, subjects, in_first, thresholds))
+            exceeding += (diff > reference) | np.isclose(diff, reference)
+        return exceeding
@@ -0,0 +1,203 @@
+import numpy as np
+
+
+class product_quantizer():
+    """
+    The product_quantizer class allows to compress the samples of a data matrix into compact codes, in order to compute
+    approximate euclidean distances among a large number of samples. The features are split into subspaces, and the
+    subvectors of each subspace are quantized through a k-means codebook (of at most 256 centroids), so that each
+    sample is stored as one byte per subspace. The distances between a query sample and the coded samples are computed
+    asymmetrically (the query is not quantized), by summing the squared distances between each query subvector and the
+    centroids, looked up in one table per subspace.
+
+    Attributes:
+        subspaces:  is the number of subspaces (bytes of each code)
+        centroids:  is the number of centroids of each codebook (at most 256)
+        iterations: is the maximum number of k-means iterations
+        seed:       is the seed used to initialize the k-means and to sample the training samples
+        codebooks:  is the list of 2D (centroids*subspace features) codebooks, None before the fit
+
+    Methods:
+        fit:               trains the codebooks of the subspaces on a data matrix
+        encode:            provides the codes of the samples of a data matrix
+        decode:            provides the approximate samples represented by the codes
+        compute_distances: computes the approximate euclidean distances between query samples and coded samples
+        search:            finds the nearest coded samples to each query sample, re-ranking the best candidates through
+                           the exact distances
+    """
+
+
+    def __init__(self, subspaces=8, centroids=256, iterations=25, seed=None):
+        """
+        The __init__ method is the initializer, which sets the value for the attibutes.
+
+        :param subspaces:  it is the number of subspaces (8 by default)
+        :param centroids:  it is the number of centroids of each codebook, at most 256 (256 by default)
+        :param iterations: it is the maximum number of k-means iterations (25 by default)
+        :param seed:       it is the seed used to initialize the k-means and to sample the training samples (None by
+                           default)
+        """
+        if centroids > 256:
+            raise ValueError("The codes are stored in one byte per subspace, at most 256 centroids are allowed")
+        self.subspaces = subspaces
+        self.centroids = centroids
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks = None
+        self._training_samples = 2 ** 16
+        self._bounds = None
+
+
+    def fit(self, data):
+        """
+        The fit method trains the codebooks: the features are split into contiguous subspaces of (almost) the same size,
+        and the subvectors of each subspace are clustered through the k-means algorithm (on a random subset of the
+        samples, if they are too many).
+
+        :param data: it is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+
+        :return:     the quantizer itself
+        """
+        data = self._samples(data)
+        if self.subspaces > np.shape(data)[1]:
+            raise ValueError("The number of subspaces cannot exceed the number of features")
+        rng = np.random.default_rng(self.seed)
+        if np.shape(data)[0] > self._training_samples:
+            data = data[np.sort(rng.choice(np.shape(data)[0], self._training_samples, replace=False))]
+        print('Training the product quantizer on ' + str(np.shape(data)[0]) + ' samples (' + str(self.subspaces) +
+              ' subspaces)')
+        self._bounds = np.cumsum([0] + [len(s) for s in np.array_split(np.arange(np.shape(data)[1]), self.subspaces)])
+        self.codebooks = [self._kmeans(data[:, self._bounds[s]:self._bounds[s + 1]], rng)
+                          for s in range(self.subspaces)]
+        return self
+
+
+    def encode(self, data):
+        """
+        The encode method provides the codes of the samples of a data matrix, as the index of the nearest centroid of
+        each subspace.
+
+        :param data: it is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+
+        :return:     the 2D (samples*subspaces) matrix of codes (of type uint8)
+        """
+        data = self._samples(data)
+        codes = np.zeros(shape=(np.shape(data)[0], self.subspaces), dtype=np.uint8)
+        for s in range(self.subspaces):
+            codes[:, s] = np.argmin(self._squared_distances(data[:, self._bounds[s]:self._bounds[s + 1]],
+                                                            self.codebooks[s]), axis=1)
+        return codes
+
+
+    def decode(self, codes):
+        """
+        The decode method provides the approximate samples represented by the codes, concatenating the centroids of
+        each subspace.
+
+        :param codes: it is the 2D (samples*subspaces) matrix of codes
+
+        :return:      the 2D (samples*features) matrix of the approximate samples
+        """
+        return np.hstack([self.codebooks[s][codes[:, s]] for s in range(self.subspaces)])
+
+
+    def compute_distances(self, queries, codes):
+        """
+        The compute_distances method computes the asymmetric approximate euclidean distances between each query sample
+        and each coded sample: for each subspace, the table of the squared distances between the query subvectors and
+        the centroids is computed once, and then looked up through the codes.
+
+        :param queries: it is the 2D (queries*features) matrix of the query samples
+        :param codes:   it is the 2D (samples*subspaces) matrix of codes
+
+        :return:        the 2D (queries*samples) matrix of approximate distances
+        """
+        queries = self._samples(queries)
+        distances = np.zeros(shape=(np.shape(queries)[0], np.shape(codes)[0]))
+        for s in range(self.subspaces):
+            table = self._squared_distances(queries[:, self._bounds[s]:self._bounds[s + 1]], self.codebooks[s])
+            distances += table[:, codes[:, s]]
+        return np.sqrt(distances)
+
+
+    def search(self, queries, data, codes, neighbours=1, candidates=10):
+        """
+        The search method finds the nearest samples to each query sample: the candidates are the coded samples with the
+        lowest approximate distances, and only their exact euclidean distances are computed, in order to rank them.
+
+        :param queries:    it is the 2D (queries*features) matrix of the query samples
+        :param data:       it is the 2D (samples*features) data matrix of the coded samples (only the rows of the
+                           candidates are read, so that it can be a memory-mapped array)
+        :param codes:      it is the 2D (samples*subspaces) matrix of codes
+        :param neighbours: it is the number of nearest samples to provide for each query sample (1 by default)
+        :param candidates: it is the number of candidates re-ranked through the exact distances, at least equal to the
+                           number of neighbours (10 by default)
+
+        :return:           the 2D (queries*neighbours) matrix of the indexes of the nearest samples, and the related 2D
+                           matrix of exact distances
+        """
+        queries = self._samples(queries)
+        candidates = min(max(candidates, neighbours), np.shape(codes)[0])
+        approximate = self.compute_distances(queries, codes)
+        if candidates < np.shape(codes)[0]:
+            best = np.argpartition(approximate, candidates - 1, axis=1)[:, :candidates]
+        else:
+            best = np.tile(np.arange(np.shape(codes)[0]), (np.shape(queries)[0], 1))
+        exact = np.sqrt(np.sum((np.asarray(data[best], dtype=float) - queries[:, np.newaxis]) ** 2, axis=2))
+        order = np.argsort(exact, axis=1, kind='stable')[:, :neighbours]
+        return np.take_along_axis(best, order, axis=1), np.take_along_axis(exact, order, axis=1)
+
+
+    def _kmeans(self, data, rng):
+        """
+        The _kmeans method executes the k-means (Lloyd) algorithm on the subvectors of a subspace, initializing the
+        centroids on distinct random samples; the centroids of the empty clusters are kept (FOR INTERNAL USE ONLY).
+
+        :param data: it is the 2D (samples*subspace features) matrix of subvectors
+        :param rng:  it is the random generator
+
+        :return:     the 2D (centroids*subspace features) codebook
+        """
+        distinct = np.unique(data, axis=0)
+        clusters = min(self.centroids, np.shape(distinct)[0])
+        codebook = distinct[rng.choice(np.shape(distinct)[0], clusters, replace=False)]
+        assigned = None
+        for i in range(self.iterations):
+            previous, assigned = assigned, np.argmin(self._squared_distances(data, codebook), axis=1)
+            if not (previous is None) and np.array_equal(previous, assigned):
+                break
+            sizes = np.bincount(assigned, minlength=clusters)
+            sums = np.array([np.bincount(assigned, weights=data[:, f], minlength=clusters)
+                             for f in range(np.shape(data)[1])]).T
+            codebook = np.where(sizes[:, np.newaxis] > 0, sums / np.maximum(sizes, 1)[:, np.newaxis], codebook)
+        return codebook
+
+
+    def _squared_distances(self, data, codebook):
+        """
+        The _squared_distances method computes the squared euclidean distances between each subvector and each
+        centroid, through the expansion of the square (FOR INTERNAL USE ONLY).
+
+        :param data:     it is the 2D (samples*subspace features) matrix of subvectors
+        :param codebook: it is the 2D (centroids*subspace features) codebook
+
+        :return:         the 2D (samples*centroids) matrix of squared distances
+        """
+        squared = np.sum(data * data, axis=1)[:, np.newaxis] - 2 * np.dot(data, codebook.T) + \
+                  np.sum(codebook * codebook, axis=1)[np.newaxis, :]
+        return np.maximum(squared, 0)
+
+
+    def _samples(self, data):
+        """
+        The _samples method returns the 2D (samples*features) data matrix, flattening the 3D
+        (subjects*repetitions*features) data matrix subject by subject (FOR INTERNAL USE ONLY).
+
+        :param data: it is the 2D (samples*features) or 3D (subjects*repetitions*features) data matrix
+
+        :return:     the 2D (samples*features) data matrix
+        """
+        data = np.asarray(data, dtype=float)
+        if len(np.shape(data)) == 3:
+            data = np.reshape(data, (-1, np.shape(data)[2]))
+        return data
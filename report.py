@@ -2,6 +2,7 @@ from fpdf import FPDF
 from distances import *
 import matplotlib.pyplot as plt
 from pathlib import Path
+from score_accumulator import *
 
 
 class report():
@@ -10,10 +11,14 @@ class report():
     as well as the analysis themselves.
 
     Methods:
-        single_analysis:   computes the biometric analysis on the raw dataset
-        groups_comparison: computes the biometric analysis on two raw datasets, and compares them through various
-                           statistical analysis
-        cluster_analysis:  computes the clustering on a raw dataset, and evaluates the performance of the results
+        single_analysis:       computes the biometric analysis on the raw dataset
+        groups_comparison:     computes the biometric analysis on two raw datasets, and compares them through various
+                               statistical analysis
+        multiple_groups_comparison: computes the biometric analysis on more raw datasets at once, and compares them
+                               through the Kruskal-Wallis and Dunn tests
+        reliability_analysis:  computes the test-retest reliability of each feature through the intraclass correlation
+                               coefficients
+        cluster_analysis:      computes the clustering on a raw dataset, and evaluates the performance of the results
     """
 
 
@@ -177,11 +182,14 @@ class report():
     def _scores_boxplot(self, first_scores, second_scores, first_name="", second_name="", distribution_name="",
                         view=True, save=True, outPath=None):
         """
-        The _scores_boxplot method shows and/or saves (in .png format) the boxplot related two scores vectors(FOR
-        INTERNAL USE ONLY).
-
-        :param first_scores:      it is the 1D-array representing the scores related to the first group
-        :param first_scores:      it is the 1D-array representing the scores related to the second group
+        The _scores_boxplot method shows and/or saves (in .png format) the boxplot related two scores vectors; the
+        analyses of the report pass the score vectors, whereas the score_accumulators are provided only by a direct
+        call to the compute_scores_accumulators method of the biometric_performance (FOR INTERNAL USE ONLY).
+
+        :param first_scores:      it is the 1D-array representing the scores related to the first group (or their
+                                  score_accumulator)
+        :param first_scores:      it is the 1D-array representing the scores related to the second group (or their
+                                  score_accumulator)
         :param first_name:        it is the name of the first analyzed group ("" by default)
         :param second_name:       it is the name of the second analyzed group ("" by default)
         :param distribution_name: it is the name of the analyzed distribution ("" by default)
@@ -191,12 +199,15 @@ class report():
         :param outPath:           it is the path (directory) in which the resulting image has to be saved (None by
                                   default)
         """
-        first = np.squeeze(first_scores)
-        second = np.squeeze(second_scores)
-        scores = [first, second]
         fig, ax = plt.subplots()
         ax.set_title(distribution_name + " scores distributions")
-        ax.boxplot(scores)
+        if isinstance(first_scores, score_accumulator):
+            ax.bxp([first_scores.boxplot_statistics(), second_scores.boxplot_statistics()], showfliers=False)
+        else:
+            first = np.squeeze(first_scores)
+            second = np.squeeze(second_scores)
+            scores = [first, second]
+            ax.boxplot(scores)
         if not (first_name is "") and not (second_name is ""):
             plt.xticks([1, 2], [first_name, second_name])
         if save is True:
@@ -283,6 +294,99 @@ class report():
                 pdf.add_page()
         return pdf
 
+    def _report_rates_permutation(self, pdf, rates_perm, xstart_double, y, tabw, tabh):
+        """
+        The _report_rates_permutation method generates a table related to the permutation test on the differences
+        between the EERs and the AUCs of the two groups (FOR INTERNAL USE ONLY).
+
+        :param pdf:           it is the handle to the report file
+        :param rates_perm:    it is the tuple containing the EER difference, the AUC difference and the related p-values
+        :param xstart_double: it is the space between left margin and the beginning of the table
+        :param y:             it is the current distance from the top margin
+        :param tabw:          it is the width of each cell of the table
+        :param tabh:          it is the height of each cell of the table
+
+        :return:              the handle of the modified report
+        """
+        pdf.set_xy(xstart_double + tabw, y + 5)
+        pdf.multi_cell(tabw, tabh, "Difference", border=1, align='C', fill=0)
+        pdf.set_xy(xstart_double + (tabw * 2), y + 5)
+        pdf.multi_cell(tabw, tabh, "p-value", border=1, align='C', fill=0)
+        for name, diff, p in [("EER", rates_perm[0], rates_perm[2]), ("AUC", rates_perm[1], rates_perm[3])]:
+            y = pdf.get_y()
+            pdf.set_xy(xstart_double, y)
+            pdf.multi_cell(tabw, tabh, name, border=1, align='L', fill=0)
+            pdf.set_xy(xstart_double + tabw, y)
+            pdf.multi_cell(tabw, tabh, str(round(diff, 5)), border=1, align='L', fill=0)
+            pdf.set_xy(xstart_double + 2 * tabw, y)
+            pdf.multi_cell(tabw, tabh, str(round(p, 5)), border=1, align='L', fill=0)
+        return pdf
+
+
+    def _report_cross_group(self, pdf, cross_results, xstart_double, y, tabw, tabh):
+        """
+        The _report_cross_group method generates a table related to the cross-group impostor scores and to the
+        performance on the whole population (FOR INTERNAL USE ONLY).
+
+        :param pdf:           it is the handle to the report file
+        :param cross_results: it is the dictionary containing the results of the cross-group analysis
+        :param xstart_double: it is the space between left margin and the beginning of the table
+        :param y:             it is the current distance from the top margin
+        :param tabw:          it is the width of each cell of the table
+        :param tabh:          it is the height of each cell of the table
+
+        :return:              the handle of the modified report
+        """
+        pdf.set_xy(xstart_double + tabw, y + 5)
+        pdf.multi_cell(tabw * 2, tabh, "Cross-group", border=1, align='C', fill=0)
+        for name, key in [("Mean", 'mean'), ("Median", 'median'), ("Std", 'std'), ("EER (all)", 'EER'),
+                          ("AUC (all)", 'AUC')]:
+            y = pdf.get_y()
+            pdf.set_xy(xstart_double + tabw, y)
+            pdf.multi_cell(tabw, tabh, name, border=1, align='L', fill=0)
+            pdf.set_xy(xstart_double + 2 * tabw, y)
+            pdf.multi_cell(tabw, tabh, str(round(cross_results[key], 5)), border=1, align='L', fill=0)
+        return pdf
+
+
+    def _report_reliability(self, pdf, icc, intervals, order, xstart, y, tabw, tabh):
+        """
+        The _report_reliability method generates a table related to the intraclass correlation coefficients of each
+        feature, sorted by decreasing reliability (FOR INTERNAL USE ONLY).
+
+        :param pdf:       it is the handle to the report file
+        :param icc:       it is the dictionary of the intraclass correlation coefficients of each feature
+        :param intervals: it is the dictionary of the confidence intervals of each feature, or None
+        :param order:     it is the array of the feature indexes, in the order in which they have to be reported
+        :param xstart:    it is the space between left margin and the beginning of the table
+        :param y:         it is the current distance from the top margin
+        :param tabw:      it is the width of each cell of the table
+        :param tabh:      it is the height of each cell of the table
+
+        :return:          the handle of the modified report
+        """
+        header = ["ICC(2,1)", "ICC(3,1)", "ICC(1,k)"]
+        if not(intervals is None):
+            header.append("CI ICC(2,1)")
+        for c, title in enumerate(header):
+            pdf.set_xy(xstart + (c + 1) * tabw * 0.6, y + 5)
+            pdf.multi_cell(tabw * (1 if title[0] == "C" else 0.6), tabh, title, border=1, align='C', fill=0)
+        for i, f in enumerate(order):
+            y = pdf.get_y()
+            pdf.set_xy(xstart, y)
+            pdf.multi_cell(tabw * 0.6, tabh, "F" + str(f + 1), border=1, align='L', fill=0)
+            for c, key in enumerate(header[:3]):
+                pdf.set_xy(xstart + (c + 1) * tabw * 0.6, y)
+                pdf.multi_cell(tabw * 0.6, tabh, str(round(icc[key][f], 5)), border=1, align='L', fill=0)
+            if not(intervals is None):
+                pdf.set_xy(xstart + 4 * tabw * 0.6, y)
+                pdf.multi_cell(tabw, tabh, "[" + str(round(intervals['ICC(2,1)'][0, f], 5)) + ", " +
+                               str(round(intervals['ICC(2,1)'][1, f], 5)) + "]", border=1, align='L', fill=0)
+            if (i + 1) % 35 == 0 and i > 0:
+                pdf.add_page()
+        return pdf
+
+
     def _report_confusion_matrix(self, pdf, cm, group_name, xstart_double, y, tabw, tabh):
         """
         The _report_confusion_matrix method generates a table related to a confusion_matrix (FOR INTERNAL USE ONLY).
@@ -324,7 +428,8 @@ class report():
     def _report(self, biometric_analysis, statistical_analysis, permutation_test, first_name, second_name, first_EER,
                 second_EER, first_AUC, second_AUC, first_desc_stats, second_desc_stats, first_cm, second_cm,
                 rates_results, pvalues, ds, pvalue_G, d_G, pvalue_I, d_I, p_perm, permutation_results,
-                permutation_results_p, pdf_name, outPath, double_analysis):
+                permutation_results_p, pdf_name, outPath, double_analysis, rates_perm=None, cross_results=None,
+                permanova_results=None, selection_note=None):
         """
         The _report method is used to generate the pdf report of the analysis between two different groups (FOR INTERNAL
         USE ONLY).
@@ -359,6 +464,15 @@ class report():
                                       default)
         :param double_analysis:       it has to be True if the computed analysis is on two different data matrices,
                                       False otherwise
+        :param rates_perm:            it is the tuple containing the EER and AUC differences between the two groups and
+                                      the related permutation test p-values, or None if the test was not computed (None
+                                      by default)
+        :param cross_results:         it is the dictionary containing the results of the cross-group analysis, or None
+                                      if the analysis was not computed (None by default)
+        :param permanova_results:     it is the tuple containing the PERMANOVA pseudo-F and p-value, or None if the
+                                      analysis was not computed (None by default)
+        :param selection_note:        it is the string describing the feature selection (such as the expected distortion
+                                      of a random projection), or None if there is nothing to report (None by default)
         """
         print('Generating the report')
         pdf = FPDF()
@@ -372,6 +486,9 @@ class report():
         pdf.set_font('Arial', 'B', title)
         leftx = pdf.get_x()
         pdf.multi_cell(0, 10, "Report", 0, 'C')
+        if not (selection_note is None):
+            pdf.set_font('Arial', '', text)
+            pdf.multi_cell(0, cellh, selection_note, 0, 'C')
         pdf.set_font('Arial', 'B', cap)
         if biometric_analysis is True:
             pdf.multi_cell(0, cellh, "\n  EER results", 1)
@@ -419,6 +536,9 @@ class report():
                 pdf.set_xy(xstart + tabw, y)
                 pdf.multi_cell(tabw, tabh, str(round(second_EER, 5)), border=1, align='L', fill=0)
 
+            if not(rates_perm is None):
+                pdf = self._report_rates_permutation(pdf, rates_perm, xstart_double, pdf.get_y(), tabw, tabh)
+
             y = pdf.get_y()
             pdf.set_xy(leftx, y + 5)
 
@@ -475,6 +595,19 @@ class report():
             if double_analysis is True:
                 pdf.image(self._fullname(outPath, second_name) + "_rates.png", ximg, None, wimg, himg)
 
+            if not(cross_results is None):
+                pdf.add_page()
+                y = pdf.get_y()
+                pdf.set_xy(leftx, y + 5)
+                pdf.set_font('Arial', 'B', cap)
+                pdf.multi_cell(0, cellh, "\n Cross-group impostors\n", 1)
+                pdf.set_font('Arial', '', text)
+                pdf = self._report_cross_group(pdf, cross_results, xstart_double, pdf.get_y(), tabw, tabh)
+                y = pdf.get_y()
+                pdf.set_xy(leftx, y + 5)
+                pdf.image(self._fullname(outPath, first_name + "_" + second_name) + "_Cross_Impostor_hist.png", ximg,
+                          None, wimg, himg)
+
             ###########################################################################################################
             ##################################### Confusion matrix section ############################################
             ###########################################################################################################
@@ -558,6 +691,15 @@ class report():
             pdf.multi_cell(0, cellh, permutation_results_p, 0)
             pdf.add_page()
 
+        if not(permanova_results is None):
+            y = pdf.get_y()
+            pdf.set_xy(leftx, y)
+            pdf.set_font('Arial', 'B', cap)
+            pdf.multi_cell(0, cellh, "\n  Multivariate permutation test (PERMANOVA)\n", 1)
+            pdf.set_font('Arial', '', text)
+            pdf.multi_cell(0, cellh, "\nPseudo-F: %.5f\nP-value:  %.5f\n" % permanova_results, 0)
+            pdf.add_page()
+
         if statistical_analysis is True:
             y = pdf.get_y()
             pdf.set_xy(leftx, y)
@@ -623,6 +765,29 @@ class report():
         return thresholds
 
 
+    def _selection_note(self, model):
+        """
+        The _selection_note method describes the feature selection in the report, when it alters the distances
+        between the samples in a known way: for the random projections, it states the number of dimensions and the
+        expected distortion of the distances (FOR INTERNAL USE ONLY).
+
+        :param model: it is the dictionary representing the fitted feature selection model
+
+        :return:      the string describing the feature selection, or None if there is nothing to report
+        """
+        if not ('distortion' in model):
+            return None
+        dimensions = model['shape'][0] if 'shape' in model else np.shape(model['components'])[0]
+        if np.isinf(model['distortion']):
+            note = "Random projection on " + str(dimensions) + " dimensions: the distortion of the distances is " \
+                   "not bounded"
+        else:
+            note = "Random projection on " + str(dimensions) + " dimensions: expected distortion of the distances " \
+                   "%.5f" % model['distortion']
+        print(note)
+        return note
+
+
     def _fullname(self, parent, filename):
         """
         The _fullname method returns the full name of a file (FOR INTERNAL USE ONLY).
@@ -642,7 +807,8 @@ class report():
                         data, labels=None, distance=euclidean_distance(), threshold=None,
                         view_analysis=False, generate_pdf=False,
                         name="first", bins=None, report_name="report.pdf", outPath=None,
-                        selection_algorithm=None, selected_features=None, biometric_analysis=True):
+                        selection_algorithm=None, selected_features=None, biometric_analysis=True, selection_seed=None,
+                        selection_restarts=1, selection_workers=1, selection_tol=1e-4, selection_max_iter=200):
         """
         The single_analysis method computes an analysis on a single data matrix, eventually reporting it on a pdf file.
 
@@ -668,23 +834,35 @@ class report():
         :param report_name:         it is the name of the eventually generated pdf ("report.pdf" by default)
         :param outPath:             it is the name of the directory in which export the report and the related figures
                                     (None by default)
-        :param selection_algorithm: it is the selection algorithm, between None (all selected), 'ica', 'pca' and
-                                    'columns' (None by default)
+        :param selection_algorithm: it is the selection algorithm, between None (all selected), 'ica', 'pca',
+                                    'columns', 'fisher', 'forward', 'backward', 'random_projection' and
+                                    'gaussian_projection' (None by default)
         :param selected_fetures:    it is the list of features (in caso of columns selection algorithm) or the number of
                                     features which have to be extracted (None by default)
         :param biometric_analysis:  it has to be True in order to execute the biometric analysis, False otherwise
                                     (True by default)
+        :param selection_seed:      it is the seed of the randomized selection algorithms (None by default)
+        :param selection_restarts:  it is the number of restarts of the independent component analysis (1 by default)
+        :param selection_workers:   it is the number of processes among which the restarts (or the candidates of the
+                                    greedy searches) are distributed (1 by default)
+        :param selection_tol:       it is the tolerance of the independent component analysis (1e-4 by default)
+        :param selection_max_iter:  it is the maximum number of iterations of the independent component analysis (200
+                                    by default)
         """
         EER = None
         rates_results = None
+        selection_note = None
 
         report_name = self._fullname(outPath, report_name)
 
         first_data, first_labels = data_manager.data_management(data, labels)
 
         if not (selection_algorithm is None or selected_features is None):
-            data = features_selector.select_features(selection_algorithm, data,
-                                                     selected_features)
+            model = features_selector.fit(selection_algorithm, data, selected_features, labels, selection_seed,
+                                          selection_restarts, selection_workers, distance, selection_tol,
+                                          selection_max_iter)
+            data = features_selector.transform(model, data)
+            selection_note = self._selection_note(model)
         if biometric_analysis is True:
             scores = biom.compute_scores(data, distance)
             G, I, thr = biom.genuines_and_impostors(scores, first_labels)
@@ -727,7 +905,7 @@ class report():
                 report_name += ".pdf"
             self._report(biometric_analysis, False, False, name, None, EER, None, AUC, None, desc_stats, None, cm, None,
                          rates_results,None, None, None, None, None, None, None, None, None,
-                         report_name, outPath, double_analysis=False)
+                         report_name, outPath, double_analysis=False, selection_note=selection_note)
 
 
     def groups_comparison(self, data_manager, statan, biom, features_selector, perm_test, first_data, second_data=None,
@@ -735,7 +913,11 @@ class report():
                           view_analysis=False, generate_pdf=False, first_name="first", second_name="second", bins=None,
                           report_name="report.pdf", outPath=None, selection_algorithm=None, selected_features=None,
                           permutation_test=False, permutation_method='approximate', permutation_assumption='different',
-                          permutation_repetitions=100, biometric_analysis=True, statistical_analysis=True):
+                          permutation_repetitions=100, biometric_analysis=True, statistical_analysis=True,
+                          rates_permutation_test=False, permutation_seed=None, permutation_workers=1,
+                          cross_group_analysis=False, permanova=False, permutation_correction=None, paired=False,
+                          selection_reference='pooled', selection_seed=None, selection_restarts=1, selection_workers=1,
+                          selection_tol=1e-4, selection_max_iter=200):
         """
         The groups_comparison method computes an analysis between two groups, represented as two different 3D
         (subjects*repetitions*features) data matrices, eventually reporting it on a pdf file.
@@ -766,14 +948,16 @@ class report():
         :param report_name:             it is the name of the eventually generated pdf ("report.pdf" by default)
         :param outPath:                 it is the directory in which export the report and the related figures (None by
                                         default)
-        :param selection_algorithm:     it is the selection algorithm, between None (all selected), 'ica', 'pca' and
-                                        'columns' (None by default)
+        :param selection_algorithm:     it is the selection algorithm, between None (all selected), 'ica', 'pca',
+                                        'columns', 'fisher', 'forward', 'backward', 'random_projection' and
+                                        'gaussian_projection' (None by default)
         :param selected_fetures:        it is the list of features (in caso of columns selection algorithm) or the number
                                         of features which have to be extracted (None by default)
         :param permutation_test:        it has to be True in order to execute the permutation test between the two
                                         datasets, False otherwise (False by default)
-        :param permutation_method:      it is the pemutation test method, between 'approximate' and 'exact'
-                                        ('approximate' by default)
+        :param permutation_method:      it is the pemutation test method, between 'approximate', 'exact' and 'auto'
+                                        (exact only if the number of combinations is affordable, 'approximate' by
+                                        default)
         :param permutation_assumption:  it is the permutation test assumption, between 'different', 'higher' and
                                         'lower', representing the fact that the two means are different, the first is
                                         higher of the second one, or vice versa ('different' by default)
@@ -783,14 +967,52 @@ class report():
                                         (True by default)
         :param statistical_analysis:    it has to be True in order to perform the statistical analysis, False otherwise
                                         (False by default)
+        :param rates_permutation_test:  it has to be True in order to execute the permutation test on the differences
+                                        between the EERs and the AUCs of the two groups (requiring the biometric
+                                        analysis and the same features in both the groups), False otherwise (False by
+                                        default)
+        :param permutation_seed:        it is the seed used to generate the permutations, in order to obtain
+                                        reproducible results (None by default)
+        :param permutation_workers:     it is the number of processes among which the permutations are distributed (1 by
+                                        default)
+        :param cross_group_analysis:    it has to be True in order to compute the impostor scores between the subjects
+                                        of the two groups, and the performance on the whole population (requiring the
+                                        biometric analysis and the same features in both the groups), False otherwise
+                                        (False by default)
+        :param permanova:               it has to be True in order to execute the permutational multivariate analysis
+                                        of variance (PERMANOVA) between the two groups on the distances between all
+                                        their samples (requiring the same features in both the groups), False otherwise
+                                        (False by default)
+        :param permutation_correction:  it is the correction for the multiple comparisons among the features applied to
+                                        the approximate permutation test, between 'max_t' (family-wise) and 'fdr'
+                                        (false discovery rate), None for no correction (None by default)
+        :param paired:                  it has to be True in order to compare the same subjects under two conditions,
+                                        matching them through their labels: the features are compared through the
+                                        Wilcoxon signed-rank test and the sign-flip permutation test on the means of
+                                        the subjects, and the rates permutation test swaps the conditions of the
+                                        subjects, False otherwise (False by default)
+        :param selection_reference:     it is the data on which the selection model is fitted once, before projecting
+                                        both the groups in the same space, between 'pooled' (the union of the two
+                                        groups), 'first' and 'second' ('pooled' by default)
+        :param selection_seed:          it is the seed of the randomized selection algorithms (None by default)
+        :param selection_restarts:      it is the number of restarts of the independent component analysis (1 by
+                                        default)
+        :param selection_workers:       it is the number of processes among which the restarts (or the candidates of
+                                        the greedy searches) are distributed (1 by default)
+        :param selection_tol:           it is the tolerance of the independent component analysis (1e-4 by default)
+        :param selection_max_iter:      it is the maximum number of iterations of the independent component analysis
+                                        (200 by default)
         """
-        pvalue, d, p_perm = None, None, None
+        pvalue, d, p_perm, rates_perm, cross_I, cross_results = None, None, None, None, None, None
+        p_adjusted = None
+        union_scores, permanova_results = None, None
         first_scores, first_G, first_I, first_thr = None, None, None, None
         second_scores, second_G, second_I, second_thr = None, None, None, None
         first_FAR, first_FRR, first_CRR, first_CAR, first_EER = None, None, None, None, None
         second_FAR, second_FRR, second_CRR, second_CAR, second_EER = None, None, None, None, None
         pvalue_G, d_G, pvalue_I, d_I = None, None, None, None
         rates_results = None
+        selection_note = None
 
         report_name = self._fullname(outPath, report_name)
 
@@ -799,12 +1021,15 @@ class report():
 
         print(np.shape(first_data))
         if not(selection_algorithm is None or selected_features is None):
-            first_data = features_selector.select_features(selection_algorithm,
-                                                           first_data,
-                                                           selected_features)
-            second_data = features_selector.select_features(selection_algorithm,
-                                                            second_data,
-                                                            selected_features)
+            references = {'pooled': [first, second], 'first': first, 'second': second}
+            references_labels = {'pooled': [first_labels, second_labels], 'first': first_labels,
+                                 'second': second_labels}
+            model = features_selector.fit(selection_algorithm, references[selection_reference], selected_features,
+                                          references_labels[selection_reference], selection_seed, selection_restarts,
+                                          selection_workers, distance, selection_tol, selection_max_iter)
+            first_data = features_selector.transform(model, first_data)
+            second_data = features_selector.transform(model, second_data)
+            selection_note = self._selection_note(model)
 
         if biometric_analysis is True:
             print('Computing genuine and impostor scores')
@@ -832,19 +1057,80 @@ class report():
             self._print_confusion_matrix(first_cm, first_name)
             self._print_confusion_matrix(second_cm, second_name)
 
+            if rates_permutation_test is True:
+                if self._compatible_features(first_data, second_data) is True:
+                    rates_thr = 0.01
+                    if not(threshold is None):
+                        rates_thr = first_thr
+                    if paired is True:
+                        rates_perm = perm_test.compute_paired_rates_permutation_test(biom,
+                                                                                     biom._samples_matrix(first_data),
+                                                                                     biom._samples_matrix(second_data),
+                                                                                     first_labels, second_labels,
+                                                                                     distance, rates_thr,
+                                                                                     permutation_repetitions,
+                                                                                     permutation_seed,
+                                                                                     permutation_workers)
+                    else:
+                        union_scores = self._union_scores(biom, first_data, second_data, distance)
+                        rates_perm = perm_test.compute_rates_permutation_test(biom, first_data, second_data,
+                                                                              first_labels, second_labels, distance,
+                                                                              rates_thr,
+                                                                              permutation_repetitions,
+                                                                              permutation_seed, permutation_workers,
+                                                                              union_scores)
+                else:
+                    print('The features of the two groups are not comparable, the permutation test on the EER and '
+                          'AUC differences is skipped')
+
+            if cross_group_analysis is True:
+                if self._compatible_features(first_data, second_data) is True:
+                    cross_I = np.reshape(biom.compute_cross_scores(first_data, second_data, distance), (-1, 1))
+                    cross_results = self._cross_group_performance(biom, first_G, second_G, first_I, second_I, cross_I,
+                                                                  threshold)
+                else:
+                    print('The features of the two groups are not comparable, the cross-group analysis is skipped')
 
             if statistical_analysis is True:
                 print('\nComputing statistical analysis between scores')
-                pvalue_G, d_G = statan.compute_scores_statistics(first_G, second_G)
-                pvalue_I, d_I = statan.compute_scores_statistics(first_I, second_I)
-
-        if permutation_test is True:
+                pvalue_G, d_G = statan.compute_scores_statistics(first_G, second_G, is_sorted=True)
+                pvalue_I, d_I = statan.compute_scores_statistics(first_I, second_I, is_sorted=True)
+
+        if permutation_test is True and paired is True:
+            print('Computing paired permutation test between features')
+            if not (permutation_correction is None):
+                print('The correction for the multiple comparisons is not available for the paired permutation test')
+                permutation_correction = None
+            p_perm = np.reshape(perm_test.compute_paired_permutation_test(first, second, first_labels, second_labels,
+                                                                          permutation_method, permutation_assumption,
+                                                                          permutation_repetitions, permutation_seed,
+                                                                          permutation_workers), (1, -1))
+        elif permutation_test is True:
             print('Computing permutation test between features')
             p_perm = perm_test.compute_permutation_test(first, second, permutation_method,
                                                         permutation_assumption, permutation_repetitions, first_labels,
-                                                        second_labels)
+                                                        second_labels, seed=permutation_seed,
+                                                        workers=permutation_workers,
+                                                        correction=permutation_correction)
+            if not (permutation_correction is None):
+                p_perm, p_adjusted = p_perm
+
+        if permanova is True:
+            if self._compatible_features(first_data, second_data) is True:
+                if union_scores is None:
+                    union_scores = self._union_scores(biom, first_data, second_data, distance)
+                union_subjects, first_subjects = statan._utils._union_subjects(first_labels, second_labels)
+                permanova_results = statan.compute_permanova(1 / union_scores - 1,
+                                                             union_subjects >= first_subjects, union_subjects,
+                                                             permutation_repetitions, permutation_seed,
+                                                             permutation_workers)
+            else:
+                print('The features of the two groups are not comparable, the PERMANOVA is skipped')
 
-        if statistical_analysis is True:
+        if statistical_analysis is True and paired is True:
+            print('Computing paired statistical analysis between features')
+            pvalue, d = statan.compute_paired_statistics(first, second, first_labels, second_labels)
+        elif statistical_analysis is True:
             print('Computing statistical analysis between features')
             pvalue, d = statan.compute_features_statistics(first, second, first_labels, second_labels)
 
@@ -861,6 +1147,22 @@ class report():
                 AUC_results += "\n\nReceiver Operating Characteristic curves:"
 
                 rates_results = "\n\nFalse Acceptance Rates and False Rejection Rates:"
+                if not(rates_perm is None):
+                    rates_permutation_results = "\n\n" + ("Paired p" if paired is True else "P") + \
+                                                "ermutation test on the differences between the " + \
+                                                str(first_name) + " and the " + str(second_name) + " groups:"
+                    rates_permutation_results += "\n\n  - EER difference: %.5f (p-value: %.5f)" % (rates_perm[0],
+                                                                                                  rates_perm[2])
+                    rates_permutation_results += "\n  - AUC difference: %.5f (p-value: %.5f)" % (rates_perm[1],
+                                                                                                rates_perm[3])
+                if not(cross_results is None):
+                    cross_group_results = "\n\nCross-group impostor scores between the " + str(first_name) + \
+                                          " and the " + str(second_name) + " groups:"
+                    cross_group_results += "\n\n  - Mean:   %.5f" % cross_results['mean']
+                    cross_group_results += "\n  - Median: %.5f" % cross_results['median']
+                    cross_group_results += "\n  - Std:    %.5f" % cross_results['std']
+                    cross_group_results += "\n\nEER of the whole population: %.5f" % cross_results['EER']
+                    cross_group_results += "\nAUC of the whole population: %.5f" % cross_results['AUC']
                 if statistical_analysis is True:
                     genuine_statistical_results = "\n\nResults of the statistical analysis between the two Genuine scores:\n\n  - pvalue:    %.5f" % pvalue_G
                     genuine_statistical_results += "\n  - Cohen's d: %.5f" % d_G
@@ -870,11 +1172,14 @@ class report():
             permutation_results, features_row, permutation_results_p = self._permutation_strings(permutation_test,
                                                                                                  first_name,
                                                                                                  second_name,
-                                                                                                 p_perm)
+                                                                                                 p_perm, p_adjusted,
+                                                                                                 permutation_correction)
 
             if biometric_analysis is True:
                 if view_analysis is True:
                     print(EER_scores_results)
+                    if not(rates_perm is None):
+                        print(rates_permutation_results)
                     print("\n Descriptive statistics on scores: " + first_name)
                     print("\nGenuine descriptive statistics:\n  Mean:   %.5f" % first_desc_stats['mean'][0])
                     print("\n  Median: %.5f" % first_desc_stats['median'][0])
@@ -901,6 +1206,11 @@ class report():
                                                   view_analysis, generate_pdf, outPath)
                 self._scores_histogram_comparison(first_I, second_I, "Impostor", first_name, second_name, bins,
                                                   view_analysis, generate_pdf, outPath)
+                if not(cross_results is None):
+                    if view_analysis is True:
+                        print(cross_group_results)
+                    self._scores_histogram(cross_I, first_name + "_" + second_name, "Cross_Impostor", bins,
+                                           view_analysis, generate_pdf, outPath)
                 if view_analysis is True:
                     print(AUC_results)
                 self._roc_curve(first_FAR, first_CAR, first_name, view_analysis, generate_pdf, outPath)
@@ -918,6 +1228,12 @@ class report():
                 print(features_row)
                 print(permutation_results_p)
 
+            if not(permanova_results is None):
+                permanova_string = "\n\nPERMANOVA between the " + str(first_name) + " and the " + str(second_name) + \
+                                   " groups:\n\n  - Pseudo-F: %.5f\n  - P-value:  %.5f" % permanova_results
+                if view_analysis is True:
+                    print(permanova_string)
+
             if statistical_analysis is True:
                 if view_analysis is True:
                     print("P-values: ", end=" ")
@@ -940,7 +1256,396 @@ class report():
                 self._report(biometric_analysis, statistical_analysis, permutation_test, first_name, second_name,
                              first_EER, second_EER, first_AUC, second_AUC, first_desc_stats, second_desc_stats,
                              first_cm, second_cm, rates_results, pvalue, d, pvalue_G, d_G, pvalue_I, d_I, p_perm,
-                             permutation_results,permutation_results_p, report_name, outPath, double_analysis=True)
+                             permutation_results,permutation_results_p, report_name, outPath, double_analysis=True,
+                             rates_perm=rates_perm, cross_results=cross_results,
+                             permanova_results=permanova_results, selection_note=selection_note)
+
+
+    def multiple_groups_comparison(self, data_manager, statan, biom, groups_data, groups_labels=None,
+                                   groups_names=None, distance=euclidean_distance(), threshold=None,
+                                   view_analysis=False, generate_pdf=False, report_name="report.pdf", outPath=None,
+                                   workers=1, biometric_analysis=True, statistical_analysis=True):
+        """
+        The multiple_groups_comparison method computes an analysis among more groups at once, represented as a list of
+        3D (subjects*repetitions*features) data matrices, eventually reporting it on a single pdf file. The scores and
+        the rates of each group are computed only once (concurrently among the groups), and the groups are compared on
+        each feature through the Kruskal-Wallis test and the Dunn post-hoc test between each pair of groups, instead of
+        repeating the comparison between each pair of groups.
+
+        :param data_manager:         it is the object which manages the data
+        :param statan:               it is the object which manages the statistical analysis
+        :param biom:                 it is the object which manages the biometric analysis
+        :param groups_data:          it is the list of 3D (subjects*repetitions*features) or 2D (samples*features) data
+                                     matrices of each group
+        :param groups_labels:        it is the list of the lists of labels related to each data matrix (required in case
+                                     of 2D matrices, None by default)
+        :param groups_names:         it is the list of names of the groups (None by default, "group1", "group2" and so
+                                     on)
+        :param distance:             it is the function (or one string between 'euclidean', 'mahalanobis', 'manhattan'
+                                     and 'minkowski', representing the homonymous distances) which is used in order to
+                                     evaluate the distance in the genuine and impostor scores computation (optional,
+                                     euclidean distance by default)
+        :param threshold:            it is the step between two consecutive thresholds on which evaluate the FAR and the
+                                     FRR, or None to automatically evaluate the threshold values (None by default)
+        :param view_analysis:        it has to be True in order to print the results of the analysis, False otherwise
+                                     (False by default)
+        :param generate_pdf:         it has to be True in order to create the pdf of the analysis report, False
+                                     otherwise (False by default)
+        :param report_name:          it is the name of the eventually generated pdf ("report.pdf" by default)
+        :param outPath:              it is the directory in which export the report and the related figures (None by
+                                     default)
+        :param workers:              it is the number of processes among which the per-group stages are distributed (1
+                                     by default)
+        :param biometric_analysis:   it has to be True in order to execute the biometric analysis, False otherwise (True
+                                     by default)
+        :param statistical_analysis: it has to be True in order to perform the statistical analysis, False otherwise
+                                     (True by default)
+
+        :return:                     the list of dictionaries containing the results of each group (None without the
+                                     biometric analysis), and the dictionary containing the results of the statistical
+                                     analysis (None without the statistical analysis)
+        """
+        groups = len(groups_data)
+        if groups_labels is None:
+            groups_labels = [None] * groups
+        if groups_names is None:
+            groups_names = ["group" + str(g + 1) for g in range(groups)]
+        stages, statistics = None, None
+
+        managed = [data_manager.data_management(groups_data[g], groups_labels[g]) for g in range(groups)]
+
+        if biometric_analysis is True:
+            print('Computing genuine and impostor scores and biometric performance of ' + str(groups) + ' groups')
+            blocks = [(biom, groups_data[g], managed[g][1], distance, threshold) for g in range(groups)]
+            stages = statan._utils._run_blocks(self._group_stage, blocks, workers)
+            for g in range(groups):
+                self._print_confusion_matrix(stages[g]['cm'], groups_names[g])
+
+        if statistical_analysis is True:
+            if len(set([np.shape(managed[g][0])[-1] for g in range(groups)])) == 1:
+                print('Computing Kruskal-Wallis and Dunn tests between features')
+                statistics = dict()
+                statistics['H'], statistics['pvalue'] = statan.compute_kruskal_wallis([m[0] for m in managed])
+                statistics['pairs'], statistics['z'], statistics['dunn'] = \
+                    statan.compute_dunn_test([m[0] for m in managed])
+                if biometric_analysis is True:
+                    print('Computing Kruskal-Wallis test between scores')
+                    for key in ['G', 'I']:
+                        H, p = statan.compute_kruskal_wallis([np.reshape(stage[key], (-1, 1)) for stage in stages])
+                        statistics['H_' + key], statistics['pvalue_' + key] = H[0], p[0]
+            else:
+                print('The features of the groups are not comparable, the statistical analysis is skipped')
+
+        if view_analysis is True:
+            if not (stages is None):
+                for g in range(groups):
+                    print("EER of the " + str(groups_names[g]) + " group: %.5f" % stages[g]['EER'])
+                    print("AUC of the " + str(groups_names[g]) + " group: %.5f" % stages[g]['AUC'])
+            if not (statistics is None):
+                print("\nKruskal-Wallis test on the features of the groups:")
+                print("Feature     H           p-value")
+                for f in range(len(statistics['H'])):
+                    print("F%-10d %-11.5f %.5f" % (f + 1, statistics['H'][f], statistics['pvalue'][f]))
+                print("\nDunn test (Bonferroni adjusted p-values):")
+                print("Feature" + "".join(["    %-12s" % (groups_names[i][:5] + "-" + groups_names[j][:5])
+                                           for i, j in statistics['pairs']]))
+                for f in range(len(statistics['H'])):
+                    print("F%-6d" % (f + 1) + "".join(["    %-12.5f" % p for p in statistics['dunn'][:, f]]))
+                if 'H_G' in statistics:
+                    print("\nKruskal-Wallis test on the genuine scores:  H = %.5f, p-value = %.5f" %
+                          (statistics['H_G'], statistics['pvalue_G']))
+                    print("Kruskal-Wallis test on the impostor scores: H = %.5f, p-value = %.5f" %
+                          (statistics['H_I'], statistics['pvalue_I']))
+
+        if not (stages is None) and (view_analysis is True or generate_pdf is True):
+            self._roc_curves_overlay([stage['FAR'] for stage in stages], [stage['CAR'] for stage in stages],
+                                     groups_names, view_analysis, generate_pdf, outPath)
+
+        if generate_pdf is True:
+            report_name = self._fullname(outPath, report_name)
+            if not (".pdf" in report_name):
+                report_name += ".pdf"
+            self._multiple_groups_report(stages, statistics, groups_names, report_name, outPath)
+        return stages, statistics
+
+
+    def _group_stage(self, biom, data, labels, distance, threshold=None):
+        """
+        The _group_stage method computes the similarity scores, the genuine and impostor scores, their descriptive
+        statistics and the biometric performance of a single group, so that the stages of different groups can be
+        executed by different processes (FOR INTERNAL USE ONLY).
+
+        :param biom:      it is the object which manages the biometric analysis
+        :param data:      it is the data matrix of the group
+        :param labels:    it is the list of labels identifying the subject of each sample
+        :param distance:  it is the distance object used to compute the scores
+        :param threshold: it is the step between two consecutive thresholds, or None to automatically evaluate the
+                          threshold values (None by default)
+
+        :return:          the dictionary containing the sorted genuine ('G') and impostor ('I') scores, the thresholds
+                          ('thr'), the rates ('FAR', 'FRR', 'CRR', 'CAR'), the 'EER', the 'AUC', the confusion matrix
+                          ('cm') and the descriptive statistics of the scores ('desc_stats')
+        """
+        stage = dict()
+        scores = biom.compute_scores(data, distance)
+        stage['G'], stage['I'], stage['thr'] = biom.genuines_and_impostors(scores, labels)
+        del scores
+        if not (threshold is None):
+            stage['thr'] = self._compute_thresholds(threshold)
+        stage['desc_stats'] = self._scores_descriptive_statistics(biom, stage['G'], stage['I'])
+        stage['FAR'], stage['FRR'], stage['CRR'], stage['CAR'], stage['EER'], stage['AUC'] = \
+            biom.compute_performance_analysis(stage['G'], stage['I'], stage['thr'])
+        stage['cm'] = biom.confusion_matrix(stage['FAR'], stage['FRR'])
+        return stage
+
+
+    def _roc_curves_overlay(self, FARs, CARs, names, view=True, save=True, outPath=None):
+        """
+        The _roc_curves_overlay method shows in the same graph and/or saves (in .png format) the Receiver Operating
+        Characteristic curves related to the system performance of more groups, in terms of False Acceptance Rate and
+        Correct Acceptance Rate (FOR INTERNAL USE ONLY).
+
+        :param FARs:    it is the list of 1D-arrays representing the False Acceptance Rate of each group for different
+                        thresholds
+        :param CARs:    it is the list of 1D-arrays representing the Correct Acceptance Rate of each group for different
+                        thresholds
+        :param names:   it is the list of names of the groups
+        :param view:    it has to be True in order to show the graph, False otherwise (True by default)
+        :param save:    it has to be True in order to save the graph as groups_roc.png (True by default)
+        :param outPath: it is the path (directory) in which the resulting image has to be saved (None by default)
+        """
+        plt.figure()
+        for FAR, CAR, name in zip(FARs, CARs, names):
+            plt.plot(FAR, CAR, label=name)
+        plt.xlabel("False Acceptance Rate")
+        plt.ylabel("Correct Acceptance Rate")
+        plt.title("Comparison between ROC curves")
+        plt.legend(loc='lower right')
+        plt.xlim([0, 1])
+        plt.ylim([0, 1])
+        if save is True:
+            plt.savefig(self._fullname(outPath, "groups_roc.png"))
+        if view is True:
+            plt.show()
+        plt.close()
+
+
+    def _multiple_groups_report(self, stages, statistics, names, pdf_name, outPath):
+        """
+        The _multiple_groups_report method is used to generate the pdf report of the analysis among more groups (FOR
+        INTERNAL USE ONLY).
+
+        :param stages:     it is the list of dictionaries containing the results of each group, or None if the
+                           biometric analysis was not computed
+        :param statistics: it is the dictionary containing the results of the Kruskal-Wallis and Dunn tests, or None if
+                           the statistical analysis was not computed
+        :param names:      it is the list of names of the groups
+        :param pdf_name:   it is the name of the resulting report pdf
+        :param outPath:    it is the path (directory) in which the resulting report has to be saved
+        """
+        print('Generating the report')
+        pdf = FPDF()
+        pdf.add_page()
+        tabh = 6
+        pdf.set_font('Arial', 'B', 24)
+        leftx = pdf.get_x()
+        pdf.multi_cell(0, 10, "Report", 0, 'C')
+        pdf.set_font('Arial', '', 12)
+        tabw = int(max([pdf.get_string_width(name) for name in names] + [pdf.get_string_width("Impostors")]) * 1.5)
+        if not (stages is None):
+            pdf.set_font('Arial', 'B', 16)
+            pdf.multi_cell(0, 6, "\n  EER and AUC results", 1)
+            pdf.set_font('Arial', '', 12)
+            header = ["EER", "AUC", "Mean G", "Mean I"]
+            values = [[stage['EER'], stage['AUC'], stage['desc_stats']['mean'][0], stage['desc_stats']['mean'][1]]
+                      for stage in stages]
+            pdf = self._report_groups_table(pdf, names, header, values, (210 - 5 * tabw) / 2, pdf.get_y(), tabw, tabh)
+            pdf.set_xy(leftx, pdf.get_y() + 5)
+            wimg = 150
+            pdf.image(self._fullname(outPath, "groups_roc.png"), (210 - wimg) / 2, None, wimg, int(wimg * 0.75))
+        if not (statistics is None):
+            pdf.add_page()
+            pdf.set_font('Arial', 'B', 16)
+            pdf.multi_cell(0, 6, "\n  Kruskal-Wallis test", 1)
+            pdf.set_font('Arial', '', 12)
+            rows = ["F" + str(f + 1) for f in range(len(statistics['H']))]
+            values = [[statistics['H'][f], statistics['pvalue'][f]] for f in range(len(statistics['H']))]
+            if 'H_G' in statistics:
+                rows += ["Genuines", "Impostors"]
+                values += [[statistics['H_G'], statistics['pvalue_G']], [statistics['H_I'], statistics['pvalue_I']]]
+            pdf = self._report_groups_table(pdf, rows, ["H", "p-value"], values, (210 - 3 * tabw) / 2, pdf.get_y(),
+                                            tabw, tabh)
+            pdf.add_page()
+            pdf.set_font('Arial', 'B', 16)
+            pdf.multi_cell(0, 6, "\n  Dunn test (Bonferroni adjusted p-values)", 1)
+            pdf.set_font('Arial', '', 8)
+            header = [names[i] + "-" + names[j] for i, j in statistics['pairs']]
+            pairw = min(int(max([pdf.get_string_width(h) for h in header]) * 1.2), int(190 / (len(header) + 1)))
+            pdf = self._report_groups_table(pdf, rows[:len(statistics['H'])], header, statistics['dunn'].T,
+                                            (210 - (len(header) + 1) * pairw) / 2, pdf.get_y(), pairw, tabh)
+        print('Report saved as ' + pdf_name)
+        pdf.output(pdf_name, 'F')
+
+
+    def _report_groups_table(self, pdf, rows, header, values, xstart, y, tabw, tabh):
+        """
+        The _report_groups_table method generates a table having a named row for each group (or feature) and a column
+        for each reported value (FOR INTERNAL USE ONLY).
+
+        :param pdf:    it is the handle to the report file
+        :param rows:   it is the list of names of the rows
+        :param header: it is the list of names of the columns
+        :param values: it is the 2D (rows*columns) matrix of values
+        :param xstart: it is the space between left margin and the beginning of the table
+        :param y:      it is the current distance from the top margin
+        :param tabw:   it is the width of each cell of the table
+        :param tabh:   it is the height of each cell of the table
+
+        :return:       the handle of the modified report
+        """
+        for c, title in enumerate(header):
+            pdf.set_xy(xstart + (c + 1) * tabw, y + 5)
+            pdf.multi_cell(tabw, tabh, title, border=1, align='C', fill=0)
+        for i, name in enumerate(rows):
+            y = pdf.get_y()
+            pdf.set_xy(xstart, y)
+            pdf.multi_cell(tabw, tabh, name, border=1, align='L', fill=0)
+            for c in range(len(header)):
+                pdf.set_xy(xstart + (c + 1) * tabw, y)
+                pdf.multi_cell(tabw, tabh, str(round(float(values[i][c]), 5)), border=1, align='L', fill=0)
+            if (i + 1) % 35 == 0 and i > 0:
+                pdf.add_page()
+        return pdf
+
+
+    def _union_scores(self, biom, first_data, second_data, distance):
+        """
+        The _union_scores method computes the score matrix on the union of two groups, the samples of the first group
+        followed by the ones of the second group (FOR INTERNAL USE ONLY).
+
+        :param biom:        it is the object which manages the biometric analysis
+        :param first_data:  it is the first data matrix
+        :param second_data: it is the second data matrix
+        :param distance:    it is the distance object used to compute the scores
+
+        :return:            the 2D (samples*samples) score matrix of the union of the groups
+        """
+        print('Computing the scores on the union of the groups')
+        return biom.compute_scores(np.vstack((biom._samples_matrix(first_data), biom._samples_matrix(second_data))),
+                                   distance)
+
+
+    def _cross_group_performance(self, biom, first_G, second_G, first_I, second_I, cross_I, threshold=None):
+        """
+        The _cross_group_performance method computes the descriptive statistics of the cross-group impostor scores, and
+        the EER and the AUC of the whole population, obtained by joining the genuine scores of both the groups and the
+        within-group and cross-group impostor scores (FOR INTERNAL USE ONLY).
+
+        :param biom:      it is the object which manages the biometric analysis
+        :param first_G:   it is the array representing the genuine scores of the first group
+        :param second_G:  it is the array representing the genuine scores of the second group
+        :param first_I:   it is the array representing the impostor scores of the first group
+        :param second_I:  it is the array representing the impostor scores of the second group
+        :param cross_I:   it is the array representing the impostor scores between the two groups
+        :param threshold: it is the step between two consecutive thresholds, or None to use a 0.01 step (None by
+                          default)
+
+        :return:          a dictionary containing the mean, the median and the standard deviation of the cross-group
+                          impostor scores, and the EER and the AUC of the whole population
+        """
+        results = dict()
+        results['mean'], results['median'], results['std'] = biom.scores_statistics(cross_I)
+        if threshold is None:
+            threshold = 0.01
+        print('Computing biometric performance on the whole population')
+        G = np.vstack((np.reshape(first_G, (-1, 1)), np.reshape(second_G, (-1, 1))))
+        I = np.vstack((np.reshape(first_I, (-1, 1)), np.reshape(second_I, (-1, 1)), cross_I))
+        FAR, FRR, CRR, CAR, results['EER'], results['AUC'] = \
+            biom.compute_performance_analysis(G, I, self._compute_thresholds(threshold))
+        return results
+
+
+    def _compatible_features(self, first_data, second_data):
+        """
+        The _compatible_features method checks if the features of two data matrices can be compared in the same space,
+        i.e. if they have the same number of features (the selection models being fitted once for both the groups)
+        (FOR INTERNAL USE ONLY).
+
+        :param first_data:  it is the first data matrix
+        :param second_data: it is the second data matrix
+
+        :return:            True if the features are compatible, False otherwise
+        """
+        return np.shape(first_data)[-1] == np.shape(second_data)[-1]
+
+
+    def reliability_analysis(self, statan, data, labels=None, confidence_intervals=True, bootstrap_repetitions=1000,
+                             alpha=0.05, seed=None, workers=1, view_analysis=False, generate_pdf=False, name="first",
+                             report_name="report.pdf", outPath=None):
+        """
+        The reliability_analysis method computes the test-retest reliability of each feature, through the intraclass
+        correlation coefficients ICC(2,1), ICC(3,1) and ICC(1,k) and their bootstrap confidence intervals, eventually
+        reporting the features sorted by decreasing ICC(2,1) on a pdf file.
+
+        :param statan:                it is the object which manages the statistical analysis
+        :param data:                  it is the 3D (subjects*repetitions*features) data matrix, or the 2D
+                                      (samples*features) data matrix having the same number of samples for each subject
+        :param labels:                it is the list of labels identifying the subject of each sample (used in the 2D
+                                      case, None by default)
+        :param confidence_intervals:  it has to be True in order to compute the bootstrap confidence intervals, False
+                                      otherwise (True by default)
+        :param bootstrap_repetitions: it is the number of bootstrap resamplings (1000 by default)
+        :param alpha:                 it is the significance level of the confidence intervals (0.05 by default)
+        :param seed:                  it is the seed used in the bootstrap resamplings (None by default)
+        :param workers:               it is the number of processes among which the resamplings are distributed (1 by
+                                      default)
+        :param view_analysis:         it has to be True in order to print the results of the analysis, False otherwise
+                                      (False by default)
+        :param generate_pdf:          it has to be True in order to create the pdf of the analysis report, False
+                                      otherwise (False by default)
+        :param name:                  it is the name of the analyzed group ("first" by default)
+        :param report_name:           it is the name of the eventually generated pdf ("report.pdf" by default)
+        :param outPath:               it is the directory in which export the report (None by default)
+
+        :return:                      the dictionary of the intraclass correlation coefficients and the dictionary of
+                                      the related confidence intervals (None if they are not computed)
+        """
+        print('Computing intraclass correlation coefficients')
+        icc = statan.compute_icc(data, labels)
+        intervals = None
+        if confidence_intervals is True:
+            intervals = statan.compute_icc_intervals(data, labels, bootstrap_repetitions, alpha, seed, workers)
+        order = np.argsort(-np.nan_to_num(icc['ICC(2,1)'], nan=-np.inf), kind='stable')
+
+        if view_analysis is True:
+            print("\nIntraclass correlation coefficients of the " + str(name) + " group (sorted by ICC(2,1)):\n")
+            print("Feature     ICC(2,1)    ICC(3,1)    ICC(1,k)", end="")
+            print("    CI ICC(2,1)" if not(intervals is None) else "")
+            for f in order:
+                print("F%-10d %8.5f    %8.5f    %8.5f" % (f + 1, icc['ICC(2,1)'][f], icc['ICC(3,1)'][f],
+                                                         icc['ICC(1,k)'][f]), end="")
+                if not(intervals is None):
+                    print("    [%.5f, %.5f]" % (intervals['ICC(2,1)'][0, f], intervals['ICC(2,1)'][1, f]))
+                else:
+                    print("")
+
+        if generate_pdf is True:
+            report_name = self._fullname(outPath, report_name)
+            if not (".pdf" in report_name):
+                report_name += ".pdf"
+            print('Generating the report')
+            pdf = FPDF()
+            pdf.add_page()
+            pdf.set_font('Arial', 'B', 24)
+            pdf.multi_cell(0, 10, "Report", 0, 'C')
+            pdf.set_font('Arial', 'B', 16)
+            pdf.multi_cell(0, 6, "\n  Test-retest reliability of the " + str(name) + " group\n", 1)
+            pdf.set_font('Arial', '', 12)
+            tabw = int(pdf.get_string_width("[0.00000, 0.00000]") * 1.2)
+            pdf = self._report_reliability(pdf, icc, intervals, order, (210 - 4 * tabw) / 2, pdf.get_y(), tabw, 6)
+            print('Report saved as ' + report_name)
+            pdf.output(report_name, 'F')
+        return icc, intervals
 
 
     def _statistical_strings(self, statistical_analysis, first_name, second_name, pvalue, d):
@@ -995,7 +1700,8 @@ class report():
         return statistical_results, features_row, statistical_results_p, statistical_results2, statistical_results_d
 
 
-    def _permutation_strings(self, permutation_test, first_name, second_name, p_perm):
+    def _permutation_strings(self, permutation_test, first_name, second_name, p_perm, p_adjusted=None,
+                             correction=None):
         """
         The _permutation_strings method is used for generating the strings related to the permutation test results
         between features (FOR INTERNAL USE ONLY).
@@ -1005,6 +1711,10 @@ class report():
         :param second_name:      the name of the second group of data
         :param p_perm:           it is the 2D matrix representing the p-value for each repetition (rows) and each
                                  feature (column)
+        :param p_adjusted:       it is the 2D matrix representing the p-value adjusted for the multiple comparisons
+                                 for each repetition (rows) and each feature (column), None if no correction was
+                                 applied (None by default)
+        :param correction:       it is the applied correction, between 'max_t' and 'fdr' (None by default)
 
         :return:                 the strings related to the permutation test results
         """
@@ -1029,6 +1739,15 @@ class report():
                 for f in range(features):
                     permutation_results_p += "    %.5f" % p_perm[r, f]
                 permutation_results_p += "\n"
+            if not (p_adjusted is None):
+                names = {'max_t': "max-T family-wise adjusted P-value", 'fdr': "permutation FDR Q-value"}
+                permutation_results_p += "\n  - " + names[correction] + ":\n\n" + features_row + "\n"
+                for r in range(0, repetitions):
+                    permutation_results_p += "R"
+                    permutation_results_p += str(r + 1)
+                    for f in range(features):
+                        permutation_results_p += "    %.5f" % p_adjusted[r, f]
+                    permutation_results_p += "\n"
 
         return permutation_results, features_row, permutation_results_p
 
@@ -1037,17 +1756,28 @@ class report():
         """
         The _scores_secriptive_statistics method provides a dictionary containing all the descriptive statistics related
         the distributions of similarity scores, as 2-element lists containing the value related to the genuine scores as
-        first element and the value related to the impostor scores as second element (FOR INTERNAL USE ONLY).
+        first element and the value related to the impostor scores as second element; the analyses of the report pass
+        the score vectors, whereas the score_accumulators are provided only by a direct call to the
+        compute_scores_accumulators method of the biometric_performance (FOR INTERNAL USE ONLY).
 
         :param biom:            is the biometric_performance object
-        :param genuine_scores:  is the 1D-array representing the genuine scores distribution
-        :param impostor_scores: is the 1D-array representing the impostor scores distribution
+        :param genuine_scores:  is the 1D-array representing the genuine scores distribution, sorted in ascending order
+                                (or its score_accumulator)
+        :param impostor_scores: is the 1D-array representing the impostor scores distribution, sorted in ascending order
+                                (or its score_accumulator)
 
         :return:                a disctionary containing the descriptive statistics
         """
         stats = dict()
-        G_mean, G_median, G_std = biom.scores_statistics(genuine_scores)
-        I_mean, I_median, I_std = biom.scores_statistics(impostor_scores)
+        if isinstance(genuine_scores, score_accumulator):
+            G_mean, G_median, G_std = genuine_scores.mean(), genuine_scores.median(), genuine_scores.std()
+            I_mean, I_median, I_std = impostor_scores.mean(), impostor_scores.median(), impostor_scores.std()
+            stats['mean'] = [G_mean, I_mean]
+            stats['median'] = [G_median, I_median]
+            stats['std'] = [G_std, I_std]
+            return stats
+        G_mean, G_median, G_std = biom.scores_statistics(genuine_scores, is_sorted=True)
+        I_mean, I_median, I_std = biom.scores_statistics(impostor_scores, is_sorted=True)
         stats['mean'] = [G_mean, I_mean]
         stats['median'] = [G_median, I_median]
         stats['std'] = [G_std, I_std]
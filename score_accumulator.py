@@ -0,0 +1,178 @@
+import numpy as np
+
+
+class score_accumulator():
+    """
+    The score_accumulator class allows to compute the descriptive statistics of a score distribution in streaming, by
+    feeding it block by block (for example while the scores are computed), in a constant amount of memory. The moments
+    are updated through the Welford/Chan formulas, whereas the quantiles are estimated through a t-digest sketch (a set
+    of centroids, smaller at the tails of the distribution). Accumulators fed by different processes can be merged.
+    The accumulators are built by the compute_scores_accumulators method of the biometric_performance, which is not
+    called by the analyses of the report (they need the whole score vectors for the rates and the ROC curve).
+
+    Attributes:
+        count:       is the number of accumulated scores
+        minimum:     is the minimum accumulated score
+        maximum:     is the maximum accumulated score
+        compression: is the compression parameter of the t-digest (the maximum number of centroids is about its half)
+
+    Methods:
+        update:              accumulates a block of scores
+        merge:               accumulates the scores of another accumulator
+        mean:                returns the mean of the accumulated scores
+        std:                 returns the standard deviation of the accumulated scores
+        quantile:            returns the estimate of one or more quantiles of the accumulated scores
+        median:              returns the estimate of the median of the accumulated scores
+        boxplot_statistics:  returns the statistics needed to draw the boxplot of the accumulated scores
+    """
+
+
+    def __init__(self, compression=200):
+        """
+        The __init__ method is the initializer, which sets the value for the attibutes.
+
+        :param compression: it is the compression parameter of the t-digest, the higher the more accurate the quantiles
+                            (200 by default)
+        """
+        self.count = 0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.compression = compression
+        self._mean = 0.
+        self._M2 = 0.
+        self._centroids = np.zeros(shape=(0,))
+        self._weights = np.zeros(shape=(0,))
+
+
+    def update(self, scores):
+        """
+        The update method accumulates a block of scores.
+
+        :param scores: it is the array of scores
+
+        :return:       the accumulator itself
+        """
+        scores = np.ravel(scores)
+        if len(scores) == 0:
+            return self
+        block_mean = np.mean(scores)
+        self._combine(len(scores), block_mean, np.dot(scores - block_mean, scores - block_mean), np.min(scores),
+                      np.max(scores), scores, np.ones(shape=(len(scores),)))
+        return self
+
+
+    def merge(self, other):
+        """
+        The merge method accumulates the scores of another accumulator (for example fed by another process).
+
+        :param other: it is the other score_accumulator
+
+        :return:      the accumulator itself
+        """
+        if other.count > 0:
+            self._combine(other.count, other._mean, other._M2, other.minimum, other.maximum, other._centroids,
+                          other._weights)
+        return self
+
+
+    def mean(self):
+        """
+        The mean method returns the mean of the accumulated scores.
+
+        :return: the mean
+        """
+        return self._mean
+
+
+    def std(self):
+        """
+        The std method returns the (population) standard deviation of the accumulated scores.
+
+        :return: the standard deviation
+        """
+        return np.sqrt(self._M2 / self.count)
+
+
+    def quantile(self, q):
+        """
+        The quantile method returns the estimate of one or more quantiles of the accumulated scores, through the linear
+        interpolation between the centroids of the t-digest.
+
+        :param q: it is the quantile (or the array of quantiles) between 0 and 1
+
+        :return:  the estimated quantile (or array of quantiles)
+        """
+        positions = np.concatenate(([0.], np.cumsum(self._weights) - self._weights / 2., [self.count]))
+        values = np.concatenate(([self.minimum], self._centroids, [self.maximum]))
+        return np.interp(np.asarray(q) * self.count, positions, values)
+
+
+    def median(self):
+        """
+        The median method returns the estimate of the median of the accumulated scores.
+
+        :return: the estimated median
+        """
+        return float(self.quantile(0.5))
+
+
+    def boxplot_statistics(self, label=None, whiskers=1.5):
+        """
+        The boxplot_statistics method returns the statistics needed to draw the boxplot of the accumulated scores
+        through the matplotlib bxp function. The whiskers are clipped to the minimum and the maximum scores, and the
+        outliers are not reported, since the single scores are not stored.
+
+        :param label:    it is the label of the boxplot (None by default)
+        :param whiskers: it is the length of the whiskers, as a multiple of the interquartile range (1.5 by default)
+
+        :return:         the dictionary of statistics
+        """
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        return {'label': label, 'mean': self._mean, 'med': median, 'q1': q1, 'q3': q3,
+                'whislo': max(self.minimum, q1 - whiskers * (q3 - q1)),
+                'whishi': min(self.maximum, q3 + whiskers * (q3 - q1)), 'fliers': []}
+
+
+    def _combine(self, count, mean, M2, minimum, maximum, centroids, weights):
+        """
+        The _combine method accumulates a set of scores described by their moments and their centroids, through the
+        Chan formulas for the moments and the merging of the t-digest centroids (FOR INTERNAL USE ONLY).
+
+        :param count:     it is the number of scores
+        :param mean:      it is the mean of the scores
+        :param M2:        it is the sum of the squared differences between the scores and their mean
+        :param minimum:   it is the minimum score
+        :param maximum:   it is the maximum score
+        :param centroids: it is the array of centroids (or the scores themselves)
+        :param weights:   it is the array of weights of each centroid
+        """
+        total = self.count + count
+        delta = mean - self._mean
+        self._M2 += M2 + delta ** 2 * self.count * count / total
+        self._mean += delta * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+        self._compress(np.concatenate((self._centroids, centroids)), np.concatenate((self._weights, weights)))
+
+
+    def _compress(self, centroids, weights):
+        """
+        The _compress method merges the centroids of the t-digest: the centroids are sorted, and the ones falling in the
+        same unit interval of the k1 scale function (k = compression / (2 * pi) * asin(2 * q - 1)) of their central
+        quantile q are merged, so that the centroids are small at the tails of the distribution (FOR INTERNAL USE
+        ONLY).
+
+        :param centroids: it is the array of centroids
+        :param weights:   it is the array of weights of each centroid
+        """
+        order = np.argsort(centroids, kind='stable')
+        centroids = centroids[order]
+        weights = weights[order]
+        quantiles = (np.cumsum(weights) - weights / 2.) / np.sum(weights)
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * quantiles - 1)
+        cluster = np.floor(k - np.min(k)).astype(np.int64)
+        cluster = np.unique(cluster, return_inverse=True)[1]
+        merged_weights = np.bincount(cluster, weights=weights)
+        self._centroids = np.bincount(cluster, weights=centroids * weights) / merged_weights
+        self._weights = merged_weights
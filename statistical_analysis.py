@@ -1,8 +1,7 @@
 import numpy as np
 from data_manager import *
-from scipy.stats import ranksums, ks_2samp
+from scipy.stats import ks_2samp, rankdata, norm, kstwo, chi2
 from utils import *
-import copy
 
 class statistical_analysis():
     """
@@ -14,6 +13,20 @@ class statistical_analysis():
                                      two raw datasets
         compute_scores_statistics:   computes the Ranksum p-values and the Cohen's d values related to the comparison of
                                      two similarity score distributions
+        scores_histogram:            computes the fine-bin histogram of an array of scores, mergeable among blocks
+        compute_ks_histograms:       computes the two-sample Kolmogorov-Smirnov test from two score histograms, with
+                                     the bound of the error on the statistic
+        compute_paired_statistics:   computes the Wilcoxon signed-rank p-values and the Cohen's d values related to the
+                                     comparison of the same subjects under two conditions
+        compute_kruskal_wallis:      computes the Kruskal-Wallis test among more groups on each feature
+        compute_dunn_test:           computes the Dunn post-hoc test between each pair of groups on each feature
+        compute_icc:                 computes the intraclass correlation coefficients of each feature, as test-retest
+                                     reliability between the repetitions of the subjects
+        compute_icc_intervals:       computes the bootstrap confidence intervals of the intraclass correlation
+                                     coefficients of each feature
+        compute_permanova:           computes the permutational multivariate analysis of variance on a distance matrix
+        compute_mantel_test:         computes the Mantel test between two score (or distance) matrices related to the
+                                     same samples
         compute_permutation_test:    TO ADD
     """
 
@@ -24,68 +37,322 @@ class statistical_analysis():
         """
         self._data_manager = data_manager()
         self._utils = utils()
+        self._exact_ks = 10000
 
 
     def compute_cohen_d(self, first_data, second_data):
         """
         The compute_cohen_d method computes the effect size between two array as the difference between two means
-        divided by the pooled standard deviation (Cohen's d).
+        divided by the pooled standard deviation (Cohen's d). In case of 2D matrices, it is computed on each column.
 
-        :param first_data:  it is the first 1D-array
-        :param second_fata: it is the second 1D-array
+        :param first_data:  it is the first 1D-array (or 2D (samples*features) matrix)
+        :param second_fata: it is the second 1D-array (or 2D (samples*features) matrix)
 
-        :return:            the Cohen's d value
+        :return:            the Cohen's d value (or the array of Cohen's d values of each column)
         """
         first_N = np.shape(first_data)[0]
         second_N = np.shape(second_data)[0]
-        first_var = np.var(first_data, ddof=1)
-        second_var = np.var(second_data, ddof=1)
-        first_mean = np.mean(first_data)
-        second_mean = np.mean(second_data)
+        first_var = np.var(first_data, ddof=1, axis=0)
+        second_var = np.var(second_data, ddof=1, axis=0)
+        first_mean = np.mean(first_data, axis=0)
+        second_mean = np.mean(second_data, axis=0)
         pooled_std = np.sqrt(((first_N - 1) * first_var + (second_N - 1) * second_var) / (
                     first_N + second_N - 2 + np.finfo(float).eps)) + np.finfo(float).eps
-        return abs((first_mean - second_mean) / pooled_std)
+        return np.abs((first_mean - second_mean) / pooled_std)
 
 
-    def compute_features_statistics(self, first_data, second_data, first_labels=None, second_labels=None):
+    def compute_features_statistics(self, first_data, second_data, first_labels=None, second_labels=None, fdr=False):
         """
         The compute_features_statistics method computes the Wilcoxon p-value and the Cohen's d effect size on the
-        features between two data matrices.
+        features between two data matrices, on all the features at once.
 
         :param first_data:    it is the first (subjects*repetitions*features) matrix
         :param second_data:   it is the second (subjects*repetitions*features) matrix
         :param first_labels:  it is the list of labels identifying each subject in the first dataset (None by default)
         :param second_labels: it is the list of labels identifying each subject in the second dataset (None by default)
+        :param fdr:           it has to be True in order to also return the p-values adjusted through the
+                              Benjamini-Hochberg false discovery rate procedure, False otherwise (False by default)
 
-        :return:              the (repetitions*features) pvalue and Cohen's d matrices, in order
+        :return:              the (repetitions*features) pvalue and Cohen's d matrices, in order, followed by the
+                              adjusted p-values if required
         """
         [first, second, features] = self.statistics_settings(first_data, second_data, first_labels, second_labels)
-        repetitions = 1
-        pvalue = np.zeros(shape=(features,))
-        d = np.zeros(shape=(features, ))
-        for f in range(features):
-            [stat, p] = ranksums(np.squeeze(first[0:, f]), np.squeeze(second[0:, f]))
-            pvalue[f] = p
-            d[f] = self.compute_cohen_d(np.squeeze(first[0:, f]), np.squeeze(second[0:, f]))
+        pvalue = self._ranksums(first, second)
+        d = self.compute_cohen_d(first, second)
+        if fdr is True:
+            return pvalue, d, self._benjamini_hochberg(pvalue)
         return pvalue, d
 
 
-    def compute_scores_statistics(self, first_data, second_data):
+    def _ranksums(self, first, second):
+        """
+        The _ranksums method computes the Wilcoxon rank-sum test on each column of two data matrices at once, through
+        the normal approximation of the sum of the ranks of the first matrix with the correction for ties (FOR INTERNAL
+        USE ONLY).
+
+        :param first:  it is the first 2D (samples*features) data matrix
+        :param second: it is the second 2D (samples*features) data matrix
+
+        :return:       the array of two-sided p-values of each feature
+        """
+        first_N = np.shape(first)[0]
+        second_N = np.shape(second)[0]
+        total = first_N + second_N
+        rank_sums, ties = self._groups_rank_sums([first, second])
+        variance = first_N * second_N / 12. * ((total + 1) - ties / (total * (total - 1)))
+        z = (rank_sums[0] - first_N * (total + 1) / 2.) / np.sqrt(variance + np.finfo(float).eps)
+        return 2 * norm.sf(np.abs(z))
+
+
+    def _groups_rank_sums(self, groups):
+        """
+        The _groups_rank_sums method ranks the samples of all the groups together, on each feature at once (through a
+        single sort of each feature, assigning the average rank to the tied values), and sums the ranks of each group
+        (FOR INTERNAL USE ONLY).
+
+        :param groups: it is the list of 2D (samples*features) data matrices of each group
+
+        :return:       the 2D (groups*features) matrix of the sums of the ranks of each group, and the array containing
+                       the tie term (the sum of t^3 - t over the groups of t tied values) of each feature
+        """
+        sizes = [np.shape(group)[0] for group in groups]
+        membership = np.repeat(np.arange(len(groups)), sizes)
+        combined = np.concatenate([np.reshape(group, (size, -1)) for group, size in zip(groups, sizes)], axis=0)
+        ranks, ties = self._average_ranks(np.ascontiguousarray(combined.T))
+        rank_sums = np.array([np.sum(ranks[:, membership == g], axis=1) for g in range(len(groups))])
+        return rank_sums, ties
+
+
+    def _average_ranks(self, combined):
+        """
+        The _average_ranks method ranks the values of each row of a matrix at once, through a single sort of each row,
+        assigning the average rank to the tied values (FOR INTERNAL USE ONLY).
+
+        :param combined: it is the 2D (features*samples) data matrix
+
+        :return:         the 2D (features*samples) matrix of the ranks of each value, and the array containing the tie
+                         term (the sum of t^3 - t over the groups of t tied values) of each row
+        """
+        total = np.shape(combined)[1]
+        order = np.argsort(combined, axis=1, kind='stable')
+        ordered = np.take_along_axis(combined, order, axis=1)
+        positions = np.broadcast_to(np.arange(total), np.shape(combined))
+        new_value = np.ones(shape=np.shape(combined), dtype=bool)
+        new_value[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+        start = np.maximum.accumulate(np.where(new_value, positions, 0), axis=1)
+        last_value = np.ones(shape=np.shape(combined), dtype=bool)
+        last_value[:, :-1] = new_value[:, 1:]
+        end = np.minimum.accumulate(np.where(last_value, positions, total)[:, ::-1], axis=1)[:, ::-1]
+        ties = np.sum((end - start + 1) ** 2, axis=1) - total
+        ranks = np.empty(shape=np.shape(combined))
+        np.put_along_axis(ranks, order, (start + end) / 2. + 1, axis=1)
+        return ranks, ties
+
+
+    def compute_paired_statistics(self, first_data, second_data, first_labels=None, second_labels=None, fdr=False):
+        """
+        The compute_paired_statistics method compares the same subjects under two conditions, on all the features at
+        once: the subjects are matched through their labels (the subjects appearing in only one condition are
+        discarded) and their repetitions are averaged, then the Wilcoxon signed-rank test and the Cohen's d effect size
+        of the paired differences (dz) are computed.
+
+        :param first_data:    it is the first 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param second_data:   it is the second 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param first_labels:  it is the list of labels identifying the subject of each sample of the first data matrix
+                              (required in the 2D case, None by default)
+        :param second_labels: it is the list of labels identifying the subject of each sample of the second data matrix
+                              (required in the 2D case, None by default)
+        :param fdr:           it has to be True in order to also return the p-values adjusted through the
+                              Benjamini-Hochberg false discovery rate procedure, False otherwise (False by default)
+
+        :return:              the arrays of p-values and of Cohen's d values of each feature, in order, followed by the
+                              adjusted p-values if required
+        """
+        first, second, subjects = self._utils._paired_means(first_data, second_data, first_labels, second_labels)
+        differences = first - second
+        pvalue = self._signed_rank(differences)
+        d = np.abs(np.mean(differences, axis=0) / (np.std(differences, ddof=1, axis=0) + np.finfo(float).eps))
+        if fdr is True:
+            return pvalue, d, self._benjamini_hochberg(pvalue)
+        return pvalue, d
+
+
+    def _signed_rank(self, differences):
+        """
+        The _signed_rank method computes the Wilcoxon signed-rank test on each column of a matrix of paired differences
+        at once, through the normal approximation of the sum of the ranks of the positive differences with the
+        correction for ties, the null differences being discarded (FOR INTERNAL USE ONLY).
+
+        :param differences: it is the 2D (subjects*features) matrix of paired differences
+
+        :return:            the array of two-sided p-values of each feature
+        """
+        absolute = np.ascontiguousarray(np.abs(differences).T)
+        ranks, ties = self._average_ranks(absolute)
+        zeros = np.sum(absolute == 0, axis=1)
+        ties = ties - (zeros ** 3 - zeros)
+        N = np.shape(absolute)[1] - zeros
+        positive = np.sum((ranks - zeros[:, np.newaxis]) * (differences.T > 0), axis=1)
+        variance = N * (N + 1) * (2 * N + 1) / 24. - ties / 48.
+        z = (positive - N * (N + 1) / 4.) / np.sqrt(variance + np.finfo(float).eps)
+        return np.where(N > 0, 2 * norm.sf(np.abs(z)), 1.)
+
+
+    def compute_kruskal_wallis(self, groups):
+        """
+        The compute_kruskal_wallis method computes the Kruskal-Wallis H test among more groups on each feature at once,
+        with the correction for ties.
+
+        :param groups: it is the list of 2D (samples*features) data matrices of each group
+
+        :return:       the array of H statistics and the array of p-values of each feature
+        """
+        sizes = np.array([np.shape(group)[0] for group in groups])
+        total = np.sum(sizes)
+        rank_sums, ties = self._groups_rank_sums(groups)
+        H = 12. / (total * (total + 1)) * np.sum(rank_sums ** 2 / sizes[:, np.newaxis], axis=0) - 3 * (total + 1)
+        correction = 1 - ties / (total ** 3 - total)
+        H = np.where(correction > 0, H / np.where(correction > 0, correction, 1), 0.)
+        return H, chi2.sf(H, len(groups) - 1)
+
+
+    def compute_dunn_test(self, groups):
+        """
+        The compute_dunn_test method computes the Dunn post-hoc test between each pair of groups on each feature at
+        once, comparing the mean ranks of the groups (with the correction for ties), and adjusts the p-values through
+        the Bonferroni correction over the pairs.
+
+        :param groups: it is the list of 2D (samples*features) data matrices of each group
+
+        :return:       the list of (first group, second group) index pairs, and the 2D (pairs*features) matrices of the
+                       z statistics and of the adjusted p-values
+        """
+        sizes = np.array([np.shape(group)[0] for group in groups])
+        total = np.sum(sizes)
+        rank_sums, ties = self._groups_rank_sums(groups)
+        mean_ranks = rank_sums / sizes[:, np.newaxis]
+        variance = total * (total + 1) / 12. - ties / (12. * (total - 1))
+        pairs = [(i, j) for i in range(len(groups)) for j in range(i + 1, len(groups))]
+        first = np.array([pair[0] for pair in pairs], dtype=int)
+        second = np.array([pair[1] for pair in pairs], dtype=int)
+        z = (mean_ranks[first] - mean_ranks[second]) / np.sqrt(
+            variance[np.newaxis, :] * (1. / sizes[first] + 1. / sizes[second])[:, np.newaxis] + np.finfo(float).eps)
+        return pairs, z, np.minimum(1., 2 * norm.sf(np.abs(z)) * len(pairs))
+
+
+    def _benjamini_hochberg(self, pvalue):
+        """
+        The _benjamini_hochberg method adjusts the p-values through the Benjamini-Hochberg false discovery rate
+        procedure (FOR INTERNAL USE ONLY).
+
+        :param pvalue: it is the array of p-values
+
+        :return:       the array of adjusted p-values
+        """
+        pvalue = np.asarray(pvalue, dtype=float)
+        order = np.argsort(pvalue)
+        tests = len(pvalue)
+        adjusted = pvalue[order] * tests / np.arange(1, tests + 1)
+        adjusted = np.minimum(1., np.minimum.accumulate(adjusted[::-1])[::-1])
+        result = np.zeros(shape=(tests,))
+        result[order] = adjusted
+        return result
+
+
+    def compute_scores_statistics(self, first_data, second_data, is_sorted=False):
         """
         The compute_scores_statistics method computes the p-value through the two-sample Kolmogorov-Smirnov test and the
-        Cohen's d effect size on the features between two arrays.
+        Cohen's d effect size on the features between two arrays. The Kolmogorov-Smirnov statistic is computed from the
+        sorted arrays (reusing the sorting if they already are sorted), and the p-value is the exact one for arrays up
+        to 10000 elements and the asymptotic one otherwise.
 
         :param first_data:  it is the first 1D-array of scores
         :param second_data: it is the second 1D-array of scores
+        :param is_sorted:   it has to be True if both the arrays are sorted in ascending order, False otherwise (False
+                            by default)
 
         :return:            the pvalue and Cohen's d value, in order
         """
-        first, second, first_features = self.statistics_settings(first_data, second_data)
-        [stat, pvalue] = ks_2samp(np.squeeze(first), np.squeeze(second))
-        d = self.compute_cohen_d(np.squeeze(first), np.squeeze(second))
+        first = np.ravel(first_data)
+        second = np.ravel(second_data)
+        if max(len(first), len(second)) <= self._exact_ks:
+            [stat, pvalue] = ks_2samp(first, second)
+        else:
+            if is_sorted is False:
+                first = np.sort(first)
+                second = np.sort(second)
+            pvalue = self._ks_pvalue(self._sorted_ks(first, second), len(first), len(second))
+        d = self.compute_cohen_d(first, second)
         return pvalue, d
 
 
+    def _sorted_ks(self, first, second):
+        """
+        The _sorted_ks method computes the two-sample Kolmogorov-Smirnov statistic (the maximum distance between the
+        empirical cumulative distributions) from two sorted arrays: both the distributions are evaluated at the distinct
+        values of the union through a binary search, so that the tied values are counted at once (FOR INTERNAL USE
+        ONLY).
+
+        :param first:  it is the first sorted 1D-array
+        :param second: it is the second sorted 1D-array
+
+        :return:       the Kolmogorov-Smirnov statistic
+        """
+        values = np.unique(np.concatenate((first, second)))
+        first_cdf = np.searchsorted(first, values, side='right') / len(first)
+        second_cdf = np.searchsorted(second, values, side='right') / len(second)
+        return np.max(np.abs(first_cdf - second_cdf))
+
+
+    def _ks_pvalue(self, D, first_N, second_N):
+        """
+        The _ks_pvalue method computes the asymptotic two-sided p-value of the two-sample Kolmogorov-Smirnov statistic
+        (FOR INTERNAL USE ONLY).
+
+        :param D:        it is the Kolmogorov-Smirnov statistic
+        :param first_N:  it is the number of elements of the first sample
+        :param second_N: it is the number of elements of the second sample
+
+        :return:         the p-value
+        """
+        return float(np.clip(kstwo.sf(D, np.round(first_N * second_N / (first_N + second_N))), 0, 1))
+
+
+    def scores_histogram(self, scores, bins=2**16):
+        """
+        The scores_histogram method computes the histogram of an array of scores (in the [0, 1] range) on equally spaced
+        bins, without sorting it: the histograms of different blocks of scores (for example computed by different
+        processes) can be merged by summing them.
+
+        :param scores: it is the 1D-array of scores
+        :param bins:   it is the number of bins (2**16 by default)
+
+        :return:       the 1D-array of counts of each bin
+        """
+        indexes = np.clip((np.ravel(scores) * bins).astype(np.int64), 0, bins - 1)
+        return np.bincount(indexes, minlength=bins)
+
+
+    def compute_ks_histograms(self, first_counts, second_counts):
+        """
+        The compute_ks_histograms method computes the two-sample Kolmogorov-Smirnov test from the histograms of two
+        score distributions computed on the same bins. The statistic is computed on the bin edges, so it can
+        underestimate the exact one by at most the largest fraction of scores of a group falling in a single bin,
+        which is returned as error bound.
+
+        :param first_counts:  it is the 1D-array of counts of each bin of the first distribution
+        :param second_counts: it is the 1D-array of counts of each bin of the second distribution
+
+        :return:              the Kolmogorov-Smirnov statistic, its error bound (the exact statistic being between
+                              the returned one and the returned one plus the bound) and the p-value
+        """
+        first_N = np.sum(first_counts)
+        second_N = np.sum(second_counts)
+        D = np.max(np.abs(np.cumsum(first_counts) / first_N - np.cumsum(second_counts) / second_N))
+        error = max(np.max(first_counts) / first_N, np.max(second_counts) / second_N)
+        return D, error, self._ks_pvalue(D, first_N, second_N)
+
+
     def statistics_settings(self, first_data, second_data, first_labels=False, second_labels=False):
         """
         The statistics_settings method set the data which has to be used for some statistical analysis.
@@ -97,8 +364,8 @@ class statistical_analysis():
 
         :return:            the two 2D data matrices, and the number of features
         """
-        first = np.array(copy.deepcopy(first_data))
-        second = np.array(copy.deepcopy(second_data))
+        first = np.asarray(first_data)
+        second = np.asarray(second_data)
         if first_labels is False or second_labels is False:
             aux_first = first
             aux_second = second
@@ -109,10 +376,288 @@ class statistical_analysis():
             first, second = self._utils._same_format_3D(first, second, first_labels, second_labels)
             nSamples_first = first_repetitions*first_subjects
             nSamples_second = second_repetitions*second_subjects
-            aux_first = np.zeros(shape=(nSamples_first, first_features))
-            aux_second = np.zeros(shape=(nSamples_second, first_features))
-            for f in range(first_features):
-                aux_first[:, f] = np.reshape(np.squeeze(first[0:, 0:, f]), (nSamples_first,))
-                aux_second[:, f] = np.reshape(np.squeeze(second[0:, 0:, f]), (nSamples_second,))
+            aux_first = np.reshape(first, (nSamples_first, -1))[:, :first_features]
+            aux_second = np.reshape(second, (nSamples_second, -1))[:, :first_features]
+
+        return aux_first, aux_second, first_features
+
+
+    def compute_icc(self, data, labels=None):
+        """
+        The compute_icc method computes the intraclass correlation coefficients ICC(2,1) (two-way random effects,
+        absolute agreement, single measure), ICC(3,1) (two-way mixed effects, consistency, single measure) and ICC(1,k)
+        (one-way random effects, average measure) of all the features at once, by considering the repetitions as
+        repeated measures of the subjects.
+
+        :param data:   it is the 3D (subjects*repetitions*features) data matrix, or the 2D (samples*features) data
+                       matrix having the same number of samples for each subject
+        :param labels: it is the list of labels identifying the subject of each sample (used in the 2D case, None by
+                       default)
+
+        :return:       a dictionary containing the array of the values of each feature for the 'ICC(2,1)', 'ICC(3,1)'
+                       and 'ICC(1,k)' keys
+        """
+        return self._icc(self._utils._repeated_3D(data, labels))
+
+
+    def compute_icc_intervals(self, data, labels=None, repetitions=1000, alpha=0.05, seed=None, workers=1):
+        """
+        The compute_icc_intervals method computes the percentile bootstrap confidence intervals of the intraclass
+        correlation coefficients of all the features, by resampling the subjects with replacement.
+
+        :param data:        it is the 3D (subjects*repetitions*features) data matrix, or the 2D (samples*features) data
+                            matrix having the same number of samples for each subject
+        :param labels:      it is the list of labels identifying the subject of each sample (used in the 2D case, None
+                            by default)
+        :param repetitions: it is the number of bootstrap resamplings (1000 by default)
+        :param alpha:       it is the significance level, so that the intervals have a 1-alpha confidence (0.05 by
+                            default)
+        :param seed:        it is the seed used to resample the subjects, in order to obtain reproducible results (None
+                            by default)
+        :param workers:     it is the number of processes among which the resamplings are distributed (1 by default)
+
+        :return:            a dictionary containing the (2*features) matrix of the lower and upper bounds of each
+                            feature for the 'ICC(2,1)', 'ICC(3,1)' and 'ICC(1,k)' keys
+        """
+        data = self._utils._repeated_3D(data, labels)
+        print('Computing ICC bootstrap confidence intervals (' + str(repetitions) + ' resamplings)')
+        sizes = self._utils._blocks_sizes(repetitions, 50)
+        seeds = self._utils._spawn_seeds(seed, len(sizes))
+        blocks = [(data, seeds[b], sizes[b]) for b in range(len(sizes))]
+        resampled = self._utils._run_blocks(self._icc_bootstrap, blocks, workers)
+        intervals = dict()
+        for key in resampled[0].keys():
+            values = np.concatenate([block[key] for block in resampled], axis=0)
+            intervals[key] = np.nanpercentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+        return intervals
+
+
+    def _icc(self, data):
+        """
+        The _icc method computes the intraclass correlation coefficients of all the features, through the two-way
+        analysis of variance sums of squares computed on the whole 3D data matrix (FOR INTERNAL USE ONLY).
+
+        :param data: it is the 3D (subjects*repetitions*features) data matrix
+
+        :return:     a dictionary containing the array of the values of each feature for the 'ICC(2,1)', 'ICC(3,1)' and
+                     'ICC(1,k)' keys
+        """
+        n, k, features = np.shape(data)
+        grand_mean = data.mean(axis=(0, 1))
+        SST = ((data - grand_mean) ** 2).sum(axis=(0, 1))
+        SSR = k * ((data.mean(axis=1) - grand_mean) ** 2).sum(axis=0)
+        SSC = n * ((data.mean(axis=0) - grand_mean) ** 2).sum(axis=0)
+        MSR = SSR / (n - 1)
+        MSC = SSC / (k - 1)
+        MSE = (SST - SSR - SSC) / ((n - 1) * (k - 1))
+        MSW = (SST - SSR) / (n * (k - 1))
+        icc = dict()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            icc['ICC(2,1)'] = (MSR - MSE) / (MSR + (k - 1) * MSE + k * (MSC - MSE) / n)
+            icc['ICC(3,1)'] = (MSR - MSE) / (MSR + (k - 1) * MSE)
+            icc['ICC(1,k)'] = (MSR - MSW) / MSR
+        return icc
+
+
+    def _icc_bootstrap(self, data, seed, resamplings):
+        """
+        The _icc_bootstrap method computes the intraclass correlation coefficients on a block of bootstrap resamplings
+        of the subjects (FOR INTERNAL USE ONLY).
+
+        :param data:        it is the 3D (subjects*repetitions*features) data matrix
+        :param seed:        it is the seed related to the block
+        :param resamplings: it is the number of resamplings of the block
+
+        :return:            a dictionary containing the (resamplings*features) matrix of the values for the 'ICC(2,1)',
+                            'ICC(3,1)' and 'ICC(1,k)' keys
+        """
+        rng = np.random.default_rng(seed)
+        subjects = np.shape(data)[0]
+        values = dict()
+        for b in range(resamplings):
+            icc = self._icc(data[rng.integers(0, subjects, subjects)])
+            for key in icc.keys():
+                values.setdefault(key, []).append(icc[key])
+        return {key: np.array(values[key]) for key in values.keys()}
+
+
+    def compute_permanova(self, distances, groups, subjects=None, repetitions=999, seed=None, workers=1):
+        """
+        The compute_permanova method computes the permutational multivariate analysis of variance (PERMANOVA) on a
+        distance matrix, through the pseudo-F statistic. The permutations exchange the groups of whole subjects, and
+        each block of permutations computes the within-group sums of squares of all its permutations through matrix
+        products between the group membership matrices and the squared distance matrix.
 
-        return aux_first, aux_second, first_features
\ No newline at end of file
+        :param distances:   it is the 2D (samples*samples) distance matrix
+        :param groups:      it is the list identifying the group of each sample
+        :param subjects:    it is the list identifying the subject of each sample, so that the samples of the same
+                            subject are always assigned to the same group (None by default, each sample is considered
+                            as a different subject)
+        :param repetitions: it is the number of permutations (999 by default)
+        :param seed:        it is the seed used to generate the permutations, in order to obtain reproducible results
+                            (None by default)
+        :param workers:     it is the number of processes among which the permutations are distributed (1 by default)
+
+        :return:            the pseudo-F value and the related p-value
+        """
+        squared = np.asarray(distances, dtype=float) ** 2
+        samples = np.shape(squared)[0]
+        group_names, groups = np.unique(np.asarray(groups), return_inverse=True)
+        groups = np.ravel(groups)
+        if subjects is None:
+            subjects = np.arange(samples)
+        units, first_samples, subjects = np.unique(np.asarray(subjects), return_index=True, return_inverse=True)
+        subjects = np.ravel(subjects)
+        units_groups = groups[first_samples]
+        n_groups = len(group_names)
+        total = np.sum(squared) / (2 * samples)
+        pseudo_F = self._pseudo_F(squared, groups[np.newaxis, :], n_groups, total)[0]
+
+        print('Computing PERMANOVA (' + str(repetitions) + ' permutations)')
+        sizes = self._utils._blocks_sizes(repetitions, 100)
+        seeds = self._utils._spawn_seeds(seed, len(sizes))
+        blocks = [(squared, units_groups, subjects, n_groups, total, pseudo_F, seeds[b], sizes[b])
+                  for b in range(len(sizes))]
+        exceeding = np.sum(self._utils._run_blocks(self._permanova_permutations, blocks, workers))
+        return pseudo_F, (exceeding + 1) / (repetitions + 1)
+
+
+    def _pseudo_F(self, squared, groups, n_groups, total):
+        """
+        The _pseudo_F method computes the PERMANOVA pseudo-F statistic of a set of assignments of the samples to the
+        groups, all at once (FOR INTERNAL USE ONLY).
+
+        :param squared:  it is the 2D (samples*samples) matrix of the squared distances
+        :param groups:   it is the 2D (assignments*samples) matrix identifying the group of each sample in each
+                         assignment
+        :param n_groups: it is the number of groups
+        :param total:    it is the total sum of squares
+
+        :return:         the 1D-array of the pseudo-F values of each assignment
+        """
+        samples = np.shape(squared)[0]
+        within = np.zeros(shape=(np.shape(groups)[0],))
+        for g in range(n_groups):
+            membership = (groups == g).astype(float)
+            within += np.sum(np.dot(membership, squared) * membership, axis=1) / (2 * np.sum(membership, axis=1))
+        return ((total - within) / (n_groups - 1)) / (within / (samples - n_groups))
+
+
+    def _permanova_permutations(self, squared, units_groups, subjects, n_groups, total, reference, seed,
+                                permutations):
+        """
+        The _permanova_permutations method executes a block of permutations of the subjects among the groups, counting
+        how many times the pseudo-F statistic reaches the observed one (FOR INTERNAL USE ONLY).
+
+        :param squared:      it is the 2D (samples*samples) matrix of the squared distances
+        :param units_groups: it is the 1D-array identifying the group of each subject
+        :param subjects:     it is the 1D-array identifying the subject of each sample
+        :param n_groups:     it is the number of groups
+        :param total:        it is the total sum of squares
+        :param reference:    it is the observed pseudo-F value
+        :param seed:         it is the seed related to the block
+        :param permutations: it is the number of permutations of the block
+
+        :return:             the number of exceeding pseudo-F values
+        """
+        rng = np.random.default_rng(seed)
+        permuted = np.array([rng.permutation(units_groups) for p in range(permutations)])
+        pseudo_F = self._pseudo_F(squared, permuted[:, subjects], n_groups, total)
+        return np.sum((pseudo_F > reference) | np.isclose(pseudo_F, reference))
+
+
+    def compute_mantel_test(self, first_scores, second_scores, method='pearson', repetitions=999, seed=None,
+                            workers=1, memory_budget=2**27):
+        """
+        The compute_mantel_test method computes the Mantel test between two score (or distance) matrices related to the
+        same samples, in order to evaluate if their similarity structures agree. The test is one-sided, so the p-value
+        represents the probability of a correlation at least as high as the observed one. Each permutation of the
+        samples is applied as an index vector to the condensed form of the second matrix, and each batch of
+        permutations is evaluated through a single matrix product with the centered condensed form of the first one.
+
+        :param first_scores:  it is the first 2D (samples*samples) symmetric matrix, or its condensed form (the 1D-array
+                              of the values over the main diagonal, row by row)
+        :param second_scores: it is the second 2D (samples*samples) symmetric matrix, or its condensed form
+        :param method:        it is the correlation coefficient, between 'pearson' and 'spearman' ('pearson' by
+                              default)
+        :param repetitions:   it is the number of permutations (999 by default)
+        :param seed:          it is the seed used to generate the permutations, in order to obtain reproducible results
+                              (None by default)
+        :param workers:       it is the number of processes among which the permutations are distributed (1 by default)
+        :param memory_budget: it is the maximum number of bytes used by the temporary arrays of each batch of
+                              permutations, i.e. at most three arrays of condensed indexes and the gathered values, 8
+                              bytes each for every pair of samples and every permutation (2**27, i.e. 128 MB, by
+                              default)
+
+        :return:              the correlation coefficient and the related p-value
+        """
+        first = self._condensed(first_scores)
+        second = self._condensed(second_scores)
+        if method == 'spearman':
+            first = rankdata(first)
+            second = rankdata(second)
+        first = first - np.mean(first)
+        second = second - np.mean(second)
+        scale = np.linalg.norm(first) * np.linalg.norm(second)
+        if scale == 0:
+            raise ValueError("The Mantel test requires non-constant values over the main diagonal of both the matrices")
+        first = first / scale
+        samples = int(round((1 + np.sqrt(1 + 8 * len(first))) / 2))
+        correlation = np.dot(second, first)
+
+        print('Computing ' + method + ' Mantel test (' + str(repetitions) + ' permutations)')
+        batch = int(max(1, memory_budget // (8 * 4 * len(first))))
+        sizes = self._utils._blocks_sizes(repetitions, batch)
+        seeds = self._utils._spawn_seeds(seed, len(sizes))
+        blocks = [(first, second, samples, correlation, seeds[b], sizes[b]) for b in range(len(sizes))]
+        exceeding = np.sum(self._utils._run_blocks(self._mantel_permutations, blocks, workers))
+        return correlation, (exceeding + 1) / (repetitions + 1)
+
+
+    def _condensed(self, scores):
+        """
+        The _condensed method provides the condensed form of a symmetric matrix, i.e. the 1D-array of the values over
+        the main diagonal, row by row (FOR INTERNAL USE ONLY).
+
+        :param scores: it is the 2D (samples*samples) symmetric matrix, or its condensed form
+
+        :return:       the condensed 1D-array
+        """
+        scores = np.asarray(scores, dtype=float)
+        if len(np.shape(scores)) == 2:
+            rows, cols = np.triu_indices(np.shape(scores)[0], 1)
+            return scores[rows, cols]
+        return scores
+
+
+    def _mantel_permutations(self, first, second, samples, reference, seed, permutations):
+        """
+        The _mantel_permutations method executes a batch of permutations of the samples of the second matrix, counting
+        how many times the correlation reaches the observed one. The condensed indexes are computed in place, so that
+        at most three arrays of indexes are allocated at once (FOR INTERNAL USE ONLY).
+
+        :param first:        it is the centered and normalized condensed form of the first matrix
+        :param second:       it is the centered condensed form of the second matrix
+        :param samples:      it is the number of samples
+        :param reference:    it is the observed correlation
+        :param seed:         it is the seed related to the batch
+        :param permutations: it is the number of permutations of the batch
+
+        :return:             the number of exceeding correlations
+        """
+        rng = np.random.default_rng(seed)
+        rows, cols = np.triu_indices(samples, 1)
+        permuted = np.array([rng.permutation(samples) for p in range(permutations)])
+        permuted_rows = permuted[:, rows]
+        indexes = permuted[:, cols]
+        low = np.minimum(permuted_rows, indexes)
+        np.maximum(permuted_rows, indexes, out=indexes)
+        del permuted_rows
+        offset = 2 * samples - 3 - low
+        offset *= low
+        offset //= 2
+        indexes += offset
+        indexes -= 1
+        del low, offset
+        correlations = np.dot(second[indexes], first)
+        return np.sum((correlations > reference) | np.isclose(correlations, reference))
\ No newline at end of file
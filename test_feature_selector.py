@@ -0,0 +1,27 @@
+import numpy as np
+from feature_selector import *
+
+
+def test_pooled_unsupervised_fit_with_ragged_labels():
+    rng = np.random.default_rng(0)
+    first = rng.normal(size=(32, 6))
+    second = rng.normal(size=(36, 6))
+    first_labels = np.repeat(np.arange(8), 4)
+    second_labels = np.repeat(np.arange(9), 4)
+    selector = features_selector()
+    for algorithm in ('pca', 'ica', 'random_projection', 'gaussian_projection'):
+        model = selector.fit(algorithm, [first, second], 3, [first_labels, second_labels], seed=0)
+        assert np.shape(selector.transform(model, first)) == (32, 3)
+        assert np.shape(selector.transform(model, second)) == (36, 3)
+
+
+def test_ica_sources_have_unit_variance():
+    rng = np.random.default_rng(1)
+    data = np.dot(rng.laplace(size=(400, 4)), rng.normal(size=(4, 6)))
+    sources = features_selector().ica_selection(data, 4, seed=0)
+    assert np.allclose(np.std(sources, axis=0), 1, atol=1e-6)
+
+
+if __name__ == '__main__':
+    test_pooled_unsupervised_fit_with_ragged_labels()
+    test_ica_sources_have_unit_variance()
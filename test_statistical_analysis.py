@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from scipy.stats import ks_2samp
+from statistical_analysis import *
+from biometric_performance import *
+
+
+def test_kolmogorov_smirnov_on_tied_scores():
+    first = np.round(np.random.default_rng(0).random(20000), 2)
+    second = np.round(np.random.default_rng(1).random(30000), 2)
+    statan = statistical_analysis()
+    stat, pvalue = ks_2samp(first, second)
+    assert np.isclose(statan._sorted_ks(np.sort(first), np.sort(second)), stat)
+    assert np.isclose(statan._sorted_ks(np.array([.5, .5]), np.array([.5])), 0)
+    assert np.isclose(statan.compute_scores_statistics(first, second)[0], pvalue)
+
+
+def test_scores_standard_deviation_near_one():
+    scores = 1 - np.random.default_rng(2).random(100000) * 1e-6
+    mean, median, std = biometric_performance().scores_statistics(scores)
+    assert np.isclose(std, np.std(scores), rtol=1e-9)
+
+
+def test_mantel_test_on_constant_scores():
+    scores = np.random.default_rng(3).random((6, 6))
+    scores = (scores + scores.T) / 2
+    with pytest.raises(ValueError):
+        statistical_analysis().compute_mantel_test(scores, np.ones((6, 6)))
+
+
+if __name__ == '__main__':
+    test_kolmogorov_smirnov_on_tied_scores()
+    test_scores_standard_deviation_near_one()
+    test_mantel_test_on_constant_scores()
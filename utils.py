@@ -1,4 +1,5 @@
 import numpy as np
+from multiprocessing import Pool, shared_memory
 from data_manager import *
 
 class utils():
@@ -47,9 +48,9 @@ class utils():
         features = size[L - 1]
         if L == 2:
             repetitions = self._repetitions_check(data, labels)
+            subjects = int(subjects / repetitions)
         else:
             repetitions = size[1]
-        subjects = int(subjects / repetitions)
 
         return L, subjects, repetitions, features
 
@@ -103,4 +104,217 @@ class utils():
                     second = self._to3D(second, second_subjects, second_repetitions, second_features)
         first = np.reshape(first, (first_subjects, first_repetitions, first_features))
         second = np.reshape(second, (second_subjects, second_repetitions, second_features))
-        return first, second
\ No newline at end of file
+        return first, second
+
+
+    def _spawn_seeds(self, seed, blocks):
+        """
+        The _spawn_seeds method provides an independent seed for each block of a resampling analysis, all of them derived
+        from the same initial seed, so that the results do not depend on how the blocks are distributed among the
+        processes (FOR INTERNAL USE ONLY).
+
+        :param seed:   it is the initial seed (an integer, or None for an unpredictable initial seed)
+        :param blocks: it is the number of blocks
+
+        :return:       the list of seeds, one for each block
+        """
+        return np.random.SeedSequence(seed).spawn(blocks)
+
+
+    def _blocks_sizes(self, repetitions, block_size):
+        """
+        The _blocks_sizes method splits a number of repetitions into blocks having a maximum size (FOR INTERNAL USE
+        ONLY).
+
+        :param repetitions: it is the total number of repetitions
+        :param block_size:  it is the maximum number of repetitions for each block
+
+        :return:            the list containing the number of repetitions of each block
+        """
+        sizes = [block_size] * (repetitions // block_size)
+        if repetitions % block_size > 0:
+            sizes.append(repetitions % block_size)
+        return sizes
+
+
+    def _run_blocks(self, function, blocks, workers=1):
+        """
+        The _run_blocks method executes a function on each block of arguments, sequentially or on a pool of processes
+        (FOR INTERNAL USE ONLY).
+
+        :param function: it is the function which has to be executed on each block
+        :param blocks:   it is the list of tuples representing the arguments of each block
+        :param workers:  it is the number of processes which have to be used (1 by default, sequential execution)
+
+        :return:         the list of results, in the same order as the blocks
+        """
+        if workers is None or workers <= 1 or len(blocks) <= 1:
+            return [function(*block) for block in blocks]
+        with Pool(min(workers, len(blocks))) as pool:
+            return pool.starmap(function, blocks)
+
+
+    def _share_arrays(self, arrays, workers=1):
+        """
+        The _share_arrays method copies the arrays into shared memory when they have to be used by a pool of processes,
+        so that each block of arguments only contains the references to them (FOR INTERNAL USE ONLY).
+
+        :param arrays:  it is the list of arrays
+        :param workers: it is the number of processes which have to be used (1 by default, sequential execution)
+
+        :return:        the list of shared memory blocks (to be released at the end) and the list of references to be
+                        passed to the _attach_arrays method (the arrays themselves in the sequential case)
+        """
+        if workers is None or workers <= 1:
+            return [], list(arrays)
+        memories = []
+        references = []
+        for array in arrays:
+            memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(np.shape(array), dtype=array.dtype, buffer=memory.buf)[...] = array
+            memories.append(memory)
+            references.append((memory.name, np.shape(array), array.dtype.str))
+        return memories, references
+
+
+    def _attach_arrays(self, references):
+        """
+        The _attach_arrays method provides the arrays related to the references returned by the _share_arrays method
+        (FOR INTERNAL USE ONLY).
+
+        :param references: it is the list of references
+
+        :return:           the list of arrays and the list of shared memory blocks to be detached once the arrays are
+                           not used anymore
+        """
+        arrays = []
+        memories = []
+        for reference in references:
+            if isinstance(reference, np.ndarray):
+                arrays.append(reference)
+            else:
+                memory = shared_memory.SharedMemory(name=reference[0])
+                arrays.append(np.ndarray(reference[1], dtype=np.dtype(reference[2]), buffer=memory.buf))
+                memories.append(memory)
+        return arrays, memories
+
+
+    def _detach_arrays(self, memories):
+        """
+        The _detach_arrays method closes the shared memory blocks attached by a process (FOR INTERNAL USE ONLY).
+
+        :param memories: it is the list of shared memory blocks
+        """
+        for memory in memories:
+            memory.close()
+
+
+    def _release_arrays(self, memories):
+        """
+        The _release_arrays method closes and frees the shared memory blocks created by the _share_arrays method (FOR
+        INTERNAL USE ONLY).
+
+        :param memories: it is the list of shared memory blocks
+        """
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+
+    def _repeated_3D(self, data, labels=None):
+        """
+        The _repeated_3D method provides the 3D (subjects*repetitions*features) data matrix in which the repetitions of
+        each subject keep their original order, as required by the analysis which consider the repetitions as repeated
+        measures (FOR INTERNAL USE ONLY).
+
+        :param data:   it is the 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param labels: it is the list of labels identifying the subject of each sample (used in the 2D case, None by
+                       default)
+
+        :return:       the 3D (subjects*repetitions*features) data matrix
+        """
+        data = np.asarray(data, dtype=float)
+        if len(np.shape(data)) == 2:
+            repetitions = 0
+            if not (labels is None):
+                L, subjects, repetitions, features = self._dimensions(data, labels)
+            if repetitions < 2:
+                raise ValueError("The analysis requires the same number (at least two) of repetitions for each "
+                                 "subject")
+            data = data[np.argsort(labels, kind='stable')]
+            data = np.reshape(data, (subjects, repetitions, features))
+        return data
+
+
+    def _matched_samples(self, first, second, first_labels=None, second_labels=None):
+        """
+        The _matched_samples method keeps the samples of the subjects appearing in both the data matrices, as required
+        by the paired analysis of the same subjects under two conditions (FOR INTERNAL USE ONLY).
+
+        :param first:         it is the first 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param second:        it is the second 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param first_labels:  it is the list of labels identifying the subject of each sample of the first data matrix
+                              (required in the 2D case, None by default)
+        :param second_labels: it is the list of labels identifying the subject of each sample of the second data matrix
+                              (required in the 2D case, None by default)
+
+        :return:              the two 2D (samples*features) data matrices and the two arrays of labels restricted to the
+                              matched subjects, and the array of labels of the matched subjects
+        """
+        first, first_labels = self._data_manager.data_management(first, first_labels)
+        second, second_labels = self._data_manager.data_management(second, second_labels)
+        if first_labels is None or second_labels is None:
+            raise ValueError("The paired analysis requires the labels of the subjects of 2D data matrices")
+        first_labels = np.ravel(first_labels)
+        second_labels = np.ravel(second_labels)
+        subjects = np.intersect1d(first_labels, second_labels)
+        if len(subjects) < 2:
+            raise ValueError("The paired analysis requires at least two subjects appearing in both the data matrices")
+        if len(subjects) < len(np.unique(first_labels)) or len(subjects) < len(np.unique(second_labels)):
+            print('Matched ' + str(len(subjects)) + ' subjects, the ones appearing in only one data matrix are '
+                  'discarded')
+        first_mask = np.isin(first_labels, subjects)
+        second_mask = np.isin(second_labels, subjects)
+        return np.asarray(first, dtype=float)[first_mask], np.asarray(second, dtype=float)[second_mask], \
+            first_labels[first_mask], second_labels[second_mask], subjects
+
+
+    def _paired_means(self, first, second, first_labels=None, second_labels=None):
+        """
+        The _paired_means method provides the mean of the repetitions of each subject appearing in both the data
+        matrices, in the same order of subjects for the two matrices (FOR INTERNAL USE ONLY).
+
+        :param first:         it is the first 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param second:        it is the second 3D (subjects*repetitions*features) or 2D (samples*features) data matrix
+        :param first_labels:  it is the list of labels identifying the subject of each sample of the first data matrix
+                              (required in the 2D case, None by default)
+        :param second_labels: it is the list of labels identifying the subject of each sample of the second data matrix
+                              (required in the 2D case, None by default)
+
+        :return:              the two 2D (subjects*features) matrices of the means of each matched subject, and the
+                              array of labels of the matched subjects
+        """
+        first, second, first_labels, second_labels, subjects = self._matched_samples(first, second, first_labels,
+                                                                                     second_labels)
+        means = []
+        for data, labels in [(first, first_labels), (second, second_labels)]:
+            indicator = np.asarray(labels[np.newaxis, :] == subjects[:, np.newaxis], dtype=float)
+            means.append(np.dot(indicator, data) / np.sum(indicator, axis=1)[:, np.newaxis])
+        return means[0], means[1], subjects
+
+
+    def _union_subjects(self, first_labels, second_labels):
+        """
+        The _union_subjects method identifies the subject of each sample of the union of two groups (the samples of the
+        first group followed by the ones of the second group) through consecutive integers, so that the subjects of
+        different groups are always distinguished (FOR INTERNAL USE ONLY).
+
+        :param first_labels:  it is the list of labels identifying the subject of each sample of the first group
+        :param second_labels: it is the list of labels identifying the subject of each sample of the second group
+
+        :return:              the 1D-array representing the subject of each sample of the union, and the number of
+                              subjects of the first group
+        """
+        first_subjects, first_ids = np.unique(np.asarray(first_labels), return_inverse=True)
+        second_subjects, second_ids = np.unique(np.asarray(second_labels), return_inverse=True)
+        return np.concatenate((np.ravel(first_ids), np.ravel(second_ids) + len(first_subjects))), len(first_subjects)
\ No newline at end of file